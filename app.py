@@ -1,14 +1,18 @@
-from flask import Flask, jsonify, abort
+from flask import Flask, jsonify, abort, request
 from flask_cors import CORS
 from flasgger import Swagger
 from sqlalchemy import create_engine
 from sqlalchemy import cast, Integer
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, joinedload
 import os
+from functools import wraps
 from models.base import Base
 from models.scores import *
 from models.draft import *
 from models.transactions import *
+from services.rankings import rank_fantasy_teams
+from services.draftengine import draft_pool_engine
+from services.cache import ResponseCache, GLOBAL_SCOPE, league_scope, draft_scope, get_cache_versions
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -53,7 +57,64 @@ Base.metadata.create_all(engine)
 
 Session = sessionmaker(bind=engine)
 
+# Responses are cached in memory and keyed by the version counters the bot bumps after writes
+response_cache = ResponseCache(maxsize=int(os.getenv("API_CACHE_SIZE", 512)), ttl=float(os.getenv("API_CACHE_TTL", 300)))
+
+def cached(*scopes):
+    """
+    Serve a route from response_cache. scopes are format strings filled in from the
+    route parameters, e.g. league_scope("{leagueId}"). The global scope always applies.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            scopeNames = [GLOBAL_SCOPE] + [scope.format(**kwargs) for scope in scopes]
+            with Session() as session:
+                versions = get_cache_versions(session, scopeNames)
+            key = (view.__name__, tuple(sorted(kwargs.items())), versions)
+            cachedResponse = response_cache.get(key)
+            if cachedResponse is not None:
+                data, mimetype, etag = cachedResponse
+                response = app.response_class(data, mimetype=mimetype)
+                response.set_etag(etag)
+                return response
+            response = app.make_response(view(**kwargs))
+            if response.status_code == 200:
+                response.add_etag()
+                etag, _ = response.get_etag()
+                response_cache.set(key, (response.get_data(), response.mimetype, etag))
+            return response
+        return wrapper
+    return decorator
+
+@app.after_request
+def make_api_response_conditional(response):
+    """
+    Tag every successful API response with an ETag and answer matching
+    If-None-Match requests with 304 Not Modified instead of the full body.
+    """
+    if request.method == 'GET' and request.path.startswith('/api/') \
+            and response.status_code == 200 and not response.direct_passthrough:
+        if response.get_etag()[0] is None:
+            response.add_etag()
+        # Clients may keep the body but must revalidate it before every use
+        response.cache_control.no_cache = True
+        response.make_conditional(request)
+    return response
+
+def score_breakdown(team_score: TeamScore):
+    """Point categories of a TeamScore as returned by the score endpoints."""
+    return {
+        "qual_points": team_score.qual_points,
+        "alliance_points": team_score.alliance_points,
+        "elim_points": team_score.elim_points,
+        "award_points": team_score.award_points,
+        "rookie_points": team_score.rookie_points,
+        "stat_correction": team_score.stat_correction
+    }
+
 @app.route('/api/leagues', methods=['GET'])
+@cached()
 def get_leagues():
     """
     Retrieve a list of active leagues.
@@ -111,6 +172,7 @@ def get_leagues():
     } for league in leagues])
 
 @app.route('/api/leagues/<int:leagueId>', methods=['GET'])
+@cached(league_scope("{leagueId}"))
 def get_league(leagueId):
     """
     Retrieve a league's data.
@@ -154,6 +216,7 @@ def get_league(leagueId):
     return jsonify({"league_id": league.league_id, "league_name": league.league_name, "weekly_starts": league.team_starts, "year": league.year, "is_fim": league.is_fim} )
 
 @app.route('/api/leagues/<int:leagueId>/fantasyTeams', methods=['GET'])
+@cached(league_scope("{leagueId}"))
 def get_fantasy_teams(leagueId):
     """
     Retrieve a list of fantasy teams for a specific league.
@@ -190,6 +253,7 @@ def get_fantasy_teams(leagueId):
     return jsonify([{"fantasy_team_id": team.fantasy_team_id, "team_name": team.fantasy_team_name} for team in teams])
 
 @app.route('/api/leagues/<int:leagueId>/teamsOnWaivers', methods=['GET'])
+@cached(league_scope("{leagueId}"))
 def get_waiver_teams(leagueId):
     """
     Retrieve a list of teams on waivers for a specific league, including their registered events and Statbotics data. 
@@ -285,6 +349,7 @@ def get_waiver_teams(leagueId):
         return jsonify(list(waiver_teams.values()))
 
 @app.route('/api/leagues/<int:leagueId>/rosters', methods=["GET"])
+@cached(league_scope("{leagueId}"))
 def get_rosters(leagueId):
     """
     Retrieve the rosters for all fantasy teams in a specific league. Will only return data if league is_fim.
@@ -331,17 +396,31 @@ def get_rosters(leagueId):
         session.close()
         return jsonify([])
     
-    teams = session.query(FantasyTeam).filter(FantasyTeam.league_id==leagueId).order_by(FantasyTeam.fantasy_team_id.asc()).all()
-    teamsOwnedInLeague = session.query(TeamOwned).filter(TeamOwned.league_id==leagueId)
-    output = []
-    for team in teams:
-        output.append({"fantasy_team_id":team.fantasy_team_id,\
-                       "fantasy_team_name":team.fantasy_team_name,\
-                        "roster": [frcteam.team_key for frcteam in teamsOwnedInLeague.filter(TeamOwned.fantasy_team_id==team.fantasy_team_id).all()]})
+    # One outer join pulls every fantasy team with its owned teams, so the
+    # query count stays flat no matter how many teams are in the league
+    rosterRows = session.query(
+        FantasyTeam.fantasy_team_id,
+        FantasyTeam.fantasy_team_name,
+        TeamOwned.team_key
+    ).outerjoin(
+        TeamOwned, (TeamOwned.fantasy_team_id == FantasyTeam.fantasy_team_id) & (TeamOwned.league_id == leagueId)
+    ).filter(
+        FantasyTeam.league_id == leagueId
+    ).order_by(FantasyTeam.fantasy_team_id.asc()).all()
     session.close()
-    return jsonify(output)
+
+    rosters = {}
+    for row in rosterRows:
+        if row.fantasy_team_id not in rosters:
+            rosters[row.fantasy_team_id] = {"fantasy_team_id": row.fantasy_team_id,
+                                            "fantasy_team_name": row.fantasy_team_name,
+                                            "roster": []}
+        if row.team_key is not None:
+            rosters[row.fantasy_team_id]["roster"].append(row.team_key)
+    return jsonify(list(rosters.values()))
 
 @app.route('/api/leagues/<int:leagueId>/rosterWeeks', methods=["GET"])
+@cached(league_scope("{leagueId}"))
 def get_roster_weeks(leagueId):
     """
     Retrieve the weeks and events for teams on every fantasy team's roster in a specific league.
@@ -406,43 +485,69 @@ def get_roster_weeks(leagueId):
         session.close()
         return jsonify([])
     
-    teams = session.query(FantasyTeam).filter(FantasyTeam.league_id == leagueId).order_by(FantasyTeam.fantasy_team_id.asc()).all()
-    teamsOwnedInLeague = session.query(TeamOwned).filter(TeamOwned.league_id == leagueId)
-    
-    output = []
-    
-    for team in teams:
-        team_roster = teamsOwnedInLeague.filter(TeamOwned.fantasy_team_id == team.fantasy_team_id).all()
-        roster_output = []
-        
-        for frcteam in team_roster:
-            # Retrieve the events the team is competing in
-            events = session.query(FRCEvent)\
-                .join(TeamScore, TeamScore.event_key == FRCEvent.event_key)\
-                .filter(TeamScore.team_key == frcteam.team_key)\
-                .filter(FRCEvent.year == league.year)\
-                .filter(FRCEvent.week < 6)\
-                .all()
-
-            event_details = [{"event_key": event.event_key, "event_name": event.event_name, "week": event.week} for event in events]
-
-            
-            roster_output.append({
-                "team_key": frcteam.team_key,
-                "events": event_details
-            })
-        
-        output.append({
-            "fantasy_team_id": team.fantasy_team_id,
-            "fantasy_team_name": team.fantasy_team_name,
-            "roster": roster_output
-        })
-    
+    # Events each team attends before States, restricted to the league's year
+    seasonEvents = session.query(
+        TeamScore.team_key,
+        FRCEvent.event_key,
+        FRCEvent.event_name,
+        FRCEvent.week
+    ).join(
+        FRCEvent, TeamScore.event_key == FRCEvent.event_key
+    ).filter(
+        FRCEvent.year == league.year,
+        FRCEvent.week < 6
+    ).subquery()
+
+    # One join over FantasyTeam -> TeamOwned -> TeamScore -> FRCEvent for the whole league
+    rosterRows = session.query(
+        FantasyTeam.fantasy_team_id,
+        FantasyTeam.fantasy_team_name,
+        TeamOwned.team_key,
+        seasonEvents.c.event_key,
+        seasonEvents.c.event_name,
+        seasonEvents.c.week
+    ).outerjoin(
+        TeamOwned, (TeamOwned.fantasy_team_id == FantasyTeam.fantasy_team_id) & (TeamOwned.league_id == leagueId)
+    ).outerjoin(
+        seasonEvents, seasonEvents.c.team_key == TeamOwned.team_key
+    ).filter(
+        FantasyTeam.league_id == leagueId
+    ).order_by(
+        FantasyTeam.fantasy_team_id.asc(),
+        TeamOwned.team_key.asc(),
+        seasonEvents.c.week.asc()
+    ).all()
+
     session.close()
-    return jsonify(output)
+
+    # Group the flat rows back into fantasy team -> roster -> events
+    output = {}
+    for row in rosterRows:
+        if row.fantasy_team_id not in output:
+            output[row.fantasy_team_id] = {
+                "fantasy_team_id": row.fantasy_team_id,
+                "fantasy_team_name": row.fantasy_team_name,
+                "roster": {}
+            }
+        if row.team_key is None:
+            continue
+        roster = output[row.fantasy_team_id]["roster"]
+        if row.team_key not in roster:
+            roster[row.team_key] = {
+                "team_key": row.team_key,
+                "events": []
+            }
+        if row.event_key is not None:
+            roster[row.team_key]["events"].append({"event_key": row.event_key, "event_name": row.event_name, "week": row.week})
+
+    for team in output.values():
+        team["roster"] = list(team["roster"].values())
+
+    return jsonify(list(output.values()))
 
 
 @app.route('/api/drafts/<int:draftId>/picks', methods=["GET"])
+@cached(draft_scope("{draftId}"))
 def get_draft_picks(draftId):
     """
     Retrieve a list of draft picks for a specific draft, including the events teams compete in with their weeks. Will not return week data if league.is_fim is false
@@ -529,6 +634,7 @@ def get_draft_picks(draftId):
     return jsonify(picks_data)
 
 @app.route('/api/drafts/<int:draftId>/draftOrder', methods=['GET'])
+@cached(draft_scope("{draftId}"))
 def get_draft_order(draftId):
     """
     Get Draft Order for a Specific Draft
@@ -574,6 +680,7 @@ def get_draft_order(draftId):
     } for draft in draft_order])
 
 @app.route('/api/leagues/<int:leagueId>/lineups', methods=['GET'])
+@cached(league_scope("{leagueId}"))
 def get_lineups(leagueId):
     """
     Retrieve the lineups for all fantasy teams in a specified league for all weeks.
@@ -672,6 +779,7 @@ def get_lineups(leagueId):
     return jsonify(final_output), 200
 
 @app.route('/api/leagues/<int:leagueId>/fantasyScores/<int:week>', methods=['GET'])
+@cached(league_scope("{leagueId}"))
 def get_fantasy_scores(leagueId, week):
     """
     Retrieve the fantasy scores for all fantasy teams in a specified league for a specific week.
@@ -752,62 +860,50 @@ def get_fantasy_scores(leagueId, week):
     """
     session = Session()
     
-    # Query to get fantasy scores for the given league and week
-    fantasy_scores = session.query(FantasyScores).filter(
+    # Query to get fantasy scores for the given league and week, along with the fantasy team
+    fantasy_scores = session.query(FantasyScores, FantasyTeam).join(
+        FantasyTeam, FantasyScores.fantasy_team_id == FantasyTeam.fantasy_team_id
+    ).filter(
         FantasyScores.league_id == leagueId,
         FantasyScores.week == week
     ).order_by(FantasyScores.fantasy_team_id.asc()).all()
-    
-    # Prepare the output
+
+    # Get every started team in the league for the week with its score at the started event
+    started_teams = session.query(TeamStarted.fantasy_team_id, TeamStarted.team_number, TeamScore).join(
+        TeamScore, (TeamScore.team_key == TeamStarted.team_number) & (TeamScore.event_key == TeamStarted.event_key)
+    ).filter(
+        TeamStarted.league_id == leagueId,
+        TeamStarted.week == week
+    ).all()
+
+    session.close()
+
+    # Prepare a breakdown of scores per fantasy team
+    team_scores_breakdown = {}
+    for started_team in started_teams:
+        team_scores_breakdown.setdefault(started_team.fantasy_team_id, []).append({
+            "team_number": started_team.team_number,
+            "weekly_score": started_team.TeamScore.score_team(),
+            "breakdown": score_breakdown(started_team.TeamScore)
+        })
+
+    # Prepare the output, only including fantasy teams that started teams
     output = []
-    for score in fantasy_scores:
-        # Get the fantasy team details
-        fantasy_team = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id == score.fantasy_team_id).first()
-        
-        # Get the teams started by this fantasy team for the specified week
-        started_teams = session.query(TeamStarted).filter(
-            TeamStarted.fantasy_team_id == score.fantasy_team_id,
-            TeamStarted.week == week
-        ).all()
-        
-        # Prepare a breakdown of scores
-        team_scores_breakdown = []
-        for started_team in started_teams:
-            # Get the team score for the started team
-            team_score = session.query(TeamScore).filter(
-                TeamScore.team_key == started_team.team_number,
-                TeamScore.event_key == started_team.event_key  # Assuming the event_key relates to the TeamScore table
-            ).first()
-            
-            if team_score:
-                team_scores_breakdown.append({
-                    "team_number": started_team.team_number,
-                    "weekly_score": team_score.score_team(),
-                    "breakdown": {
-                    "qual_points": team_score.qual_points,
-                    "alliance_points": team_score.alliance_points,
-                    "elim_points": team_score.elim_points,
-                    "award_points": team_score.award_points,
-                    "rookie_points": team_score.rookie_points,
-                    "stat_correction": team_score.stat_correction
-                    }  # Calculate total score using the method in TeamScore
-                })
-        
-        # Append to the output if any teams were started
-        if team_scores_breakdown:
+    for score, fantasy_team in fantasy_scores:
+        if score.fantasy_team_id in team_scores_breakdown:
             output.append({
                 "fantasy_team_id": fantasy_team.fantasy_team_id,
                 "fantasy_team_name": fantasy_team.fantasy_team_name,
                 "weekly_score": score.weekly_score,
                 "rank_points": score.rank_points,
                 "week": week,
-                "teams": team_scores_breakdown
+                "teams": team_scores_breakdown[score.fantasy_team_id]
             })
-    
-    session.close()
+
     return jsonify(output)
 
 @app.route('/api/drafts/<int:draftId>/fantasyScores', methods=['GET'])
+@cached(draft_scope("{draftId}"))
 def get_draft_scores(draftId):
     """
     Retrieve the fantasy scores for all fantasy teams in a specified draft (use for single event leagues).
@@ -883,70 +979,62 @@ def get_draft_scores(draftId):
         description: Internal server error.
     """
     session = Session()
-    draft: Draft = session.query(Draft).filter(Draft.draft_id==draftId).first()
+    draft: Draft = session.query(Draft).options(
+        joinedload(Draft.league),
+        joinedload(Draft.event)
+    ).filter(Draft.draft_id==draftId).first()
     if not draft:
+        session.close()
         abort(404, "No draft found.")
 
     league: League = draft.league
     if league.is_fim:
+        session.close()
         abort(400, "Cannot make this request on a FiM league.")
 
-    # Query to get fantasy scores for the given league
-    fantasy_scores = session.query(FantasyScores).filter(
+    # Query to get fantasy scores for the given league, eager loading the fantasy team
+    fantasy_scores = session.query(FantasyScores).options(
+        joinedload(FantasyScores.fantasyTeam)
+    ).filter(
         FantasyScores.league_id == league.league_id,
         FantasyScores.event_key == draft.event_key
     ).order_by(FantasyScores.fantasy_team_id.asc()).all()
-    
-    # Prepare the output
+
+    # Get every drafted team in the draft with its score at the drafted event
+    drafted_teams = session.query(DraftPick.fantasy_team_id, DraftPick.team_number, TeamScore).join(
+        TeamScore, (TeamScore.team_key == DraftPick.team_number) & (TeamScore.event_key == draft.event_key)
+    ).filter(
+        DraftPick.draft_id == draftId
+    ).order_by(DraftPick.pick_number.asc()).all()
+
+    session.close()
+
+    # Prepare a breakdown of scores per fantasy team
+    team_scores_breakdown = {}
+    for drafted_team in drafted_teams:
+        team_scores_breakdown.setdefault(drafted_team.fantasy_team_id, []).append({
+            "team_number": drafted_team.team_number,
+            "event_score": drafted_team.TeamScore.score_team(),
+            "breakdown": score_breakdown(drafted_team.TeamScore)
+        })
+
+    # Prepare the output, only including fantasy teams with scored picks
     output = []
     for score in fantasy_scores:
-        # Get the fantasy team details
-        fantasy_team = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id == score.fantasy_team_id).first()
-        
-        # Get the teams draft by this fantasy team for the specified draft
-        drafted_teams = session.query(DraftPick).filter(
-            DraftPick.fantasy_team_id == score.fantasy_team_id,
-            DraftPick.draft_id == draftId
-        ).all()
-        
-        # Prepare a breakdown of scores
-        team_scores_breakdown = []
-        for drafted_team in drafted_teams:
-            # Get the team score for the started team
-            team_score = session.query(TeamScore).filter(
-                TeamScore.team_key == drafted_team.team_number,
-                TeamScore.event_key == draft.event_key
-            ).first()
-            
-            if team_score:
-                team_scores_breakdown.append({
-                    "team_number": drafted_team.team_number,
-                    "event_score": team_score.score_team(),
-                    "breakdown": {
-                    "qual_points": team_score.qual_points,
-                    "alliance_points": team_score.alliance_points,
-                    "elim_points": team_score.elim_points,
-                    "award_points": team_score.award_points,
-                    "rookie_points": team_score.rookie_points,
-                    "stat_correction": team_score.stat_correction
-                    }  # Calculate total score using the method in TeamScore
-                })
-        
-        # Append to the output if any teams were started
-        if team_scores_breakdown:
+        if score.fantasy_team_id in team_scores_breakdown:
             output.append({
-                "fantasy_team_id": fantasy_team.fantasy_team_id,
-                "fantasy_team_name": fantasy_team.fantasy_team_name,
+                "fantasy_team_id": score.fantasyTeam.fantasy_team_id,
+                "fantasy_team_name": score.fantasyTeam.fantasy_team_name,
                 "event_score": score.weekly_score,
                 "rank_points": score.rank_points,
                 "week": draft.event.week,
-                "teams": team_scores_breakdown
+                "teams": team_scores_breakdown[score.fantasy_team_id]
             })
-    
-    session.close()
+
     return jsonify(output)
 
 @app.route('/api/leagues/<int:leagueId>/waiverPriority', methods=['GET'])
+@cached(league_scope("{leagueId}"))
 def get_waiver_priority(leagueId):
     """
     Get Waiver Priority for a Specific League, including Fantasy Team names. If league isn't FiM then return an empty array.
@@ -1021,6 +1109,7 @@ def get_waiver_priority(leagueId):
         } for waiver in waiver_priority])
 
 @app.route('/api/leagues/<int:leagueId>/rankings', methods=['GET'])
+@cached(league_scope("{leagueId}"))
 def get_league_rankings(leagueId):
     """
     Retrieve cumulative rankings per week for every team in a league, sorted by cumulative ranking points,
@@ -1079,49 +1168,39 @@ def get_league_rankings(leagueId):
         session.close()
         return jsonify({"error": "League not found"}), 404
 
-    # Query for the weeks with finalized scores for the league's year
-    finalized_weeks = session.query(WeekStatus).filter(
+    # Only weeks with finalized scores for the league's year count towards rankings
+    finalized_weeks = session.query(WeekStatus.week).filter(
         WeekStatus.year == league.year,
         WeekStatus.scores_finalized == True
-    ).all()
+    ).scalar_subquery()
 
-    finalized_week_numbers = {week.week for week in finalized_weeks}
-
-    # Query for the fantasy teams in the specified league
-    fantasy_teams = session.query(FantasyTeam).filter(FantasyTeam.league_id == leagueId).all()
-
-    result = []
-
-    for team in fantasy_teams:
-        # Get all the scores for the fantasy team, filtering by finalized weeks
-        scores = session.query(FantasyScores).filter(
-            FantasyScores.fantasy_team_id == team.fantasy_team_id,
-            FantasyScores.week.in_(finalized_week_numbers)
-        ).order_by(FantasyScores.week.asc()).all()
-
-        total_ranking_points = sum(score.rank_points for score in scores)
-        total_weekly_score = sum(score.weekly_score for score in scores)  # Calculate cumulative weekly score
-        #TODO: incorporate scores for single-run events
-        weekly_scores = [{"week": score.week,
-                          "ranking_points": score.rank_points,
-                          "weekly_score": score.weekly_score} for score in scores]
-
-        result.append({
-            "fantasy_team_id": team.fantasy_team_id,
-            "fantasy_team_name": team.fantasy_team_name,
-            "total_ranking_points": total_ranking_points,
-            "tiebreaker": total_weekly_score,  # Add cumulative weekly score
-            "weekly_scores": weekly_scores
-        })
+    rankings = rank_fantasy_teams(session, leagueId, FantasyScores.week.in_(finalized_weeks)).all()
 
-    # Sort by total ranking points and total weekly score
-    result.sort(key=lambda x: (x["total_ranking_points"], x["tiebreaker"]), reverse=True)
+    # Weekly breakdown for every team in the league
+    scores = session.query(FantasyScores).filter(
+        FantasyScores.league_id == leagueId,
+        FantasyScores.week.in_(finalized_weeks)
+    ).order_by(FantasyScores.week.asc()).all()
 
     session.close()
 
-    return jsonify(result)
+    #TODO: incorporate scores for single-run events
+    weekly_scores = {}
+    for score in scores:
+        weekly_scores.setdefault(score.fantasy_team_id, []).append({"week": score.week,
+                                                                   "ranking_points": score.rank_points,
+                                                                   "weekly_score": score.weekly_score})
+
+    return jsonify([{
+        "fantasy_team_id": team.fantasy_team_id,
+        "fantasy_team_name": team.fantasy_team_name,
+        "total_ranking_points": team.total_ranking_points,
+        "tiebreaker": team.tiebreaker,
+        "weekly_scores": weekly_scores.get(team.fantasy_team_id, [])
+    } for team in rankings])
 
 @app.route('/api/leagues/<int:leagueId>/statesTeams', methods=['GET'])
+@cached(league_scope("{leagueId}"))
 def get_states_round_team_ids(leagueId):
     """
     Retrieve the top 3 fantasy team IDs in the states round based on total ranking points,
@@ -1157,36 +1236,15 @@ def get_states_round_team_ids(leagueId):
     # Define the maximum week for scoring
     max_week = 5
 
-    # Query for the fantasy teams in the specified league
-    fantasy_teams = session.query(FantasyTeam).filter(FantasyTeam.league_id == leagueId).all()
-
-    result = []
-
-    for team in fantasy_teams:
-        # Get all the scores for the fantasy team up to week 5
-        scores = session.query(FantasyScores).filter(
-            FantasyScores.fantasy_team_id == team.fantasy_team_id,
-            FantasyScores.week <= max_week
-        ).order_by(FantasyScores.week.asc()).all()
-
-        total_ranking_points = sum(score.rank_points for score in scores)
-        
-        result.append({
-            "fantasy_team_id": team.fantasy_team_id,
-            "total_ranking_points": total_ranking_points
-        })
-
-    # Sort by total ranking points
-    result.sort(key=lambda x: x["total_ranking_points"], reverse=True)
-
     # Get the top 3 fantasy team IDs
-    top_team_ids = [team["fantasy_team_id"] for team in result[:3]]
+    top_teams = rank_fantasy_teams(session, leagueId, FantasyScores.week <= max_week).limit(3).all()
 
     session.close()
 
-    return jsonify(top_team_ids)
+    return jsonify([team.fantasy_team_id for team in top_teams])
 
 @app.route('/api/leagues/<int:leagueId>/drafts', methods=['GET'])
+@cached(league_scope("{leagueId}"))
 def get_league_drafts(leagueId):
     """
     Retrieve all drafts in a league with their draft ID, round, and event key.
@@ -1244,6 +1302,7 @@ def get_league_drafts(leagueId):
     return jsonify(result)
 
 @app.route('/api/drafts/<int:draftId>/availableTeams', methods=['GET'])
+@cached(draft_scope("{draftId}"))
 def get_available_teams(draftId):
     """
     Retrieve all available teams for a specific draft, including their registered events and Statbotics data.
@@ -1284,11 +1343,10 @@ def get_available_teams(draftId):
                       description: The week of the event.
               year_end_epa:
                 type: integer
-                description: The year-end EPA from Statbotics data for the previous year.
+                description: The year-end EPA from Statbotics data for the previous year (the current year for offseason leagues).
       404:
         description: Draft not found
     """
-    # Create a new session
     with Session() as session:
         # Retrieve the draft to ensure it exists
         draft = session.query(Draft).filter(Draft.draft_id == draftId).first()
@@ -1296,89 +1354,43 @@ def get_available_teams(draftId):
         if draft is None:
             abort(404, description="Draft not found")
 
-        # Determine if the league is FIM
-        isFiM = draft.league.is_fim
-        eventKey = draft.event_key
-        year = draft.league.year
-        previous_year = year - 1  # Calculate previous year
-
-        # Base query
-        base_query = None
-        if isFiM:
-          base_query = session.query(
-              Team.team_number,
-              Team.name,  # Add team name to the query
-              FRCEvent.event_key,
-              FRCEvent.week,
-              StatboticsData.year_end_epa
-          ).join(TeamScore, Team.team_number == TeamScore.team_key).join(
-              FRCEvent, TeamScore.event_key == FRCEvent.event_key
-          ).outerjoin(
-              StatboticsData, (Team.team_number == StatboticsData.team_number) & (StatboticsData.year == previous_year)
-          ).filter(
-              FRCEvent.year == year,
-              Team.team_number.notin_(
-                  session.query(DraftPick.team_number).filter(
-                      DraftPick.draft_id == draftId,
-                      DraftPick.team_number != '-1'
-                  )
-              )
-          )
-        else:
-            base_query = session.query(
-              Team.team_number,
-              Team.name,  # Add team name to the query
-              FRCEvent.event_key,
-              FRCEvent.week,
-              StatboticsData.year_end_epa
-          ).join(TeamScore, Team.team_number == TeamScore.team_key).join(
-              FRCEvent, TeamScore.event_key == FRCEvent.event_key
-          ).outerjoin(
-              StatboticsData, (Team.team_number == StatboticsData.team_number) & (StatboticsData.year == year)
-          ).filter(
-              FRCEvent.year == year,
-              TeamScore.event_key==eventKey,
-              Team.team_number.notin_(
-                  session.query(DraftPick.team_number).filter(
-                      DraftPick.draft_id == draftId,
-                      DraftPick.team_number != '-1'
-                  )
-              )
-          )
-        # Add condition for FIM
-        if isFiM:
-            base_query = base_query.filter(Team.is_fim == isFiM)
-
-        # Execute the query and order by year_end_epa descending, with 0s coming last
-        result = base_query.order_by(
-            (StatboticsData.year_end_epa == 0).asc(),  # Place 0s last
-            StatboticsData.year_end_epa.desc(),  # Sort by year_end_epa in descending order
-            Team.team_number.asc()  # Sort by team_number in ascending order
-        ).all()
-
-        # Prepare the available teams list with events and Statbotics data
-        available_teams = {}
+        league = draft.league
 
-        for row in result:
-            team_number = row.team_number
-            team_name = row.name  # Add the team name
-            event_key = row.event_key
-            week = row.week
-            year_end_epa = row.year_end_epa if row.year_end_epa is not None else 0  # Set default value if None
+        # Remaining teams in EPA order, read from the pool maintained as picks are made
+        pool = draft_pool_engine.available_pool(session, draft, league)
+        team_numbers = [team_number for team_number, _ in pool]
 
-            if team_number not in available_teams:
-                available_teams[team_number] = {
-                    "team_number": team_number,
-                    "name": team_name,  # Include team name in the response
-                    "events": [],
-                    "year_end_epa": year_end_epa
-                }
-
-            available_teams[team_number]["events"].append({"event_key": event_key, "week": week})
+        # Names and registered events of the remaining teams
+        names = dict(session.query(Team.team_number, Team.name).filter(Team.team_number.in_(team_numbers)).all())
+        events_query = session.query(
+            TeamScore.team_key,
+            FRCEvent.event_key,
+            FRCEvent.week
+        ).join(FRCEvent, TeamScore.event_key == FRCEvent.event_key).filter(
+            FRCEvent.year == league.year,
+            TeamScore.team_key.in_(team_numbers)
+        )
+        if not league.is_fim:
+            events_query = events_query.filter(TeamScore.event_key == draft.event_key)
+
+        events = {}
+        for row in events_query.order_by(FRCEvent.week.asc()).all():
+            events.setdefault(row.team_key, []).append({"event_key": row.event_key, "week": row.week})
+
+        available_teams = [
+            {
+                "team_number": team_number,
+                "name": names.get(team_number),
+                "events": events.get(team_number, []),
+                "year_end_epa": year_end_epa if year_end_epa is not None else 0
+            }
+            for team_number, year_end_epa in pool
+        ]
 
-        return jsonify(list(available_teams.values()))
+        return jsonify(available_teams)
 
 @app.route('/api/drafts/<int:draftId>', methods=['GET'])
+@cached(draft_scope("{draftId}"))
 def get_draft_info(draftId):
     """
     Retrieve generic information for a specific draft.
@@ -1434,6 +1446,7 @@ def get_draft_info(draftId):
         return jsonify(draft_info)
 
 @app.route('/api/leagues/<int:leagueId>/availableTeams', methods=['GET'])
+@cached(league_scope("{leagueId}"))
 def get_available_teams_fim(leagueId):
     """
     Retrieve a list of available teams not on a fantasy team or on waivers,
@@ -4,7 +4,6 @@ from discord import Embed
 from discord.ext import commands
 from sqlalchemy import select, delete
 from sqlalchemy.sql import text
-import requests
 import logging
 import traceback
 import os
@@ -16,6 +15,13 @@ from models.users import Player
 from models.scores import Team, League, FRCEvent, TeamScore, FantasyTeam, PlayerAuthorized, WeekStatus, TeamStarted, TeamOwned, FantasyScores
 from models.draft import Draft, DraftOrder, DraftPick, StatboticsData
 from models.transactions import WaiverPriority, WaiverClaim, TeamOnWaivers, TradeProposal, TradeTeams
+from services.rankings import rank_fantasy_teams
+from services.bulk import bulk_upsert
+from services.scoring import score_week, score_draft
+from services.draftengine import team_number_key
+from services.cache import GLOBAL_SCOPE, league_scope, draft_scope
+from services.draftpool import build_available_pool, refresh_available_pool, clear_available_pool
+from services.draftstate import draft_states
 
 
 logger = logging.getLogger('discord')
@@ -23,6 +29,9 @@ TBA_API_ENDPOINT = "https://www.thebluealliance.com/api/v3/"
 TBA_AUTH_KEY = os.getenv("TBA_API_KEY")
 FORUM_CHANNEL_ID = os.getenv("DRAFT_FORUM_ID")
 STATBOTICS_ENDPOINT = "https://api.statbotics.io/v3/team_year/"
+STATBOTICS_TEAM_YEARS_ENDPOINT = "https://api.statbotics.io/v3/team_years"
+STATBOTICS_PAGE_SIZE = 1000
+STATES_WEEK = 6 # Michigan State Championship week, scored across every event a team attends
 
 
 class Admin(commands.Cog):
@@ -30,9 +39,8 @@ class Admin(commands.Cog):
     self.bot = bot
     
 
-  async def put_teams_on_waivers(self, interaction: discord.Interaction):
-    session = await self.bot.get_session()
-    message = await interaction.original_response()
+  def putTeamsOnWaiversInSession(self, session):
+    # (league id, league name, teams placed on waivers) per active FiM league, or a reason nothing was done
     currentWeek = (
         session.query(WeekStatus)
         .filter(WeekStatus.active == True)
@@ -41,17 +49,16 @@ class Admin(commands.Cog):
     )
 
     if not currentWeek:
-        await message.channel.send(content="No active weeks found. No teams will be put on waivers.")
-        return
+        return "No active weeks found. No teams will be put on waivers."
 
     leagues = session.query(League).filter(
         League.is_fim == True, League.active == True
     ).all()
 
     if not leagues:
-        await message.channel.send(content="No active FIM leagues found. No teams will be put on waivers.")
-        return
+        return "No active FIM leagues found. No teams will be put on waivers."
 
+    results = []
     for league in leagues:
         competing_teams = (
             session.query(TeamScore.team_key)
@@ -65,7 +72,7 @@ class Admin(commands.Cog):
         for team_number in competing_teams:
             is_owned = session.query(TeamOwned).filter(TeamOwned.league_id==league.league_id, TeamOwned.team_key == team_number[0]).first() is not None
             is_on_waivers = session.query(TeamOnWaivers).filter(TeamOnWaivers.team_number == team_number[0]).first() is not None
-            
+          
             if not is_owned and not is_on_waivers:
                 teams_to_put_on_waivers.append(team_number[0])
 
@@ -74,12 +81,22 @@ class Admin(commands.Cog):
                 TeamOnWaivers(league_id=league.league_id, team_number=team_number) 
                 for team_number in teams_to_put_on_waivers
             ]
-            
+          
             session.bulk_save_objects(team_on_waivers_objects)
-            session.commit()
-            await message.channel.send(embed=Embed(title=f"Placed teams on waivers for league {league.league_name}",description=f"{teams_to_put_on_waivers}"))
+        results.append((league.league_id, league.league_name, teams_to_put_on_waivers))
+    return results
+
+  async def put_teams_on_waivers(self, message: discord.Message):
+    results = await self.bot.runInSession(self.putTeamsOnWaiversInSession, commit=True)
+    if isinstance(results, str):
+        await message.channel.send(content=results)
+        return
+    for league_id, league_name, teams_to_put_on_waivers in results:
+        if teams_to_put_on_waivers:
+            await self.bot.invalidateCache(league_scope(league_id))
+            await message.channel.send(embed=Embed(title=f"Placed teams on waivers for league {league_name}",description=f"{teams_to_put_on_waivers}"))
         else:
-            await message.channel.send(content=f"No teams meet the criteria to be put on waivers for league {league.league_name}.")
+            await message.channel.send(content=f"No teams meet the criteria to be put on waivers for league {league_name}.")
 
   async def updateStatboticsTask(self, interaction, year):
     embed = Embed(title="Update Team List", description=f"Updating year end team data from Statbotics for {year}")
@@ -89,63 +106,123 @@ class Admin(commands.Cog):
       embed.description = "Invalid year. Please try again"
       await message.edit(embed=embed)
       return
-    session = await self.bot.get_session()
-    teams = session.query(Team).filter(Team.rookie_year <= year).all()
-    i = 0
-    session.query(StatboticsData).filter(StatboticsData.year==year).delete()
-    teamcount = len(teams)
-    for team in teams:
+    def loadTeams(session):
+      # Every team that existed in the year, and those registered for one of the year's events
+      teamNumbers = {team.team_number for team in session.query(Team.team_number).filter(Team.rookie_year <= year).all()}
+      competingTeams = {row.team_key for row in session.query(TeamScore.team_key).join(FRCEvent, TeamScore.event_key == FRCEvent.event_key).filter(FRCEvent.year == year).distinct()}
+      return teamNumbers, competingTeams
+    teamNumbers, competingTeams = await self.bot.runInSession(loadTeams)
+    teamcount = len(teamNumbers)
+    epas = {}
+    listedTeams = set()
+
+    # Bulk mode: page through every team's season, keeping only the EPA of known teams
+    offset = 0
+    listingComplete = False
+    while True:
       try:
-        requestURL = STATBOTICS_ENDPOINT+f"{team.team_number}/{year}"
-        response = requests.get(requestURL)
-        if response.status_code == 500:
-          pass
-        responsejson = response.json()
-        unitlessEPA = int(responsejson["epa"]["unitless"])
-        logger.info(f"Team number: {team.team_number} Year: {year} year_end_epa: {unitlessEPA}")
-        session.add(StatboticsData(team_number=team.team_number, year=year, year_end_epa=unitlessEPA))
-        session.commit()
+        pageResponse = await self.bot.apiClient.get(STATBOTICS_TEAM_YEARS_ENDPOINT + f"?year={year}&limit={STATBOTICS_PAGE_SIZE}&offset={offset}")
       except Exception:
         logger.error(traceback.format_exc())
-      i+=1
-      if (i%50==0):
-        embed.description=f"Processed {i}/{teamcount} Teams"
-        await message.edit(embed=embed)
-    session.close()
+        break
+      if not pageResponse.ok:
+        logger.warning(f"Statbotics team_years page at offset {offset} returned {pageResponse.status}")
+        break
+      page = pageResponse.json()
+      for teamYear in page:
+        teamNumber = str(teamYear["team"])
+        listedTeams.add(teamNumber)
+        try:
+          if teamNumber in teamNumbers:
+            epas[teamNumber] = int(teamYear["epa"]["unitless"])
+        except (KeyError, TypeError, ValueError):
+          logger.warning(f"No year end EPA for team {teamNumber} in {year}")
+      offset += len(page)
+      embed.description=f"Retrieved {len(epas)}/{teamcount} Teams"
+      await message.edit(embed=embed)
+      if len(page) < STATBOTICS_PAGE_SIZE:
+        listingComplete = True
+        break
+
+    async def fetchEPA(teamNumber):
+      response = await self.bot.apiClient.get(STATBOTICS_ENDPOINT+f"{teamNumber}/{year}")
+      if not response.ok:
+        return teamNumber, None
+      return teamNumber, int(response.json()["epa"]["unitless"])
+
+    # Fallback: teams registered for the year's events that the listing did not cover are requested
+    # one by one, concurrently. Other teams are mostly inactive and would only come back as 404s.
+    missingTeams = (teamNumbers & competingTeams) - epas.keys()
+    if missingTeams:
+      embed.description=f"Retrieved {len(epas)}/{teamcount} Teams, requesting {len(missingTeams)} individually"
+      await message.edit(embed=embed)
+      for fetch in asyncio.as_completed([fetchEPA(teamNumber) for teamNumber in missingTeams]):
+        try:
+          teamNumber, unitlessEPA = await fetch
+          if unitlessEPA is not None:
+            epas[teamNumber] = unitlessEPA
+        except Exception:
+          logger.error(traceback.format_exc())
+
+    def storeEPAs(session):
+      # A partial listing only updates the EPAs it found; stored ones for the other teams are kept.
+      # A complete one also drops the teams it no longer lists, unless they were requested individually:
+      # a team whose own request failed keeps its stored EPA.
+      if listingComplete:
+        storedTeams = {row.team_number for row in session.query(StatboticsData.team_number).filter(StatboticsData.year==year)}
+        goneTeams = storedTeams - listedTeams - missingTeams
+        if goneTeams:
+          session.query(StatboticsData).filter(StatboticsData.year==year, StatboticsData.team_number.in_(goneTeams)).delete(synchronize_session=False)
+      bulk_upsert(session, StatboticsData, [{"team_number": teamNumber, "year": year, "year_end_epa": unitlessEPA} for teamNumber, unitlessEPA in epas.items()],
+                  index_elements=[StatboticsData.team_number, StatboticsData.year], update_columns=["year_end_epa"])
+    await self.bot.runInSession(storeEPAs, commit=True)
+    logger.info(f"Stored {len(epas)} year end EPAs for {year}")
+    embed.description=f"Processed {len(epas)}/{teamcount} Teams"
+    if not listingComplete:
+      embed.description += "\nThe Statbotics team listing did not finish; run the update again to refresh the remaining teams"
+    await message.edit(embed=embed)
+    await self.bot.invalidateCache(GLOBAL_SCOPE)
 
   async def updateTeamsTask(self, interaction, startPage):
     embed = Embed(title="Update Team List", description="Updating team list from The Blue Alliance")
     await interaction.response.send_message(embed=embed)
     reqheaders = {"X-TBA-Auth-Key": TBA_AUTH_KEY}
-    session = await self.bot.get_session()
-    teams = session.query(Team)
+    # team_number -> (name, rookie_year) of every known team, loaded once and kept current below
+    existingTeams = await self.bot.runInSession(lambda session: {team.team_number: (team.name, team.rookie_year) for team in session.query(Team.team_number, Team.name, Team.rookie_year)})
     i = startPage
     while(True):
       try:
         requestURL = TBA_API_ENDPOINT + "teams/" + str(i) 
-        response = requests.get(requestURL, headers=reqheaders).json()
+        pageResponse = await self.bot.apiClient.get(requestURL, headers=reqheaders, conditional=True)
+        response = pageResponse.json()
         if (len(response) == 0):
           break
+        if pageResponse.not_modified:
+          # Page unchanged since the last update, nothing to reconcile
+          i += 1
+          continue
+        teamsToWrite = []
         for team in response:
           teamNumber = str(team["team_number"])
           teamName = str(team["nickname"])
           rookieYear = team["rookie_year"]
-          if teams.filter(Team.team_number == teamNumber).count() == 0:
+          if not teamNumber in existingTeams:
             logger.info(f"Inserting team number {teamNumber}")
-            isFiM = False
-            if (team["state_prov"] == "Michigan"):
-              isFiM = True
-            teamToAdd = Team(team_number=teamNumber, name=teamName, is_fim=isFiM)
-            session.add(teamToAdd)
-          elif not (teams.filter(Team.team_number == teamNumber).first().name == teamName\
-                    and teams.filter(Team.team_number==teamNumber).first().rookie_year==rookieYear): 
+          elif not existingTeams[teamNumber] == (teamName, rookieYear):
             logger.info(f"Updating team number {teamNumber}, team name {teamName}, rookie year {rookieYear}")
-            teams.filter(Team.team_number == teamNumber).first().name = teamName
-            teams.filter(Team.team_number == teamNumber).first().rookie_year = rookieYear
+          else:
+            continue
+          # is_fim is only used for new teams; existing teams keep theirs
+          teamsToWrite.append({"team_number": teamNumber, "name": teamName, "rookie_year": rookieYear, "is_fim": team["state_prov"] == "Michigan"})
+        await self.bot.runInSession(bulk_upsert, Team, teamsToWrite, index_elements=[Team.team_number], update_columns=["name", "rookie_year"], commit=True)
         i += 1
         embed.description = f"Updating team list: Processed {i*500} teams (Page {i})"
         await interaction.channel.send(embed = embed)
-        session.commit()
+        for teamToWrite in teamsToWrite:
+          existingTeams[teamToWrite["team_number"]] = (teamToWrite["name"], teamToWrite["rookie_year"])
+        self.bot.apiClient.remember(pageResponse)
+        if teamsToWrite:
+          await self.bot.invalidateCache(GLOBAL_SCOPE)
       except Exception:
         embed.description = "Error updating team list from The Blue Alliance"
         await interaction.channel.send(embed = embed)
@@ -153,7 +230,6 @@ class Admin(commands.Cog):
         return
     embed.description = "Updated team list from The Blue Alliance"
     await interaction.edit_original_response(embed = embed)
-    session.close()
 
   async def updateEventsTask(self, interaction, year):
     embed = Embed(title="Update Event List", description=f"Updating event list for {year} from The Blue Alliance")
@@ -161,13 +237,10 @@ class Admin(commands.Cog):
     eventsLog = await self.bot.log_message("New Events", "No new events")
     await interaction.response.send_message(embed=embed)
     reqheaders = {"X-TBA-Auth-Key": TBA_AUTH_KEY}
-    session = await self.bot.get_session()
-    yearevents = session.query(FRCEvent).filter(FRCEvent.year == year)
-    try:
-      requestURL = TBA_API_ENDPOINT + "events/" + str(year)
-      response = requests.get(requestURL, headers=reqheaders).json()
-      totalEvents = len(response)
-      i = 0
+    def applyEvents(session, response):
+      # Returns the (key, name) of every inserted event
+      yearevents = session.query(FRCEvent).filter(FRCEvent.year == year)
+      newEvents = []
       for event in response:
         if (not event["event_type"] in [99, 100]):
           eventKey = str(event["key"])
@@ -179,8 +252,7 @@ class Admin(commands.Cog):
           filteredEvents = yearevents.filter(FRCEvent.event_key == eventKey)
           if filteredEvents.count() == 0:
             logger.info(f"Inserting event {eventKey}: {eventName}")
-            newEventsEmbed.description = f"Found new event {eventKey}: {eventName}"
-            eventsLog.edit(embed=newEventsEmbed)
+            newEvents.append((eventKey, eventName))
             isFiM = False
             if (not event["district"] == None and event["district"]["abbreviation"] == "fim"):
               isFiM = True
@@ -193,11 +265,23 @@ class Admin(commands.Cog):
             filteredEvents.first().event_name = eventName
             filteredEvents.first().year = year
             filteredEvents.first().week = week
-        i+=1
-        if (i%25 == 0):
-          embed.description = f"Updating event list: Processed {i}/{totalEvents} events"
-          await interaction.edit_original_response(embed = embed)
-      session.commit()
+      return newEvents
+    try:
+      requestURL = TBA_API_ENDPOINT + "events/" + str(year)
+      eventsResponse = await self.bot.apiClient.get(requestURL, headers=reqheaders, conditional=True)
+      if eventsResponse.not_modified:
+        embed.description = f"Event list for {year} is unchanged since the last update"
+        await interaction.edit_original_response(embed = embed)
+        return
+      response = eventsResponse.json()
+      embed.description = f"Updating event list: Processing {len(response)} events"
+      await interaction.edit_original_response(embed = embed)
+      newEvents = await self.bot.runInSession(applyEvents, response, commit=True)
+      self.bot.apiClient.remember(eventsResponse)
+      await self.bot.invalidateCache(GLOBAL_SCOPE)
+      if newEvents:
+        newEventsEmbed.description = "\n".join(f"Found new event {eventKey}: {eventName}" for eventKey, eventName in newEvents)[:4000]
+        await eventsLog.edit(embed=newEventsEmbed)
     except Exception:
       logger.error(traceback.format_exc())
       embed.description = "Error updating event list from The Blue Alliance"
@@ -205,24 +289,13 @@ class Admin(commands.Cog):
       return
     embed.description = "Updated event list from The Blue Alliance"
     await interaction.edit_original_response(embed = embed)
-    session.close()
 
   async def importSingleEventTask(self, interaction, eventKey):
     embed = Embed(title=f"Import Event {eventKey}", description=f"Importing event info for key {eventKey} from The Blue Alliance")
     await interaction.response.send_message(embed = embed)
     reqheaders = {"X-TBA-Auth-Key": TBA_AUTH_KEY}
-    session = await self.bot.get_session()
-    eventResult = session.query(FRCEvent).filter(FRCEvent.event_key == eventKey)
-    try:
-      requestURL = TBA_API_ENDPOINT + "event/" + str(eventKey)
-      response = requests.get(requestURL, headers=reqheaders).json()
-      if (not "key" in response.keys()):
-        await interaction.response.send_message(f"Event {eventKey} does not exist on The Blue Alliance")
-        return
-      eventKey = str(response["key"])
-      eventName = str(response["name"])
-      week=99
-      year=eventKey[:4]
+    def applyEvent(session, eventKey, eventName, year, week, teamsResponse):
+      eventResult = session.query(FRCEvent).filter(FRCEvent.event_key == eventKey)
       if eventResult.count() == 0:
         logger.info(f"Inserting event {eventKey}: {eventName}")
         isFiM = False
@@ -235,131 +308,169 @@ class Admin(commands.Cog):
         eventResult.first().event_name = eventName
         eventResult.first().year = year
         eventResult.first().week = week
-      embed.description = f"Retrieving {eventKey} teams"
-      await interaction.edit_original_response(embed=embed)
-      requestURL += "/teams/simple"
-      response = requests.get(requestURL, headers=reqheaders).json()
       teamscores = session.query(TeamScore).filter(TeamScore.event_key==eventKey)
-      for team in response:
+      for team in teamsResponse:
         teamNumber = str(team["team_number"])
         if teamscores.filter(TeamScore.team_key == teamNumber).count() == 0:
           logger.info(f"Team {teamNumber} registered for {eventKey}")
           teamScoreToAdd = TeamScore(team_key=teamNumber, event_key=eventKey)
           session.add(teamScoreToAdd)
-      session.commit()
+    try:
+      requestURL = TBA_API_ENDPOINT + "event/" + str(eventKey)
+      response = await self.bot.apiClient.get_json(requestURL, headers=reqheaders)
+      if (not "key" in response.keys()):
+        await interaction.response.send_message(f"Event {eventKey} does not exist on The Blue Alliance")
+        return
+      eventKey = str(response["key"])
+      eventName = str(response["name"])
+      week=99
+      year=eventKey[:4]
+      embed.description = f"Retrieving {eventKey} teams"
+      await interaction.edit_original_response(embed=embed)
+      requestURL += "/teams/simple"
+      teamsResponse = await self.bot.apiClient.get_json(requestURL, headers=reqheaders)
+      await self.bot.runInSession(applyEvent, eventKey, eventName, year, week, teamsResponse, commit=True)
+      await self.bot.invalidateCache(GLOBAL_SCOPE)
       embed.description = f"Retrieved all {eventKey} information"
       await interaction.edit_original_response(embed=embed)
-      session.close()
     except Exception:
       embed.description = f"Error retrieving offseason event {eventKey} from The Blue Alliance"
       await interaction.edit_original_response(embed=embed)
       logger.error(traceback.format_exc())
-      session.close()
       return
 
   async def createOffseasonEventTask(self, interaction: discord.Interaction, eventKey, eventName, year):
     message = await interaction.original_response()
-    with await self.bot.get_session() as session:
-      eventResult = session.query(FRCEvent).filter(FRCEvent.event_key == eventKey)
-      if eventResult.count() > 0:
-        await message.channel.send(content=f"{eventKey} already in database")
-      else:
-        newEvent = FRCEvent(event_key=eventKey, event_name=eventName, year=year, week=99, is_fim=False)
-        session.add(newEvent)
-        session.commit()
-        await message.channel.send(content=f"{eventKey} created!")
+    def createEvent(session):
+      if session.query(FRCEvent).filter(FRCEvent.event_key == eventKey).count() > 0:
+        return False
+      session.add(FRCEvent(event_key=eventKey, event_name=eventName, year=year, week=99, is_fim=False))
+      return True
+    if not await self.bot.runInSession(createEvent, commit=True):
+      await message.channel.send(content=f"{eventKey} already in database")
+    else:
+      await self.bot.invalidateCache(GLOBAL_SCOPE)
+      await message.channel.send(content=f"{eventKey} created!")
 
-  async def importFullDistrctTask(self, year, district: str = "fim"):
+  async def importFullDistrctTask(self, year, district: str = "fim", force: bool = False):
+    # Unless forced, TBA responses that have not changed since the last import (304) are not reconciled again
     embed = Embed(title=f"Importing {district} District", description=f"Importing event info for all {district} districts from The Blue Alliance")
     originalMessage = await self.bot.log_message(embed = embed)
     newEventsEmbed = Embed(title="New Events", description="No new events")
     eventsLog = await self.bot.log_message("New Events", "No new events")
     reqheaders = {"X-TBA-Auth-Key": TBA_AUTH_KEY}
-    session = await self.bot.get_session()
+    eventKey = None
     try:
       requestURL = TBA_API_ENDPOINT + "district/" + str(year) + str(district) + "/events"
-      response = requests.get(requestURL, headers=reqheaders).json()
+      eventsResponse = await self.bot.apiClient.get(requestURL, headers=reqheaders, conditional=not force)
+      response = eventsResponse.json()
       if (not isinstance(response, list)):
         embed.description = f"District {district} does not exist on The Blue Alliance"
         await originalMessage.edit(embed=embed)
         return
-      numberOfEvents = len(response)
-      i = 1
-      first = True
-      for event in response:
-        week=int(event["week"])+1
-        if week < 6:
+      seasonEvents = [event for event in response if int(event["week"])+1 < 6]
+
+      # Fetch stage: every event's team list at once, bounded by the shared client's limits
+      embed.description = f"Retrieving team lists for {len(seasonEvents)} events"
+      await originalMessage.edit(embed=embed)
+      fetchResults = await asyncio.gather(*[
+        self.bot.apiClient.get(TBA_API_ENDPOINT + "event/" + str(event["key"]) + "/teams/simple", headers=reqheaders, conditional=not force)
+        for event in seasonEvents
+      ], return_exceptions=True)
+      # An event whose team list could not be fetched keeps its current registrations; the others are still applied
+      teamsResponses = []
+      failedEvents = []
+      for event, result in zip(seasonEvents, fetchResults):
+        if isinstance(result, BaseException) or not result.ok:
+          failedEvents.append(str(event["key"]))
+          logger.error(f"Could not retrieve teams for {event['key']}: {result if isinstance(result, BaseException) else result.status}")
+          result = None
+        teamsResponses.append(result)
+
+      # Apply stage: reconcile every event and its registrations in one transaction
+      embed.description = f"Applying changes for {len(seasonEvents)} events"
+      await originalMessage.edit(embed=embed)
+      def applyEvents(session):
+        # Returns the new events, each event's registration changes and how many events were unchanged
+        eventKeys = [str(event["key"]) for event in seasonEvents]
+        knownEvents = {frcEvent.event_key: frcEvent for frcEvent in session.query(FRCEvent).filter(FRCEvent.event_key.in_(eventKeys))}
+        currentRegistrations = {}
+        for row in session.query(TeamScore.team_key, TeamScore.event_key).filter(TeamScore.event_key.in_(eventKeys)):
+          currentRegistrations.setdefault(row.event_key, set()).add(row.team_key)
+        newEvents = []
+        registrationChanges = []
+        registrationsToAdd = []
+        unchangedEvents = 0
+        for event, teamsResponse in zip(seasonEvents, teamsResponses):
+          week=int(event["week"])+1
           eventKey = str(event["key"])
           eventName = str(event["name"])
-          year=eventKey[:4]
-          eventResult = session.query(FRCEvent).filter(FRCEvent.event_key == eventKey)
-          if eventResult.count() == 0:
-            if first:
-              first=False
-              newEventsEmbed.description=""
-            logger.info(f"Inserting event {eventKey}: {eventName}")
-            newEventsEmbed.description += f"Found new event {eventKey}: {eventName}\n"
-            await eventsLog.edit(embed=newEventsEmbed)
-            isFiM = False
-            eventToAdd = FRCEvent(event_key=eventKey, event_name=eventName, year=year, week=week, is_fim=isFiM)
-            session.add(eventToAdd)
-          elif not (eventResult.first().event_name == eventName\
-                    and str(eventResult.first().year) == str(year)\
-                    and str(eventResult.first().week) == str(week)): 
-            logger.info(f"Updating event {eventKey}")
-            eventResult.first().event_name = eventName
-            eventResult.first().year = year
-            eventResult.first().week = week
-          embed.description = f"Retrieving {eventKey} teams (Event {i}/{numberOfEvents})"
-          await originalMessage.edit(embed=embed)
-          requestURL = TBA_API_ENDPOINT + "event/" + str(eventKey) + "/teams/simple"
-          response = requests.get(requestURL, headers=reqheaders).json()
-          teamscores = session.query(TeamScore).filter(TeamScore.event_key==eventKey)
-          teamlist = set()
-          teamRegistrationChangeEmbed = None
-          teamRegistrationChangeMsg = None
-          embedSentYet=False
-          for team in response:
-            teamNumber = str(team["team_number"])
-            teamlist.add(teamNumber)
-            if teamscores.filter(TeamScore.team_key == teamNumber).count() == 0:
-              if not embedSentYet:
-                teamRegistrationChangeMsg = await self.bot.log_message(f"{eventKey} registration changes", f"Team {teamNumber} registered for {eventKey}")
-                teamRegistrationChangeEmbed = Embed(title=f"{eventKey} registration changes", description=f"Team {teamNumber} registered for {eventKey}")
-                embedSentYet = True
-              else:
-                teamRegistrationChangeEmbed.description+=f"\nTeam {teamNumber} registered for {eventKey}"
-                await teamRegistrationChangeMsg.edit(embed=teamRegistrationChangeEmbed)
-              logger.info(f"Team {teamNumber} registered for {eventKey}")
-              teamScoreToAdd = TeamScore(team_key=teamNumber, event_key=eventKey)
-              session.add(teamScoreToAdd)
-          for team in teamscores.all():
-            if not str(team.team_key) in teamlist:
-              logger.info(f"Team {team.team_key} un-registered from {team.event_key}")
-              session.delete(team)
-              if not embedSentYet:
-                teamRegistrationChangeMsg = await self.bot.log_message(f"{eventKey} registration changes", f"Team {team.team_key} un-registered from {team.event_key}")
-                teamRegistrationChangeEmbed = Embed(title=f"{eventKey} registration changes", description=f"Team {team.team_key} un-registered from {team.event_key}")
-                embedSentYet = True
-              else:
-                teamRegistrationChangeEmbed.description+=f"Team {team.team_key} un-registered from {team.event_key}"
-                await teamRegistrationChangeMsg.edit(embed=teamRegistrationChangeEmbed)
-        i+=1
-      session.commit()
-      embed.description = f"Retrieved all {district} information"
+          eventYear=eventKey[:4]
+          if not eventsResponse.not_modified:
+            frcEvent = knownEvents.get(eventKey)
+            if frcEvent is None:
+              logger.info(f"Inserting event {eventKey}: {eventName}")
+              newEvents.append(f"Found new event {eventKey}: {eventName}")
+              isFiM = False
+              eventToAdd = FRCEvent(event_key=eventKey, event_name=eventName, year=eventYear, week=week, is_fim=isFiM)
+              session.add(eventToAdd)
+            elif not (frcEvent.event_name == eventName\
+                      and str(frcEvent.year) == str(eventYear)\
+                      and str(frcEvent.week) == str(week)): 
+              logger.info(f"Updating event {eventKey}")
+              frcEvent.event_name = eventName
+              frcEvent.year = eventYear
+              frcEvent.week = week
+          if teamsResponse is None:
+            continue
+          if teamsResponse.not_modified:
+            unchangedEvents += 1
+            continue
+          # Diff TBA's registrations against ours, inserting and deleting in bulk
+          registered = {str(team["team_number"]) for team in teamsResponse.json()}
+          current = currentRegistrations.get(eventKey, set())
+          added = sorted(registered - current, key=team_number_key)
+          removed = sorted(current - registered, key=team_number_key)
+          registrationsToAdd += [{"team_key": teamNumber, "event_key": eventKey} for teamNumber in added]
+          if removed:
+            session.query(TeamScore).filter(TeamScore.event_key==eventKey, TeamScore.team_key.in_(removed)).delete(synchronize_session=False)
+          changes = [f"Team {teamNumber} registered for {eventKey}" for teamNumber in added]
+          changes += [f"Team {teamNumber} un-registered from {eventKey}" for teamNumber in removed]
+          for change in changes:
+            logger.info(change)
+          if changes:
+            registrationChanges.append((eventKey, changes))
+        session.flush()
+        bulk_upsert(session, TeamScore, registrationsToAdd, index_elements=[TeamScore.team_key, TeamScore.event_key], update_columns=[])
+        return newEvents, registrationChanges, unchangedEvents
+      newEvents, registrationChanges, unchangedEvents = await self.bot.runInSession(applyEvents, commit=True)
+      for eventKey, changes in registrationChanges:
+        changeLog = "\n".join(changes)
+        if len(changeLog) > 4000:
+          changeLog = changeLog[:4000] + "\n..."
+        await self.bot.log_message(f"{eventKey} registration changes", changeLog)
+      # Only remember responses once their data is committed, so a failed import is retried in full
+      fetched = [eventsResponse] + [teamsResponse for teamsResponse in teamsResponses if teamsResponse is not None]
+      for fetchedResponse in fetched:
+        self.bot.apiClient.remember(fetchedResponse)
+      if newEvents:
+        newEventsEmbed.description = "\n".join(newEvents)
+        await eventsLog.edit(embed=newEventsEmbed)
+      if not all(fetchedResponse.not_modified for fetchedResponse in fetched):
+        await self.bot.invalidateCache(GLOBAL_SCOPE)
+      embed.description = f"Retrieved all {district} information ({unchangedEvents} events unchanged since the last import)"
+      if failedEvents:
+        embed.description += f"\nCould not retrieve team lists for {', '.join(failedEvents)}; run the import again to retry them"
       await originalMessage.edit(embed=embed)
-      session.close()
     except Exception:
       embed.description = f"Error retrieving offseason event {eventKey} from The Blue Alliance"
       await originalMessage.edit(embed=embed)
       logger.error(traceback.format_exc())
-      session.close()
       return
 
   async def scoreSingularEventTask(self, interaction: discord.Interaction, eventKey: str):
-    session = await self.bot.get_session()
     message = await interaction.original_response()
-    eventToScore: FRCEvent = session.query(FRCEvent).filter(FRCEvent.event_key==eventKey).first()
+    eventToScore: FRCEvent = await self.bot.runInSession(lambda session: session.query(FRCEvent).filter(FRCEvent.event_key==eventKey).first())
     embed = Embed(title=f"Scoring {eventKey}", description=f"Importing event info for {eventKey} from The Blue Alliance")
     await message.edit(content="", embed = embed)
     embed.description = ""
@@ -367,37 +478,37 @@ class Admin(commands.Cog):
       logger.info(f"Event to score: {eventToScore.event_name}")
       requestURL = TBA_API_ENDPOINT + "event/" + eventToScore.event_key + "/district_points"
       reqheaders = {"X-TBA-Auth-Key": TBA_AUTH_KEY}
-      eventresponse = requests.get(requestURL, headers=reqheaders).json()
-      currentScores = session.query(TeamScore).filter(TeamScore.event_key==eventToScore.event_key)
-      for team in eventresponse["points"]:
-        teamscore = None
-        if currentScores.filter(TeamScore.team_key==team[3:]).count() == 0:
-          teamscore = TeamScore(team_key=team[3:], event_key=eventToScore.event_key)
-          session.add(teamscore)
-        else:
-          teamscore = currentScores.filter(TeamScore.team_key==team[3:]).first()
-        teamscore.qual_points=eventresponse["points"]["frc"+teamscore.team_key]["qual_points"]
-        teamscore.alliance_points=eventresponse["points"]["frc"+teamscore.team_key]["alliance_points"]
-        teamscore.elim_points=eventresponse["points"]["frc"+teamscore.team_key]["elim_points"]
-        teamscore.award_points=eventresponse["points"]["frc"+teamscore.team_key]["award_points"]
-        team = session.query(Team).filter(Team.team_number==teamscore.team_key).first()
-        if (not eventToScore.week == 6):
-          if (int(team.rookie_year) == int(eventToScore.year)):
-            teamscore.rookie_points = 5
-          elif (int(team.rookie_year) == int(eventToScore.year)-1):
-            teamscore.rookie_points = 2
+      eventresponse = await self.bot.apiClient.get_json(requestURL, headers=reqheaders)
+      def applyScores(session):
+        currentScores = {teamscore.team_key: teamscore for teamscore in session.query(TeamScore).filter(TeamScore.event_key==eventToScore.event_key)}
+        rookieYears = dict(session.query(Team.team_number, Team.rookie_year).filter(Team.team_number.in_([team[3:] for team in eventresponse["points"]])).all())
+        for team in eventresponse["points"]:
+          teamscore = currentScores.get(team[3:])
+          if teamscore is None:
+            teamscore = TeamScore(team_key=team[3:], event_key=eventToScore.event_key)
+            session.add(teamscore)
+          teamscore.qual_points=eventresponse["points"]["frc"+teamscore.team_key]["qual_points"]
+          teamscore.alliance_points=eventresponse["points"]["frc"+teamscore.team_key]["alliance_points"]
+          teamscore.elim_points=eventresponse["points"]["frc"+teamscore.team_key]["elim_points"]
+          teamscore.award_points=eventresponse["points"]["frc"+teamscore.team_key]["award_points"]
+          rookieYear = rookieYears.get(teamscore.team_key)
+          if (not eventToScore.week == STATES_WEEK and rookieYear is not None):
+            if (int(rookieYear) == int(eventToScore.year)):
+              teamscore.rookie_points = 5
+            elif (int(rookieYear) == int(eventToScore.year)-1):
+              teamscore.rookie_points = 2
+      await self.bot.runInSession(applyScores, commit=True)
       embed.description += f"Successfully scored **{eventToScore.event_name}**\n"
       await message.edit(embed=embed)
-      session.commit() 
+      await self.bot.invalidateCache(GLOBAL_SCOPE)
     elif eventToScore:
       await self.scoreOffseasonEventTask(interaction, eventKey)
     else:
       await message.edit(content=f"Could not find event {eventKey}")
 
   async def scoreOffseasonEventTask(self, interaction: discord.Interaction, eventKey: str):
-    session = await self.bot.get_session()
     message = await interaction.original_response()
-    eventToScore: FRCEvent = session.query(FRCEvent).filter(FRCEvent.event_key==eventKey).first()
+    eventToScore: FRCEvent = await self.bot.runInSession(lambda session: session.query(FRCEvent).filter(FRCEvent.event_key==eventKey).first())
     embed = Embed(title=f"Scoring {eventKey}", description=f"Importing event info for {eventKey} from The Blue Alliance")
     await message.edit(content="", embed = embed)
     embed.description = ""
@@ -405,282 +516,150 @@ class Admin(commands.Cog):
       logger.info(f"Event to score: {eventToScore.event_name}")
       requestURL = TBA_API_ENDPOINT + "event/" + eventToScore.event_key + "/teams/statuses"
       reqheaders = {"X-TBA-Auth-Key": TBA_AUTH_KEY}
-      statusesResponse = requests.get(requestURL, headers=reqheaders).json()
-      for teamKey in statusesResponse.keys():
-        teamJson = statusesResponse[teamKey]
-        teamNum = teamKey[3:]
-        teamScoreToMod: TeamScore = session.query(TeamScore).filter(TeamScore.event_key==eventKey, TeamScore.team_key==teamNum).first()
-        if not teamScoreToMod:
-          teamScoreToMod = TeamScore(team_key=teamNum, event_key=eventKey)
-          session.add(teamScoreToMod)
-          session.flush()
-        notCompeted = teamJson["qual"] == None
-        if notCompeted:
-          continue
-        #TODO: fix ranking data
-        rankData = teamJson["qual"]["ranking"]
-        numTeams = teamJson["qual"]["num_teams"]
-        teamScoreToMod.update_qualification_points(int(rankData["rank"]), int(numTeams)) #qual points
-        allianceData = teamJson["alliance"]
-        if not allianceData:
-          teamScoreToMod.update_alliance_points()
-        else:
-          pick = None
-          if allianceData["pick"] in [0, 1]:
-            pick = int(allianceData["number"])
-          elif allianceData["pick"] == 2:
-            pick = 17-int(allianceData["number"])
-          teamScoreToMod.update_alliance_points(pick)
-        elimsData = teamJson["playoff"]
-        if not elimsData:
-          teamScoreToMod.update_elim_points()
-        else:
-          if elimsData["level"] == "f" and elimsData["status"] == "won":
-            teamScoreToMod.update_elim_points(won_finals=True)
-          elif elimsData["level"] == "f":
-            teamScoreToMod.update_elim_points(lost_finals=True)
-          elif elimsData["double_elim_round"] == "Round 5":
-            teamScoreToMod.update_elim_points(lost_match_13=True)
-          elif elimsData["double_elim_round"] == "Round 4":
-            teamScoreToMod.update_elim_points(lost_match_12=True)
+      statusesResponse = await self.bot.apiClient.get_json(requestURL, headers=reqheaders)
+      def applyScores(session):
+        currentScores = {teamscore.team_key: teamscore for teamscore in session.query(TeamScore).filter(TeamScore.event_key==eventKey)}
+        for teamKey in statusesResponse.keys():
+          teamJson = statusesResponse[teamKey]
+          teamNum = teamKey[3:]
+          teamScoreToMod: TeamScore = currentScores.get(teamNum)
+          if not teamScoreToMod:
+            teamScoreToMod = TeamScore(team_key=teamNum, event_key=eventKey)
+            session.add(teamScoreToMod)
+            session.flush()
+          notCompeted = teamJson["qual"] == None
+          if notCompeted:
+            continue
+          #TODO: fix ranking data
+          rankData = teamJson["qual"]["ranking"]
+          numTeams = teamJson["qual"]["num_teams"]
+          teamScoreToMod.update_qualification_points(int(rankData["rank"]), int(numTeams)) #qual points
+          allianceData = teamJson["alliance"]
+          if not allianceData:
+            teamScoreToMod.update_alliance_points()
           else:
+            pick = None
+            if allianceData["pick"] in [0, 1]:
+              pick = int(allianceData["number"])
+            elif allianceData["pick"] == 2:
+              pick = 17-int(allianceData["number"])
+            teamScoreToMod.update_alliance_points(pick)
+          elimsData = teamJson["playoff"]
+          if not elimsData:
             teamScoreToMod.update_elim_points()
-        session.flush()
+          else:
+            if elimsData["level"] == "f" and elimsData["status"] == "won":
+              teamScoreToMod.update_elim_points(won_finals=True)
+            elif elimsData["level"] == "f":
+              teamScoreToMod.update_elim_points(lost_finals=True)
+            elif elimsData["double_elim_round"] == "Round 5":
+              teamScoreToMod.update_elim_points(lost_match_13=True)
+            elif elimsData["double_elim_round"] == "Round 4":
+              teamScoreToMod.update_elim_points(lost_match_12=True)
+            else:
+              teamScoreToMod.update_elim_points()
+          session.flush()
+      await self.bot.runInSession(applyScores, commit=True)
       embed.description += f"Successfully scored **{eventToScore.event_name}**\n"
       await message.edit(embed=embed)
-      session.commit() 
+      await self.bot.invalidateCache(GLOBAL_SCOPE)
     else:
       await message.edit(content=f"Could not find event {eventKey}")
 
-  async def scoreWeekTask(self, interaction: discord.Interaction, year, week):
-    session = await self.bot.get_session()
-    message = await interaction.original_response()
-    weekStatus = session.query(WeekStatus).filter(WeekStatus.week==week).filter(WeekStatus.year==year)
-    if (weekStatus.count() == 0):
+  async def scoreWeekTask(self, message: discord.Message, year, week):
+    def loadWeek(session):
+      weekStatus = session.query(WeekStatus).filter(WeekStatus.week==week).filter(WeekStatus.year==year).first()
+      eventsToScore = session.query(FRCEvent).filter(FRCEvent.year==year).filter(FRCEvent.is_fim==True).filter(FRCEvent.week==week).all()
+      return weekStatus, eventsToScore
+    weekStatus, eventsToScore = await self.bot.runInSession(loadWeek)
+    if (weekStatus is None):
       await message.edit(content="No week to score.")
       return
-    elif (weekStatus.first().scores_finalized == True):
+    elif (weekStatus.scores_finalized == True):
       await message.edit(content="Scores are already finalized.")
       return
-    eventsToScore = session.query(FRCEvent).filter(FRCEvent.year==year).filter(FRCEvent.is_fim==True).filter(FRCEvent.week==week)
     embed = Embed(title=f"Scoring week {week} for {year}", description=f"Importing event info for all {year} week {week} districts from The Blue Alliance")
     await message.edit(content="", embed = embed)
-    embed.description = ""
-    logger.info(f"Events to score: {eventsToScore.count()}")
-    for event in eventsToScore.all():
-      logger.info(f"Event to score: {event.event_name}")
-      requestURL = TBA_API_ENDPOINT + "event/" + event.event_key + "/district_points"
-      reqheaders = {"X-TBA-Auth-Key": TBA_AUTH_KEY}
-      eventresponse = requests.get(requestURL, headers=reqheaders).json()
-      currentScores = session.query(TeamScore).filter(TeamScore.event_key==event.event_key)
-      for team in eventresponse["points"]:
-        teamscore = None
-        if currentScores.filter(TeamScore.team_key==team[3:]).count() == 0:
-          teamscore = TeamScore(team_key=team[3:], event_key=event.event_key)
-          session.add(teamscore)
-        else:
-          teamscore = currentScores.filter(TeamScore.team_key==team[3:]).first()
-        teamscore.qual_points=eventresponse["points"]["frc"+teamscore.team_key]["qual_points"]
-        teamscore.alliance_points=eventresponse["points"]["frc"+teamscore.team_key]["alliance_points"]
-        teamscore.elim_points=eventresponse["points"]["frc"+teamscore.team_key]["elim_points"]
-        teamscore.award_points=eventresponse["points"]["frc"+teamscore.team_key]["award_points"]
-        if (teamscore.award_points == 10):
-          teamscore.award_points += 10
-        elif(teamscore.award_points == 30):
-          teamscore.award_points += 30
-        team = session.query(Team).filter(Team.team_number==teamscore.team_key).first()
-        if (not week == 6):
-          if (int(team.rookie_year) == int(year)):
-            teamscore.rookie_points = 5
-          elif (int(team.rookie_year) == int(year)-1):
-            teamscore.rookie_points = 2
-      embed.description += f"Successfully scored **{event.event_name}**\n"
-      await message.edit(embed=embed)
-      session.commit() 
-    embed.description += f"**All events scored for week {week}**"
-    await message.edit(embed=embed)
-    session.close()
-
-  async def scoreAllLeaguesTask(self, interaction: discord.Interaction, year, week, states=False):
-    session = await self.bot.get_session()
-    message = await interaction.original_response()
-    allLeagues = session.query(League).filter(League.is_fim==True).filter(League.year==year).all()
-
-    for league in allLeagues:
-        fantasyTeams = session.query(FantasyTeam).filter(FantasyTeam.league_id==league.league_id).all()
-
-        # Calculate scores for each fantasy team
-        for fantasyTeam in fantasyTeams:
-            teamscore = session.query(FantasyScores).filter(
-                FantasyScores.fantasy_team_id == fantasyTeam.fantasy_team_id
-            ).filter(FantasyScores.week == week).first()
-            if not teamscore:
-                teamscore = FantasyScores(
-                    league_id=league.league_id,
-                    fantasy_team_id=fantasyTeam.fantasy_team_id,
-                    event_key=f"fim{league.year}",
-                    week=week,
-                    rank_points=0,
-                    weekly_score=0
-                )
-                session.add(teamscore)
-                session.flush()
-
-            teamstarts = session.query(TeamStarted).filter(
-                TeamStarted.fantasy_team_id == fantasyTeam.fantasy_team_id
-            ).filter(TeamStarted.week == week).all()
-
-            # Calculate weekly score based on team starts
-            weekly_score = 0
-
-            for start in teamstarts:
-                if states:
-                    # States Week: Count all points across all events the team competes in
-                    team_scores = session.query(TeamScore).join(League).filter(
-                        TeamScore.team_key == start.team_number
-                    ).filter(League.year == year).all()
-                else:
-                    # Pre-States: Only include points for the specific event in TeamStarted
-                    team_scores = session.query(TeamScore).filter(
-                        TeamScore.team_key == start.team_number
-                    ).filter(TeamScore.event_key == start.event_key).all()
-
-                # Sum up the scores for this team
-                for score in team_scores:
-                    weekly_score += score.score_team()
-
-            teamscore.weekly_score = weekly_score
-            session.flush()
-
-        # Retrieve all scores for the league in the current week
-        scoresToRank = session.query(FantasyScores).filter(
-            FantasyScores.league_id == league.league_id
-        ).order_by(FantasyScores.weekly_score.desc()).all()
-
-        # Special case: If this is States, lock the top 3 teams from previous weeks
-        if states:
-            # Calculate cumulative scores up to the current week for the States
-            cumulativeScores = {}
-            for fantasyTeam in fantasyTeams:
-                total_score = session.query(FantasyScores).filter(
-                    FantasyScores.fantasy_team_id == fantasyTeam.fantasy_team_id,
-                    FantasyScores.week < week  # Exclude the current week
-                ).with_entities(FantasyScores.rank_points).all()
-
-                cumulativeScores[fantasyTeam.fantasy_team_id] = sum(score[0] for score in total_score)
-
-            # Get the top 3 teams based on cumulative scores
-            lockedTop3 = sorted(cumulativeScores.items(), key=lambda x: x[1], reverse=True)[:3]
-            lockedTop3TeamIds = [team_id for team_id, _ in lockedTop3]
-
-            # Ensure the top 3 are locked in their positions for this week
-            lockedTeamsRanked = session.query(FantasyScores).filter(
-                FantasyScores.fantasy_team_id.in_(lockedTop3TeamIds),
-                FantasyScores.week == week
-            ).all()
-
-            # Assign rank points manually for locked top 3
-            for i, teamscore in enumerate(lockedTeamsRanked):
-                teamscore.rank_points = len(fantasyTeams) - i  # Assign rank points from the top
-
-            # Remove the top 3 from the scoresToRank, leaving the rest to be ranked normally
-            scoresToRank = [score for score in scoresToRank if score.fantasy_team_id not in lockedTop3TeamIds]
-
-            # Normal ranking for the rest of the teams
-            for i, teamscore in enumerate(scoresToRank):
-                rank = i + len(lockedTop3TeamIds) + 1  # Start rank after the locked top 3
-                # Check for ties
-                if i > 0 and teamscore.weekly_score == scoresToRank[i - 1].weekly_score:
-                    teamscore.rank_points = scoresToRank[i - 1].rank_points  # Same rank as the previous team
-                else:
-                    teamscore.rank_points = len(fantasyTeams) - rank
-        else:
-          # Normal ranking for non-states weeks
-          for i, teamscore in enumerate(scoresToRank):
-              rank = i + 1  # Rank starting from 1
-              # Check for ties
-              if i > 0 and teamscore.weekly_score == scoresToRank[i - 1].weekly_score:
-                  teamscore.rank_points = scoresToRank[i - 1].rank_points  # Same rank as the previous team
-              else:
-                  teamscore.rank_points = len(fantasyTeams) - rank
+    logger.info(f"Events to score: {len(eventsToScore)}")
 
-          session.flush()
+    # Fetch stage: every event's district points at once, bounded by the shared client's limits
+    reqheaders = {"X-TBA-Auth-Key": TBA_AUTH_KEY}
+    fetchResults = await asyncio.gather(*[
+      self.bot.apiClient.get_json(TBA_API_ENDPOINT + "event/" + event.event_key + "/district_points", headers=reqheaders)
+      for event in eventsToScore
+    ], return_exceptions=True)
+    # Events whose points could not be fetched are left as they are; the others are still scored
+    failedEvents = []
+    scoredEvents = []
+    eventResponses = []
+    for event, result in zip(eventsToScore, fetchResults):
+      if isinstance(result, BaseException) or not result or "points" not in result:
+        failedEvents.append(event.event_key)
+        logger.error(f"Could not retrieve district points for {event.event_key}: {result!r}")
+        continue
+      scoredEvents.append(event)
+      eventResponses.append(result)
+    embed.description = f"Retrieved district points for {len(scoredEvents)} events, scoring"
+    await message.edit(embed=embed)
 
-        session.commit()
+    # Apply stage: existing scores and rookie years are loaded once, then everything is committed together
+    def applyScores(session):
+      eventKeys = [event.event_key for event in scoredEvents]
+      currentScores = {(teamscore.team_key, teamscore.event_key): teamscore for teamscore in session.query(TeamScore).filter(TeamScore.event_key.in_(eventKeys))}
+      teamKeys = {team[3:] for eventresponse in eventResponses for team in eventresponse["points"]}
+      rookieYears = dict(session.query(Team.team_number, Team.rookie_year).filter(Team.team_number.in_(teamKeys)).all())
+      for event, eventresponse in zip(scoredEvents, eventResponses):
+        logger.info(f"Event to score: {event.event_name}")
+        for team in eventresponse["points"]:
+          teamscore = currentScores.get((team[3:], event.event_key))
+          if teamscore is None:
+            teamscore = TeamScore(team_key=team[3:], event_key=event.event_key)
+            session.add(teamscore)
+          teamscore.qual_points=eventresponse["points"]["frc"+teamscore.team_key]["qual_points"]
+          teamscore.alliance_points=eventresponse["points"]["frc"+teamscore.team_key]["alliance_points"]
+          teamscore.elim_points=eventresponse["points"]["frc"+teamscore.team_key]["elim_points"]
+          teamscore.award_points=eventresponse["points"]["frc"+teamscore.team_key]["award_points"]
+          if (teamscore.award_points == 10):
+            teamscore.award_points += 10
+          elif(teamscore.award_points == 30):
+            teamscore.award_points += 30
+          rookieYear = rookieYears.get(teamscore.team_key)
+          if (not week == STATES_WEEK and rookieYear is not None):
+            if (int(rookieYear) == int(year)):
+              teamscore.rookie_points = 5
+            elif (int(rookieYear) == int(year)-1):
+              teamscore.rookie_points = 2
+    await self.bot.runInSession(applyScores, commit=True)
+    await self.bot.invalidateCache(GLOBAL_SCOPE)
+    embed.description = "".join(f"Successfully scored **{event.event_name}**\n" for event in scoredEvents)
+    if failedEvents:
+      embed.description += f"Could not retrieve district points for {', '.join(failedEvents)}; run the scoring again to retry them\n"
+    else:
+      embed.description += f"**All events scored for week {week}**"
+    await message.edit(embed=embed)
 
-    session.close()
+  async def scoreAllLeaguesTask(self, message: discord.Message, year, week, states=False):
+    leagueIds = await self.bot.runInSession(score_week, year, week, states, commit=True)
+    await self.bot.invalidateCache(*[league_scope(leagueId) for leagueId in leagueIds])
     await message.edit(content=f"Updated all scores for {year} week {week}, {'with states rules applied' if states else ''}")
 
   async def scoreSingleDraft(self, interaction: discord.Interaction, draft_id: int):
-    session = await self.bot.get_session()
     message = await interaction.original_response()
-    draft: Draft = session.query(Draft).filter(Draft.draft_id==draft_id).first()
-    league: League = session.query(League).filter(League.league_id==draft.league_id).first()
-    frcEvent: FRCEvent = session.query(FRCEvent).filter(FRCEvent.event_key==draft.event_key).first()
-    if league:
-        fantasyTeams = session.query(FantasyTeam).filter(FantasyTeam.league_id==league.league_id).all()
-        # Calculate scores for each fantasy team
-        for fantasyTeam in fantasyTeams:
-            teamscore = session.query(FantasyScores).filter(
-                FantasyScores.fantasy_team_id == fantasyTeam.fantasy_team_id
-            ).filter(FantasyScores.week == frcEvent.week).first()
-            if not teamscore:
-                teamscore = FantasyScores(
-                    league_id=league.league_id,
-                    fantasy_team_id=fantasyTeam.fantasy_team_id,
-                    event_key=frcEvent.event_key,
-                    week=frcEvent.week,
-                    rank_points=0,
-                    weekly_score=0
-                )
-                session.add(teamscore)
-                session.flush()
-            draftPicks = session.query(DraftPick).filter(
-                DraftPick.fantasy_team_id == fantasyTeam.fantasy_team_id,
-                DraftPick.draft_id == draft.draft_id
-            ).all()
-            # Calculate weekly score based on team starts
-            weekly_score = 0
-            for pick in draftPicks:
-                if frcEvent.week in [6, 7, 8, 9]: #future proofing for future champs week shifting
-                    # States+Champs Weeks: Count all points across all events the team competes in
-                    team_scores = session.query(TeamScore).join(League).filter(
-                        TeamScore.team_key == pick.team_number
-                    ).filter(League.year == league.year).all()
-                else:
-                    # Non-States: Only include points for the specific event
-                    team_scores = session.query(TeamScore).filter(
-                        TeamScore.team_key == pick.team_number
-                    ).filter(TeamScore.event_key == draft.event_key).all()
-                # Sum up the scores for this team
-                for score in team_scores:
-                    weekly_score += score.score_team()
-            teamscore.weekly_score = weekly_score
-            session.flush()
-        # Retrieve all scores for the league in the current week
-        scoresToRank = session.query(FantasyScores).filter(
-            FantasyScores.league_id == league.league_id
-        ).order_by(FantasyScores.weekly_score.desc()).all()
-        for i, teamscore in enumerate(scoresToRank):
-            rank = i + 1  # Rank starting from 1
-            # Check for ties
-            if i > 0 and teamscore.weekly_score == scoresToRank[i - 1].weekly_score:
-                teamscore.rank_points = scoresToRank[i - 1].rank_points  # Same rank as the previous team
-            else:
-                teamscore.rank_points = len(fantasyTeams) - rank
-        session.flush()
-
-    session.commit()
-    await message.edit(content=f"Updated all scores for {frcEvent.event_key}")
-    session.close()
+    try:
+      leagueId, eventKey = await self.bot.runInSession(score_draft, draft_id, commit=True)
+    except LookupError as error:
+      await message.edit(content=str(error))
+      return False
+    await self.bot.invalidateCache(league_scope(leagueId), draft_scope(draft_id))
+    await message.edit(content=f"Updated all scores for {eventKey}")
+    return True
 
-  async def notifyWeeklyScoresTask(self, interaction: discord.Interaction, year, week):
-    session = await self.bot.get_session()
+  def buildWeeklyScores(self, session, year, week):
+    # (channel id, congratulations, embed) for every active FiM league with scores, or None without a week status
     week_status = session.query(WeekStatus).filter(WeekStatus.year == year).filter(WeekStatus.week == week).first()
     if not week_status:
-        await interaction.followup.send(f"No status found for year {year}, week {week}.")
-        session.close()
-        return
+        return None
+    notifications = []
     leagues = session.query(League).filter(League.is_fim == True).filter(League.active == True).all()
     for league in leagues:
         teams = session.query(FantasyScores).filter(FantasyScores.league_id == league.league_id)\
@@ -707,74 +686,68 @@ class Admin(commands.Cog):
 
         else:
             congrats_message = f"Unofficial scores for Week {week}. Check back later for final results!"
-        channel = self.bot.get_channel(int(league.discord_channel))
+        notifications.append((league.discord_channel, congrats_message, embed))
+    return notifications
+
+  async def notifyWeeklyScoresTask(self, message: discord.Message, year, week):
+    notifications = await self.bot.runInSession(self.buildWeeklyScores, year, week)
+    if notifications is None:
+        await message.channel.send(f"No status found for year {year}, week {week}.")
+        return
+    for discordChannel, congrats_message, embed in notifications:
+        channel = self.bot.get_channel(int(discordChannel))
         await channel.send(content=congrats_message, embed=embed)
-    session.close()
-    await interaction.followup.send(f"Weekly scores for Week {week} have been sent to all active leagues.")
+    await message.channel.send(f"Weekly scores for Week {week} have been sent to all active leagues.")
 
-  async def notifySingleDraftTask(self, interaction: discord.Interaction, draft_id):
-    session = await self.bot.get_session()
-    message = await interaction.original_response()
+  def buildDraftScores(self, session, draft_id):
+    # (channel id, congratulations, embed) for the draft's final scores, or None without a league
     draft: Draft = session.query(Draft).filter(Draft.draft_id==draft_id).first()
     league: League = session.query(League).filter(League.league_id==draft.league_id).first()
     frcEvent: FRCEvent = session.query(FRCEvent).filter(FRCEvent.event_key==draft.event_key).first()
-    if league:
-        teams = session.query(FantasyScores).filter(FantasyScores.league_id == league.league_id)\
-                    .filter(FantasyScores.event_key == frcEvent.event_key)\
-                    .order_by(FantasyScores.weekly_score.desc()).all()
-        title = f"Final Scores for {frcEvent.event_name}"
-        embed = Embed(title=title, description=f"Here are the official scores for {frcEvent.event_name}")
-        for idx, team_score in enumerate(teams):
-            fantasy_team = team_score.fantasyTeam
-            embed.add_field(name=f"{idx + 1}. {fantasy_team.fantasy_team_name}", 
-                            value=f"Score: {team_score.weekly_score} points", inline=False)
-        winning_team = teams[0].fantasyTeam
-        winning_score = teams[0].weekly_score
-        playersToNotify = session.query(PlayerAuthorized).filter(PlayerAuthorized.fantasy_team_id==winning_team.fantasy_team_id).all()
-        congrats_message = f"**Congratulations to {winning_team.fantasy_team_name} for winning this draft with {winning_score} points!**\n"
-        for player in playersToNotify:
-          congrats_message += f"<@{player.player_id}> "
-        channel = self.bot.get_channel(int(league.discord_channel))
-        await channel.send(content=congrats_message, embed=embed)
-    session.close()
+    if not league:
+        return None
+    teams = session.query(FantasyScores).filter(FantasyScores.league_id == league.league_id)\
+                .filter(FantasyScores.event_key == frcEvent.event_key)\
+                .order_by(FantasyScores.weekly_score.desc()).all()
+    title = f"Final Scores for {frcEvent.event_name}"
+    embed = Embed(title=title, description=f"Here are the official scores for {frcEvent.event_name}")
+    for idx, team_score in enumerate(teams):
+        fantasy_team = team_score.fantasyTeam
+        embed.add_field(name=f"{idx + 1}. {fantasy_team.fantasy_team_name}", 
+                        value=f"Score: {team_score.weekly_score} points", inline=False)
+    winning_team = teams[0].fantasyTeam
+    winning_score = teams[0].weekly_score
+    playersToNotify = session.query(PlayerAuthorized).filter(PlayerAuthorized.fantasy_team_id==winning_team.fantasy_team_id).all()
+    congrats_message = f"**Congratulations to {winning_team.fantasy_team_name} for winning this draft with {winning_score} points!**\n"
+    for player in playersToNotify:
+      congrats_message += f"<@{player.player_id}> "
+    return league.discord_channel, congrats_message, embed
 
-  async def getLeagueStandingsTask(self, interaction: discord.Interaction, year, week):
-    session = await self.bot.get_session()
+  async def notifySingleDraftTask(self, interaction: discord.Interaction, draft_id):
+    notification = await self.bot.runInSession(self.buildDraftScores, draft_id)
+    if notification:
+        discordChannel, congrats_message, embed = notification
+        channel = self.bot.get_channel(int(discordChannel))
+        await channel.send(content=congrats_message, embed=embed)
 
+  def buildLeagueStandings(self, session, year, week):
+    # (channel id, embed) for every active FiM league, or None without a week status
     # Query for the week status to check if scores are finalized
     week_status = session.query(WeekStatus).filter(WeekStatus.year == year, WeekStatus.week == week).first()
 
     if not week_status:
-        await interaction.followup.send(f"No status found for week {week} in year {year}.")
-        session.close()
-        return
+        return None
 
     leagues = session.query(League).filter(League.is_fim == True, League.active == True).all()
     
+    standingsEmbeds = []
     for league in leagues:
-        # Retrieve all fantasy teams in the league
-        fantasy_teams = session.query(FantasyTeam).filter(FantasyTeam.league_id == league.league_id).all()
-
-        standings = []
-        for fantasy_team in fantasy_teams:
-            # Get scores up to the specified week
-            scores = session.query(FantasyScores).filter(
-                FantasyScores.fantasy_team_id == fantasy_team.fantasy_team_id,
-                FantasyScores.week <= week
-            ).all()
-
-            # Calculate total score and tiebreaker
-            total_score = sum(score.rank_points for score in scores)  # Total score based on rank points
-            tiebreaker = sum(score.weekly_score for score in scores)  # Tiebreaker based on weekly score
-
-            standings.append({
-                'team_name': fantasy_team.fantasy_team_name,
-                'total_score': total_score,
-                'tiebreaker': tiebreaker,
-            })
-
-        # Sort standings first by total score, then by tiebreaker
-        standings.sort(key=lambda x: (-x['total_score'], -x['tiebreaker']))
+        # Rank points and tiebreakers up to the specified week, already sorted
+        standings = [{
+            'team_name': team.fantasy_team_name,
+            'total_score': team.total_ranking_points,
+            'tiebreaker': team.tiebreaker,
+        } for team in rank_fantasy_teams(session, league.league_id, FantasyScores.week <= week).all()]
 
         # Prepare embed
         if week_status.scores_finalized:
@@ -788,23 +761,169 @@ class Admin(commands.Cog):
             embed.add_field(name=f"{idx + 1}. {standing['team_name']}", 
                             value=f"Ranking Points: {standing['total_score']} | Tiebreaker (Total Score): {standing['tiebreaker']}", 
                             inline=False)
+        standingsEmbeds.append((league.discord_channel, embed))
+    return standingsEmbeds
+
+  async def getLeagueStandingsTask(self, message: discord.Message, year, week):
+    standingsEmbeds = await self.bot.runInSession(self.buildLeagueStandings, year, week)
+    if standingsEmbeds is None:
+        await message.channel.send(f"No status found for week {week} in year {year}.")
+        return
 
+    for discordChannel, embed in standingsEmbeds:
         # Send the standings embed to the Discord channel
-        channel = self.bot.get_channel(int(league.discord_channel))
+        channel = self.bot.get_channel(int(discordChannel))
         await channel.send(embed=embed)
 
-    session.close()
+    # Notify the channel the task was started from that it is complete
+    await message.channel.send(f"League standings for {year} up to week {week} have been sent to all active leagues.")
+
+  def finalizeWeek(self, session, year, week):
+    weekToMod = session.query(WeekStatus).filter(WeekStatus.year==year).filter(WeekStatus.week==week).first()
+    weekToMod.scores_finalized=True
+
+  async def updateScoresTask(self, message: discord.Message, year, week, final=False, states=False, notify=True):
+    await self.scoreWeekTask(message, year, week)
+    await self.scoreAllLeaguesTask(message, year, week, states=states)
+    if final:
+      await self.bot.runInSession(self.finalizeWeek, year, week, commit=True)
+      await self.bot.invalidateCache(GLOBAL_SCOPE)
+    if notify:
+      await self.notifyWeeklyScoresTask(message, year, week)
+      await self.getLeagueStandingsTask(message, year, week)
+
+  def buildReminders(self, session):
+    # (channel id, reminder) for every active league with unfilled lineups, or None without active leagues
+    leagues = session.query(League).where(League.active == True).all()
+    if (len(leagues) == 0):
+      return None
+    reminders = []
+    for league in leagues:
+      sendReminder = False
+      reminderMessage = "Teams with unfilled lineups:\n"
+      leagueTeams = session.query(FantasyTeam).where(FantasyTeam.league_id==league.league_id)
+      for team in leagueTeams.all():
+        numberOfStarters = session.query(TeamStarted).filter(TeamStarted.fantasy_team_id == team.fantasy_team_id)
+        if (numberOfStarters.count() < league.team_starts):
+          sendReminder = True
+          playersToNotify = session.query(PlayerAuthorized).filter(PlayerAuthorized.fantasy_team_id == team.fantasy_team_id)
+          reminderMessage+=f"{team.fantasy_team_name} "
+          for player in playersToNotify.all():
+            reminderMessage+=f"<@{player.player_id}> "
+          reminderMessage+=f"currently starting {numberOfStarters.count()} of {league.team_starts}\n"
+      if sendReminder:
+        reminders.append((league.discord_channel, reminderMessage))
+    return reminders
+
+  async def remindPlayersTask(self, message: discord.Message):
+    reminders = await self.bot.runInSession(self.buildReminders)
+    if reminders is None:
+      await message.channel.send(content="There are no active leagues!")
+      return
+    for discordChannel, reminderMessage in reminders:
+      channel = await self.bot.fetch_channel(int(discordChannel))
+      if not channel == None:
+        await channel.send(content=reminderMessage)
+
+  def processWaiversInSession(self, session, week: WeekStatus):
+    # Process every active league's claims in one transaction; returns (league id, channel id, report) per league
+    reports = []
+    for league in session.query(League).where(League.active == True).all():
+      waiverReportEmbed = Embed(title=f"**{league.league_name} Week {week.week} Waiver Report**", description="")
+      waiverClaims = session.query(WaiverClaim).filter(WaiverClaim.league_id==league.league_id)
+      teamOnWaiversToAdd = []
+      if (waiverClaims.count() > 0):
+        waiverNum=1
+        waiverPriorities = session.query(WaiverPriority).filter(WaiverPriority.league_id==league.league_id).order_by(WaiverPriority.priority.asc())
+        lastTeam = waiverPriorities.count()
+        while(waiverNum <= lastTeam):
+          waiverPriorities = session.query(WaiverPriority).filter(WaiverPriority.league_id==league.league_id).order_by(WaiverPriority.priority.asc())
+          currentPriority = waiverPriorities.filter(WaiverPriority.priority==waiverNum)
+          priorityToCheck = currentPriority.first()
+          fantasyTeam: FantasyTeam = priorityToCheck.fantasy_team
+          waiverClaims = session.query(WaiverClaim).filter(WaiverClaim.fantasy_team_id==fantasyTeam.fantasy_team_id).order_by(WaiverClaim.priority.asc())
+          if (waiverClaims.count() > 0):
+            for waiverclaim in waiverClaims.all():
+              isTeamOnWaivers = session.query(TeamOnWaivers).filter(TeamOnWaivers.league_id==league.league_id).filter(TeamOnWaivers.team_number==waiverclaim.team_claimed)
+              isDropTeamOnRoster = session.query(TeamOwned).filter(TeamOwned.fantasy_team_id==fantasyTeam.fantasy_team_id).filter(TeamOwned.team_key==waiverclaim.team_to_drop)
+              if (isTeamOnWaivers.count() > 0 and isDropTeamOnRoster.count() > 0):
+                newWaiver = TeamOnWaivers(league_id=fantasyTeam.league_id, team_number=waiverclaim.team_to_drop)
+                teamOnWaiversToAdd.append(newWaiver)
+                #session.add(newWaiver)
+                isTeamOnWaivers.delete()
+                session.flush()
+                session.query(TeamStarted).filter(TeamStarted.league_id==fantasyTeam.league_id)\
+                .filter(TeamStarted.team_number==waiverclaim.team_to_drop).filter(TeamStarted.week >= week.week).delete()
+                session.flush()
+                session.query(TeamOwned).filter(TeamOwned.league_id==fantasyTeam.league_id).filter(TeamOwned.team_key==waiverclaim.team_to_drop).delete()
+                draftSoNotFail: Draft = session.query(Draft).filter(Draft.league_id==fantasyTeam.league_id).filter(Draft.event_key=="fim").first()
+                session.flush()
+                newTeamToAdd = TeamOwned(
+                    team_key=str(waiverclaim.team_claimed),
+                    fantasy_team_id=fantasyTeam.fantasy_team_id,
+                    league_id=fantasyTeam.league_id,
+                    draft_id=draftSoNotFail.draft_id
+                )
+                session.add(newTeamToAdd)
+                session.flush()  
+                waiverReportEmbed.description+=f"{fantasyTeam.fantasy_team_name} successfully added team {waiverclaim.team_claimed} and dropped {waiverclaim.team_to_drop}!\n"
+                session.flush()
+                #move waiver priority
+                # Temporary placeholder value (e.g., set to -1 for the current priority)
+                priorityToCheck.priority = -1
+                session.flush()
 
-    # Notify the user who triggered the command that the task is complete
-    await interaction.followup.send(f"League standings for {year} up to week {week} have been sent to all active leagues.")
+                # Now adjust all priorities (e.g., shift them down)
+                for prio in waiverPriorities.filter(WaiverPriority.priority > waiverNum).all():
+                    prio.priority -= 1
+                    session.flush()
 
-  async def addTeamsToEventTask(self, interaction: discord.Interaction, teams: str, draft: Draft): 
-    session = await self.bot.get_session()
+                # Finally, assign the last priority to the current team
+                priorityToCheck.priority = lastTeam
+                session.delete(waiverclaim)
+                session.flush()
+                break
+              elif (isTeamOnWaivers.count() == 0):
+                waiverReportEmbed.description+=f"{fantasyTeam.fantasy_team_name} tried to claim team {waiverclaim.team_claimed}, however they are no longer on waivers, unable to process\n"
+                session.delete(waiverclaim)
+                session.flush()
+              else:
+                waiverReportEmbed.description+=f"{fantasyTeam.fantasy_team_name} tried to claim team {waiverclaim.team_claimed} but their designated drop team {waiverclaim.team_to_drop} is no longer on the team, unable to process\n"
+                session.delete(waiverclaim)
+                session.flush()
+          else:
+            waiverNum+=1
+      else:
+        waiverReportEmbed.description+="No waiver claims to process"
+      reports.append((league.league_id, league.discord_channel, waiverReportEmbed))
+      session.query(TeamOnWaivers).filter(TeamOnWaivers.league_id==league.league_id).delete()
+      session.flush()
+      session.add_all(teamOnWaiversToAdd)
+      session.flush()
+    return reports
+
+  async def processWaiversTask(self, message: discord.Message):
+    week: WeekStatus = await self.bot.getCurrentWeek()
+    if week is None:
+      await message.edit(content="No active week, waivers were not processed.")
+      return
+    reports = await self.bot.runInSession(self.processWaiversInSession, week, commit=True)
+    if not reports:
+      await message.edit(content="There are no active leagues!")
+      return
+    for leagueId, discordChannel, waiverReportEmbed in reports:
+      channel = await self.bot.fetch_channel(int(discordChannel))
+      if not channel == None:
+        await channel.send(embed=waiverReportEmbed)
+    await self.bot.invalidateCache(*[league_scope(leagueId) for leagueId, _, _ in reports])
+
+  def addTeamsToEventInSession(self, session, teams: str, draft_id: int):
+    # Returns the event name, or None if the draft's event does not exist
+    draft = session.query(Draft).filter(Draft.draft_id == draft_id).first()
     # Step 1: Retrieve the associated FRCEvent from the draft object
     event = session.query(FRCEvent).filter_by(event_key=draft.event_key).first()
     if not event:
-        await interaction.followup.send(f"Event with key {draft.event_key} not found.")
-        return
+        return None
     # Step 2: Split the comma-separated team list
     team_numbers = [team.strip() for team in teams.split(",")]
     # Step 3: Iterate through each team and create Team objects if they don't exist
@@ -827,74 +946,84 @@ class Admin(commands.Cog):
             event_key=event.event_key
         )
         session.add(team_score)
-    # Step 6: Commit the changes
-    session.commit()
-    await interaction.followup.send(f"Teams added to event {event.event_name} successfully.")
-
-  async def reassignBTeamTask(self, interaction: discord.Interaction, originalBTeam: str, newBTeamNumber: str, draft: Draft):
-    session = await self.bot.get_session()
-
-    try:
-        # Step 1: Check if the draft and the originalBTeam exist in the current draft
-        team_score = session.query(TeamScore).filter_by(
-            team_key=originalBTeam,
-            event_key=draft.event_key
-        ).first()
-
-        draft_pick = session.query(DraftPick).filter_by(
-            team_number=originalBTeam,
-            draft_id=draft.draft_id
-        ).first()
-
-        # If neither TeamScore nor DraftPick exist, notify the user
-        if not team_score or not draft_pick:
-            await interaction.followup.send(f"Could not find team '{originalBTeam}' in this draft.")
-            return
-
-        # Step 2: Check if the newBTeam exists
-        new_team = session.query(Team).filter_by(team_number=newBTeamNumber).first()
-
-        if not new_team:
-            # Create the new Team object
-            new_team = Team(
-                team_number=newBTeamNumber,
-                name="Offseason Team",
-                rookie_year=1992
-            )
-            session.add(new_team)
-
-            # Flush to ensure the new team is added to the session and available for foreign key references
-            session.flush()
+    session.flush()
+    # Step 6: Add the new teams to the draft's available pool if it has started
+    refresh_available_pool(session, draft, session.query(League).filter(League.league_id == draft.league_id).first())
+    return event.event_name
 
-        # Check if a TeamScore already exists for the new team
-        existing_team_score = session.query(TeamScore).filter_by(
-            team_key=newBTeamNumber,
-            event_key=draft.event_key
-        ).first()
+  async def addTeamsToEventTask(self, interaction: discord.Interaction, teams: str, draft: Draft): 
+    # Step 7: Commit the changes
+    eventName = await self.bot.runInSession(self.addTeamsToEventInSession, teams, draft.draft_id, commit=True)
+    if eventName is None:
+        await interaction.followup.send(f"Event with key {draft.event_key} not found.")
+        return
+    await self.bot.invalidateCache(GLOBAL_SCOPE)
+    await interaction.followup.send(f"Teams added to event {eventName} successfully.")
+
+  def reassignBTeamInSession(self, session, originalBTeam: str, newBTeamNumber: str, draft_id: int, event_key: str):
+    # Returns an error message, or None once the team was reassigned
+    # Step 1: Check if the draft and the originalBTeam exist in the current draft
+    team_score = session.query(TeamScore).filter_by(
+        team_key=originalBTeam,
+        event_key=event_key
+    ).first()
+
+    draft_pick = session.query(DraftPick).filter_by(
+        team_number=originalBTeam,
+        draft_id=draft_id
+    ).first()
+
+    # If neither TeamScore nor DraftPick exist, notify the user
+    if not team_score or not draft_pick:
+        return f"Could not find team '{originalBTeam}' in this draft."
+
+    # Step 2: Check that the new team is not already at the event, before writing anything
+    existing_team_score = session.query(TeamScore).filter_by(
+        team_key=newBTeamNumber,
+        event_key=event_key
+    ).first()
+
+    if existing_team_score:
+        return f"A TeamScore already exists for team '{newBTeamNumber}'."
+
+    # Step 3: Check if the newBTeam exists
+    new_team = session.query(Team).filter_by(team_number=newBTeamNumber).first()
+
+    if not new_team:
+        # Create the new Team object
+        new_team = Team(
+            team_number=newBTeamNumber,
+            name="Offseason Team",
+            rookie_year=1992
+        )
+        session.add(new_team)
 
-        if existing_team_score:
-            await interaction.followup.send(f"A TeamScore already exists for team '{newBTeamNumber}'.")
-            return
+        # Flush to ensure the new team is added to the session and available for foreign key references
+        session.flush()
 
-        # Step 3: Update the TeamScore and DraftPick to reflect the new team
-        team_score.team_key = newBTeamNumber
-        draft_pick.team_number = newBTeamNumber
+    # Step 4: Update the TeamScore and DraftPick to reflect the new team
+    team_score.team_key = newBTeamNumber
+    draft_pick.team_number = newBTeamNumber
+    return None
 
-        # Step 4: Commit changes
-        session.commit()
+  async def reassignBTeamTask(self, interaction: discord.Interaction, originalBTeam: str, newBTeamNumber: str, draft: Draft):
+      try:
+          error = await self.bot.runInSession(self.reassignBTeamInSession, originalBTeam, newBTeamNumber, draft.draft_id, draft.event_key, commit=True)
+          if error:
+              await interaction.followup.send(error)
+              return
+          draft_states.discard(draft.draft_id)
+          await self.bot.invalidateCache(GLOBAL_SCOPE, draft_scope(draft.draft_id))
         
-        # Step 5: Send success message
-        await interaction.followup.send(f"Successfully reassigned team '{originalBTeam}' to '{newBTeamNumber}'.")
+          # Step 5: Send success message
+          await interaction.followup.send(f"Successfully reassigned team '{originalBTeam}' to '{newBTeamNumber}'.")
 
-    except Exception as e:
-        await interaction.followup.send("An error occurred while reassigning the team. Please check the logs for more details.")
-        print(e)  # Print the stack trace or log it appropriately
-    finally:
-        session.close()
+      except Exception as e:
+          await interaction.followup.send("An error occurred while reassigning the team. Please check the logs for more details.")
+          print(e)  # Print the stack trace or log it appropriately
 
   async def verifyAdmin(self, interaction: discord.Interaction):
-    session = await self.bot.get_session()
-    isAdmin = session.query(Player).filter(Player.user_id==str(interaction.user.id), Player.is_admin==True).first()
+    isAdmin = await self.bot.runInSession(lambda session: session.query(Player.user_id).filter(Player.user_id==str(interaction.user.id), Player.is_admin==True).first())
     if not isAdmin:
       await interaction.response.send_message("You are not authorized to use this command.")
       return False
@@ -904,43 +1033,15 @@ class Admin(commands.Cog):
   async def getForum(self):
     return self.bot.get_channel(int(FORUM_CHANNEL_ID))
 
-  async def getLeagueId(self): #league id generation for primary key
-    session = await self.bot.get_session()
-    maxleague = session.query(League).order_by(League.league_id.desc()).first()
-    if not maxleague == None:
-      return maxleague.league_id + 1
-    else:
-      return 1
-    
-  async def getFantasyTeamId(self): #fantasy team id generation for primary key
-    session = await self.bot.get_session()
-    maxFantasyTeam = session.query(FantasyTeam).order_by(FantasyTeam.fantasy_team_id.desc()).first()
-    if not maxFantasyTeam == None:
-      return maxFantasyTeam.fantasy_team_id + 1
-    else:
-      return 1
-    
-  async def getDraftId(self): #draft id generation for primary key
-    session = await self.bot.get_session()
-    maxDraft = session.query(Draft).order_by(Draft.draft_id.desc()).first()
-    if not maxDraft == None:
-      return maxDraft.draft_id + 1
-    else:
-      return 1
-
   async def getFantasyTeamIdFromUserAndInteraction(self, interaction: discord.Interaction, user: discord.User):
-        session = await self.bot.get_session()
-        largeQuery = session.query(FantasyTeam)\
-            .join(PlayerAuthorized, FantasyTeam.fantasy_team_id == PlayerAuthorized.fantasy_team_id)\
-            .join(League, FantasyTeam.league_id == League.league_id)\
-            .filter(PlayerAuthorized.player_id == str(user.id))\
-            .filter(League.discord_channel == str(interaction.channel_id))
-        team = largeQuery.first()
-        session.close()
-        if team:
-            return team.fantasy_team_id
-        else:
-            return None
+        def query(session):
+          largeQuery = session.query(FantasyTeam.fantasy_team_id)\
+              .join(PlayerAuthorized, FantasyTeam.fantasy_team_id == PlayerAuthorized.fantasy_team_id)\
+              .join(League, FantasyTeam.league_id == League.league_id)\
+              .filter(PlayerAuthorized.player_id == str(user.id))\
+              .filter(League.discord_channel == str(interaction.channel_id))
+          return largeQuery.scalar()
+        return await self.bot.runInSession(query)
 
   @app_commands.command(name="updateteamlist", description="Grabs all teams from TBA (ADMIN)")
   async def updateTeamList(self, interaction: discord.Interaction, startpage: int = 0):    
@@ -954,14 +1055,11 @@ class Admin(commands.Cog):
       threadName = f"{league_name} Thread"
       thread = (await forum.create_thread(content=f"This is your league thread for {league_name}",name=threadName))[0]
       threadId = thread.id   
-      newLeagueId = await self.getLeagueId()
-      leagueToAdd = League(league_id=newLeagueId, league_name=league_name, team_limit=team_limit,\
+      leagueToAdd = League(league_name=league_name, team_limit=team_limit,\
                            team_starts=team_starts, offseason=False, is_fim=is_fim, year=year, discord_channel=threadId, team_size_limit=team_size_limit)
-      session = await self.bot.get_session()
-      session.add(leagueToAdd)
-      session.commit()
+      await self.bot.runInSession(lambda session: session.add(leagueToAdd), commit=True)
+      await self.bot.invalidateCache(GLOBAL_SCOPE)
       await interaction.response.send_message(f"League created successfully! <#{threadId}>")
-      session.close()
 
   @app_commands.command(name="createoffseason", description="Create a new offseason 'league' (ADMIN)")
   async def createOffseasonLeague(self, interaction: discord.Interaction, league_name: str, year: int, teams_to_draft: int = 3):
@@ -970,14 +1068,11 @@ class Admin(commands.Cog):
       threadName = f"{league_name} Thread"
       thread = (await forum.create_thread(content=f"This is your league thread for {league_name}",name=threadName))[0]
       threadId = thread.id   
-      newLeagueId = await self.getLeagueId()
-      leagueToAdd = League(league_id=newLeagueId, league_name=league_name, team_limit=100,\
+      leagueToAdd = League(league_name=league_name, team_limit=100,\
                            team_starts=teams_to_draft, offseason=True, is_fim=False, year=year, discord_channel=threadId, team_size_limit=teams_to_draft)
-      session = await self.bot.get_session()
-      session.add(leagueToAdd)
-      session.commit()
+      await self.bot.runInSession(lambda session: session.add(leagueToAdd), commit=True)
+      await self.bot.invalidateCache(GLOBAL_SCOPE)
       await interaction.response.send_message(f"League created successfully! <#{threadId}>")
-      session.close()
 
   @app_commands.command(name="createevent", description="Create an offseason event, only do if offseason + event isn't on TBA (ADMIN)")
   async def createOffseasonEvent(self, interaction: discord.Interaction, eventkey: str, eventname: str, year: int):
@@ -988,115 +1083,130 @@ class Admin(commands.Cog):
   @app_commands.command(name="registerteam", description="Register Fantasy Team (ADMIN)")
   async def registerTeam(self, interaction:discord.Interaction, teamname: str):
     if (await self.verifyAdmin(interaction)):
-      session = await self.bot.get_session()
-      leagues = session.query(League).filter(League.discord_channel==str(interaction.channel_id))
-      leagueid = leagues.first().league_id
-      teamsInLeague = session.query(FantasyTeam).filter(FantasyTeam.league_id==leagueid)
-      if (leagues.count() == 0):
-        await interaction.response.send_message(f"No leagues exist with id {leagueid}.")
+      def register(session):
+        # Returns (league id, new team id), with no team id when the league is full
+        league = session.query(League).filter(League.discord_channel==str(interaction.channel_id)).first()
+        if league is None:
+          return None, None
+        teamsInLeague = session.query(FantasyTeam).filter(FantasyTeam.league_id==league.league_id)
+        if (league.team_limit <= teamsInLeague.count()):
+          return league.league_id, None
+        fantasyTeamToAdd = FantasyTeam(fantasy_team_name=teamname, league_id=league.league_id)
+        session.add(fantasyTeamToAdd)
+        session.flush()
+        return league.league_id, fantasyTeamToAdd.fantasy_team_id
+      leagueid, fantasyTeamId = await self.bot.runInSession(register, commit=True)
+      if (leagueid is None):
+        await interaction.response.send_message(f"No leagues exist in this channel.")
         return
-      elif (leagues.first().team_limit <= teamsInLeague.count()):
+      elif (fantasyTeamId is None):
         await interaction.response.send_message(f"League with id {leagueid} is at max capacity.") 
         return
-      newTeamId = await self.getFantasyTeamId()
-      fantasyTeamToAdd = FantasyTeam(fantasy_team_id=newTeamId, fantasy_team_name=teamname, league_id=leagueid)
-      #session = await self.bot.get_session()
-      session.add(fantasyTeamToAdd)
-      session.commit()
-      await interaction.response.send_message(f"Team {teamname} created successfully in league with id {leagueid}. Team id is {fantasyTeamToAdd.fantasy_team_id}")
-      session.close()
+      await self.bot.invalidateCache(league_scope(leagueid))
+      await interaction.response.send_message(f"Team {teamname} created successfully in league with id {leagueid}. Team id is {fantasyTeamId}")
 
   @app_commands.command(name="fillleague", description="Populates a League to the max amount of teams with generic teams (ADMIN)")
   async def populateLeague(self, interaction:discord.Interaction):
       if (await self.verifyAdmin(interaction)):
-        session = await self.bot.get_session()
-        leagues = session.query(League).filter(League.discord_channel==str(interaction.channel_id))
-        if (leagues.count() == 0):
-          await interaction.response.send_message(f"No league exists in this channel.")
-        leagueid = leagues.first().league_id
-        teamsInLeague = session.query(FantasyTeam).filter(FantasyTeam.league_id==leagueid)
-        teamLimit = leagues.first().team_limit
-        if (teamLimit <= teamsInLeague.count()):
-          await interaction.response.send_message(f"League is at max capacity.") 
+        def populate(session):
+          # Returns (league id, error message)
+          leagues = session.query(League).filter(League.discord_channel==str(interaction.channel_id))
+          if (leagues.count() == 0):
+            return None, f"No league exists in this channel."
+          leagueid = leagues.first().league_id
+          teamCount = session.query(FantasyTeam).filter(FantasyTeam.league_id==leagueid).count()
+          teamLimit = leagues.first().team_limit
+          if (teamLimit <= teamCount):
+            return leagueid, f"League is at max capacity."
+          for _ in range(teamLimit - teamCount):
+            fantasyTeamToAdd = FantasyTeam(fantasy_team_name="Team", league_id=leagueid)
+            session.add(fantasyTeamToAdd)
+            # Generic teams are named after the id the database gives them
+            session.flush()
+            fantasyTeamToAdd.fantasy_team_name = f"Team {fantasyTeamToAdd.fantasy_team_id}"
+          return leagueid, None
+        leagueid, error = await self.bot.runInSession(populate, commit=True)
+        if error:
+          await interaction.response.send_message(error)
           return
-        while(teamLimit > teamsInLeague.count()):
-          newTeamId = await self.getFantasyTeamId()
-          fantasyTeamToAdd = FantasyTeam(fantasy_team_id=newTeamId, fantasy_team_name=f"Team {newTeamId}", league_id=leagueid)
-          session.add(fantasyTeamToAdd)
-          session.commit()
-          teamsInLeague = session.query(FantasyTeam).filter(FantasyTeam.league_id==leagueid)
+        await self.bot.invalidateCache(league_scope(leagueid))
         await interaction.response.send_message(f"Teams created successfully!.")
-        session.close()
 
   @app_commands.command(name="createdraft", description="Creates a fantasy draft for a given League and populates it with picks (ADMIN)")
   async def createDraft(self, interaction:discord.Interaction, event_key: str):
     if (await self.verifyAdmin(interaction)):
-      session = await self.bot.get_session()
-      leagues = session.query(League).filter(League.discord_channel==str(interaction.channel_id)).filter(League.active == True)
-      rounds = leagues.first().team_size_limit
-      if (leagues.count() == 0):
-        await interaction.response.send_message(f"No active leagues exist in current channel.")
-        return
-      leagueid = leagues.first().league_id
-      teamsInLeague = session.query(FantasyTeam).filter(FantasyTeam.league_id==leagueid)
-      if (teamsInLeague.count() == 0):
-        await interaction.response.send_message(f"Cannot create draft with no teams to draft")
-        return
-      if (leagues.first().team_starts > rounds):
-        await interaction.response.send_message(f"Don't have enough rounds to draft!")
+      def loadLeague(session):
+        # Returns (error message, league id, league name, rounds, [(team id, team name)])
+        league = session.query(League).filter(League.discord_channel==str(interaction.channel_id)).filter(League.active == True).first()
+        if (league is None):
+          return f"No active leagues exist in current channel.", None, None, None, None
+        teamsInLeague = [(fantasyTeam.fantasy_team_id, fantasyTeam.fantasy_team_name) for fantasyTeam in session.query(FantasyTeam).filter(FantasyTeam.league_id==league.league_id)]
+        if (len(teamsInLeague) == 0):
+          return f"Cannot create draft with no teams to draft", None, None, None, None
+        if (league.team_starts > league.team_size_limit):
+          return f"Don't have enough rounds to draft!", None, None, None, None
+        return None, league.league_id, league.league_name, league.team_size_limit, teamsInLeague
+      error, leagueid, leagueName, rounds, teamsInLeague = await self.bot.runInSession(loadLeague)
+      if error:
+        await interaction.response.send_message(error)
         return
       forum = await self.getForum()
-      nameOfDraft = f"{leagues.first().league_name} draft for {event_key}"
+      nameOfDraft = f"{leagueName} draft for {event_key}"
       thread = (await forum.create_thread(content="test",name=nameOfDraft))[0]
       threadId = thread.id
-      newDraftId = await self.getDraftId()
-      draftToCreate = Draft(draft_id=newDraftId, league_id=leagueid, rounds=rounds, event_key=event_key, discord_channel=threadId)
-      session.add(draftToCreate)
-      session.commit()
-      await interaction.response.send_message(f"Draft generated! <#{threadId}>")
       #generate draft order
-      draftOrderEmbed = Embed(title=f"**Draft order**", description="```Draft Slot    Team Name (id)\n")
-      randomizedteams = [fantasyTeam.fantasy_team_id for fantasyTeam in teamsInLeague]
+      randomizedteams = list(teamsInLeague)
       random.shuffle(randomizedteams)
-      i = 1
-      for team in randomizedteams:
-        draftOrder = DraftOrder(draft_id = draftToCreate.draft_id, draft_slot = i, fantasy_team_id=team)
-        teamname = teamsInLeague.filter(FantasyTeam.fantasy_team_id==team).first().fantasy_team_name
+      def saveDraft(session):
+        draftToCreate = Draft(league_id=leagueid, rounds=rounds, event_key=event_key, discord_channel=threadId)
+        session.add(draftToCreate)
+        session.flush()
+        for i, (team, _) in enumerate(randomizedteams, start=1):
+          session.add(DraftOrder(draft_id = draftToCreate.draft_id, draft_slot = i, fantasy_team_id=team))
+        return draftToCreate.draft_id
+      draftId = await self.bot.runInSession(saveDraft, commit=True)
+      await interaction.response.send_message(f"Draft generated! <#{threadId}>")
+      draftOrderEmbed = Embed(title=f"**Draft order**", description="```Draft Slot    Team Name (id)\n")
+      for i, (team, teamname) in enumerate(randomizedteams, start=1):
         draftOrderEmbed.description+=f"{i:>10d}    {teamname} ({team})\n"
-        session.add(draftOrder)
-        i+=1
       draftOrderEmbed.description+="```"
       await thread.send(embed=draftOrderEmbed)
-      session.commit()
-      session.close()      
+      await self.bot.invalidateCache(league_scope(leagueid), draft_scope(draftId))
 
   @app_commands.command(name="startdraft", description="Starts the draft in the current channel (ADMIN)")
   async def startDraft(self, interaction:discord.Interaction):
     if (await self.verifyAdmin(interaction)):
-      session = await self.bot.get_session()
-      drafts = session.query(Draft).filter(Draft.discord_channel==str(interaction.channel_id))
-      if (drafts.count() == 0):
+      draftid = await self.bot.runInSession(lambda session: session.query(Draft.draft_id).filter(Draft.discord_channel==str(interaction.channel_id)).scalar())
+      if (draftid is None):
         await interaction.response.send_message(f"This is not an active draft channel.")
         return
       await interaction.response.send_message(f"Generating draft picks")
       message = await interaction.original_response()
-      draftid = drafts.first().draft_id
-      draftOrders = session.query(DraftOrder).filter(DraftOrder.draft_id==draftid)
-      if (draftOrders.count() == 0):
+      def generatePicks(session):
+        # Returns False if the draft has no draft order to generate picks from
+        draft = session.query(Draft).filter(Draft.draft_id==draftid).first()
+        draftOrders = session.query(DraftOrder).filter(DraftOrder.draft_id==draftid)
+        if (draftOrders.count() == 0):
+          return False
+        for teamDraftOrder in draftOrders.all():
+          for k in range(draft.rounds):
+            pickNumber = k*draftOrders.count()
+            if k%2 == 0: #handle serpentine
+              pickNumber += teamDraftOrder.draft_slot
+            else:
+              pickNumber += (draftOrders.count()-teamDraftOrder.draft_slot)+1
+            draftPickToAdd = DraftPick(draft_id=draftid, fantasy_team_id=teamDraftOrder.fantasy_team_id, pick_number=pickNumber, team_number=-1)
+            session.add(draftPickToAdd)
+        session.flush()
+        build_available_pool(session, draft, draft.league)
+        return True
+      if not await self.bot.runInSession(generatePicks, commit=True):
         await message.edit(content=f"Error generating draft picks.")
         return
-      for teamDraftOrder in draftOrders.all():
-        for k in range(drafts.first().rounds):
-          pickNumber = k*draftOrders.count()
-          if k%2 == 0: #handle serpentine
-            pickNumber += teamDraftOrder.draft_slot
-          else:
-            pickNumber += (draftOrders.count()-teamDraftOrder.draft_slot)+1
-          draftPickToAdd = DraftPick(draft_id=draftid, fantasy_team_id=teamDraftOrder.fantasy_team_id, pick_number=pickNumber, team_number=-1)
-          session.add(draftPickToAdd)
-      session.commit()
+      # Live draft state is only loaded once the picks are committed
+      await self.bot.runInSession(draft_states.load, draftid)
+      await self.bot.invalidateCache(draft_scope(draftid))
       await message.edit(content=f"Draft rounds generated!") 
-      session.close()
       draftCog = drafting.Drafting(self.bot)
       await draftCog.postDraftBoard(interaction=interaction)
       await draftCog.notifyNextPick(interaction, draft_id=draftid)
@@ -1104,14 +1214,19 @@ class Admin(commands.Cog):
   @app_commands.command(name="resetdraft", description="Resets an already started draft. (ADMIN)") 
   async def resetDraft(self, interaction:discord.Interaction):
     if (await self.verifyAdmin(interaction)):
-      session = await self.bot.get_session()
-      drafts = session.query(Draft).filter(Draft.discord_channel==str(interaction.channel_id))
-      if (drafts.count() == 0):
+      def reset(session):
+        draftid = session.query(Draft.draft_id).filter(Draft.discord_channel==str(interaction.channel_id)).scalar()
+        if (draftid is None):
+          return None
+        session.query(DraftPick).filter(DraftPick.draft_id==draftid).delete()
+        clear_available_pool(session, draftid)
+        return draftid
+      draftid = await self.bot.runInSession(reset, commit=True)
+      if (draftid is None):
         await interaction.response.send_message(f"This is not a draft channel.")
         return
-      draftid = drafts.first().draft_id
-      session.query(DraftPick).filter(DraftPick.draft_id==draftid).delete()
-      session.commit()
+      draft_states.discard(draftid)
+      await self.bot.invalidateCache(draft_scope(draftid))
     await interaction.response.send_message(f"Successfully reset draft! Use command /startdraft to restart the draft.")
 
   @app_commands.command(name="updateevents", description="Update events for a given year (ADMIN)")
@@ -1128,40 +1243,32 @@ class Admin(commands.Cog):
   async def importDistrict(self, interaction: discord.Interaction, year: str, district: str = "fim"):
     if (await self.verifyAdmin(interaction)):
       await interaction.response.send_message(f"Force updating district {district}")
-      asyncio.create_task(self.importFullDistrctTask(year, district))
+      asyncio.create_task(self.importFullDistrctTask(year, district, force=True))
   
   @app_commands.command(name="scoreupdate", description="Generate a score update for the given week (ADMIN)")
   async def updateScores(self, interaction: discord.Interaction, year: int, week: int, final: bool=False, states: bool=False):
     if await self.verifyAdmin(interaction):
       await interaction.response.send_message(f"Scoring all leagues for {year} week {week}")
-      await self.scoreWeekTask(interaction, year, week)
-      await self.scoreAllLeaguesTask(interaction, year, week, states=states)
-      if final:
-        session = await self.bot.get_session()
-        weekToMod = session.query(WeekStatus).filter(WeekStatus.year==year).filter(WeekStatus.week==week).first()
-        weekToMod.scores_finalized=True
-        session.commit()
-        session.close()
-      await self.notifyWeeklyScoresTask(interaction, year, week)
-      await self.getLeagueStandingsTask(interaction, year, week)
+      message = await interaction.original_response()
+      await self.updateScoresTask(message, year, week, final=final, states=states)
 
   @app_commands.command(name="authorize", description="Add an authorized user to a fantasy team (ADMIN)")
   async def authorizeUser(self, interaction:discord.Interaction, fantasyteamid: int, user: discord.User):
     if (await self.verifyAdmin(interaction)):
-      session = await self.bot.get_session()
-      player = session.query(Player).filter(Player.user_id==str(user.id))
-      if (player.count() == 0):
-        session.add(Player(user_id=user.id, is_admin=False))
-        session.commit()
+      def addPlayer(session):
+        player = session.query(Player).filter(Player.user_id==str(user.id))
+        if (player.count() == 0):
+          session.add(Player(user_id=user.id, is_admin=False))
+      await self.bot.runInSession(addPlayer, commit=True)
       if not (await self.bot.verifyTeamMemberByTeamId(fantasyteamid, user)):
-        authorizeToAdd = PlayerAuthorized(fantasy_team_id=fantasyteamid, player_id=user.id)
-        session.add(authorizeToAdd)
-        session.commit()
-        session.close()
-        fantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==fantasyteamid).first()
-        await interaction.response.send_message(f"Successfully added <@{user.id}> to {fantasyTeam.fantasy_team_name}!", ephemeral=True)
+        def authorize(session):
+          authorizeToAdd = PlayerAuthorized(fantasy_team_id=fantasyteamid, player_id=user.id)
+          session.add(authorizeToAdd)
+          fantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==fantasyteamid).first()
+          return fantasyTeam.fantasy_team_name
+        fantasyTeamName = await self.bot.runInSession(authorize, commit=True)
+        await interaction.response.send_message(f"Successfully added <@{user.id}> to {fantasyTeamName}!", ephemeral=True)
       else:
-        session.close()
         await interaction.response.send_message("You can't add someone already on it to their own team dummy!", ephemeral=True)
     
   @app_commands.command(name="forcepick", description="Admin ability to force a draft pick (ADMIN)")
@@ -1181,7 +1288,7 @@ class Admin(commands.Cog):
           await interaction.channel.send(content="No draft associated with this channel.")
           return
       league: League = await draftCog.getLeague(draft_id=draft.draft_id)
-      suggestedTeams = await draftCog.getSuggestedTeamsList(eventKey=draft.event_key, year=league.year, isFiM=league.is_fim, draft_id=draft.draft_id, isOffseason=league.offseason)
+      suggestedTeams = await draftCog.getSuggestedTeamsList(draft=draft, league=league)
       teamToPick = suggestedTeams[0][0]
       await draftCog.makeDraftPickHandler(interaction=interaction, team_number=teamToPick, force=True)
 
@@ -1190,16 +1297,26 @@ class Admin(commands.Cog):
     if (await self.verifyAdmin(interaction)):
       asyncio.create_task(self.updateStatboticsTask(interaction, year))
 
+  @app_commands.command(name="poolstats", description="Database connection pool usage (ADMIN)")
+  async def poolStats(self, interaction:discord.Interaction):
+    if (await self.verifyAdmin(interaction)):
+      usage = self.bot.poolUsage()
+      embed = Embed(title="**Database Connection Pool**", description="")
+      embed.description += f"Checked out: {usage['checked_out']} of {usage['size'] + usage['max_overflow']} (peak {usage['peak_checked_out']})\n"
+      embed.description += f"Idle: {usage['idle']} | Overflow: {usage['overflow']} of {usage['max_overflow']}\n"
+      embed.description += f"Checkouts: {usage['checkouts']} | Timeouts: {usage['timeouts']}\n"
+      embed.description += f"Checkout wait: {usage['average_wait']*1000:.1f}ms average, {usage['max_wait']*1000:.1f}ms max\n"
+      await interaction.response.send_message(embed=embed, ephemeral=True)
+
   @app_commands.command(name="deauthplayer", description="Remove a player from a team (ADMIN)")
   async def deauthPlayer(self, interaction:discord.Interaction, user: discord.User):
     if (await self.verifyAdmin(interaction)):
       if not await self.bot.verifyNotInLeague(interaction, user):
-        session = await self.bot.get_session()
         fantasyId = await self.getFantasyTeamIdFromUserAndInteraction(interaction, user)
-        playerAuthToDelete = session.query(PlayerAuthorized).filter(PlayerAuthorized.player_id==str(user.id)).filter(PlayerAuthorized.fantasy_team_id==fantasyId)
-        playerAuthToDelete.delete()
-        session.commit()
-        session.close()
+        def deauthorize(session):
+          playerAuthToDelete = session.query(PlayerAuthorized).filter(PlayerAuthorized.player_id==str(user.id)).filter(PlayerAuthorized.fantasy_team_id==fantasyId)
+          playerAuthToDelete.delete()
+        await self.bot.runInSession(deauthorize, commit=True)
         await interaction.response.send_message(f"Successfully removed <@{user.id}> from league.", ephemeral=True)
       else:
         await interaction.response.send_message("Player is not on a team.")
@@ -1239,14 +1356,13 @@ class Admin(commands.Cog):
       if currentWeek == None:
         await interaction.response.send_message("No active week")
         return
-      session = await self.bot.get_session()
-      weekToMod = session.query(WeekStatus).filter(WeekStatus.year==currentWeek.year).filter(WeekStatus.week==currentWeek.week).first()
-      weekToMod.lineups_locked=True
-      session.query(TradeTeams).delete()
-      session.flush()
-      session.query(TradeProposal).delete()
-      session.commit()
-      session.close()
+      def lock(session):
+        weekToMod = session.query(WeekStatus).filter(WeekStatus.year==currentWeek.year).filter(WeekStatus.week==currentWeek.week).first()
+        weekToMod.lineups_locked=True
+        session.query(TradeTeams).delete()
+        session.flush()
+        session.query(TradeProposal).delete()
+      await self.bot.runInSession(lock, commit=True)
       await interaction.response.send_message(f"Locked lineups for week {currentWeek.week} in {currentWeek.year}")
 
   @app_commands.command(name="finishweek", description="Admin ability to deactivate the currently active week (ADMIN)")
@@ -1258,130 +1374,27 @@ class Admin(commands.Cog):
         return
       await interaction.response.defer()
       message = await interaction.original_response()
-      await self.put_teams_on_waivers(interaction)
-      session = await self.bot.get_session()
-      weekToMod = session.query(WeekStatus).filter(WeekStatus.year==currentWeek.year).filter(WeekStatus.week==currentWeek.week).first()
-      weekToMod.active=False
-      weekToMod.lock_lineups=True
-      session.commit()
-      session.close()
+      await self.put_teams_on_waivers(message)
+      def deactivate(session):
+        weekToMod = session.query(WeekStatus).filter(WeekStatus.year==currentWeek.year).filter(WeekStatus.week==currentWeek.week).first()
+        weekToMod.active=False
+        weekToMod.lock_lineups=True
+      await self.bot.runInSession(deactivate, commit=True)
       await message.edit(content=f"Deactivated week {currentWeek.week} in {currentWeek.year}")
   
   @app_commands.command(name="remind", description="Remind players to set their lineups (ADMIN)")
   async def remindPlayers(self, interaction:discord.Interaction):
     if (await self.verifyAdmin(interaction)):
       await interaction.response.send_message("Reminding all users with unfilled lineups to fill them.")
-      session = await self.bot.get_session()
-      leagues = session.query(League).where(League.active == True)
-      if (leagues.count() == 0):
-        await interaction.channel.send(content="There are no active leagues!")
-      else:  
-        for league in leagues.all():
-          sendReminder = False
-          reminderMessage = "Teams with unfilled lineups:\n"
-          leagueTeams = session.query(FantasyTeam).where(FantasyTeam.league_id==league.league_id)
-          for team in leagueTeams.all():
-            numberOfStarters = session.query(TeamStarted).filter(TeamStarted.fantasy_team_id == team.fantasy_team_id)
-            if (numberOfStarters.count() < league.team_starts):
-              sendReminder = True
-              playersToNotify = session.query(PlayerAuthorized).filter(PlayerAuthorized.fantasy_team_id == team.fantasy_team_id)
-              reminderMessage+=f"{team.fantasy_team_name} "
-              for player in playersToNotify.all():
-                reminderMessage+=f"<@{player.player_id}> "
-              reminderMessage+=f"currently starting {numberOfStarters.count()} of {league.team_starts}\n"
-          if sendReminder:
-            channel = await self.bot.fetch_channel(int(league.discord_channel))
-            if not channel == None:
-              await channel.send(content=reminderMessage)
-      session.close()
+      message = await interaction.original_response()
+      await self.remindPlayersTask(message)
 
   @app_commands.command(name="processwaivers", description="Process all waivers (ADMIN)")
   async def processWaivers(self, interaction: discord.Interaction):
     if (await self.verifyAdmin(interaction)):
       await interaction.response.send_message(f"Attempting to process waivers")
       message = await interaction.original_response()
-      session = await self.bot.get_session()
-      leagues = session.query(League).where(League.active == True)
-      week: WeekStatus = await self.bot.getCurrentWeek()
-      if (leagues.count() == 0):
-        await message.edit(content="There are no active leagues!")
-      else:  
-        for league in leagues.all():
-          waiverReportEmbed = Embed(title=f"**{league.league_name} Week {week.week} Waiver Report**", description="")
-          waiverClaims = session.query(WaiverClaim).filter(WaiverClaim.league_id==league.league_id)
-          teamOnWaiversToAdd = []
-          if (waiverClaims.count() > 0):
-            waiverNum=1
-            waiverPriorities = session.query(WaiverPriority).filter(WaiverPriority.league_id==league.league_id).order_by(WaiverPriority.priority.asc())
-            lastTeam = waiverPriorities.count()
-            while(waiverNum <= lastTeam):
-              waiverPriorities = session.query(WaiverPriority).filter(WaiverPriority.league_id==league.league_id).order_by(WaiverPriority.priority.asc())
-              currentPriority = waiverPriorities.filter(WaiverPriority.priority==waiverNum)
-              priorityToCheck = currentPriority.first()
-              fantasyTeam: FantasyTeam = priorityToCheck.fantasy_team
-              waiverClaims = session.query(WaiverClaim).filter(WaiverClaim.fantasy_team_id==fantasyTeam.fantasy_team_id).order_by(WaiverClaim.priority.asc())
-              if (waiverClaims.count() > 0):
-                for waiverclaim in waiverClaims.all():
-                  isTeamOnWaivers = session.query(TeamOnWaivers).filter(TeamOnWaivers.league_id==league.league_id).filter(TeamOnWaivers.team_number==waiverclaim.team_claimed)
-                  isDropTeamOnRoster = session.query(TeamOwned).filter(TeamOwned.fantasy_team_id==fantasyTeam.fantasy_team_id).filter(TeamOwned.team_key==waiverclaim.team_to_drop)
-                  if (isTeamOnWaivers.count() > 0 and isDropTeamOnRoster.count() > 0):
-                    newWaiver = TeamOnWaivers(league_id=fantasyTeam.league_id, team_number=waiverclaim.team_to_drop)
-                    teamOnWaiversToAdd.append(newWaiver)
-                    #session.add(newWaiver)
-                    isTeamOnWaivers.delete()
-                    session.flush()
-                    session.query(TeamStarted).filter(TeamStarted.league_id==fantasyTeam.league_id)\
-                    .filter(TeamStarted.team_number==waiverclaim.team_to_drop).filter(TeamStarted.week >= week.week).delete()
-                    session.flush()
-                    session.query(TeamOwned).filter(TeamOwned.league_id==fantasyTeam.league_id).filter(TeamOwned.team_key==waiverclaim.team_to_drop).delete()
-                    draftSoNotFail: Draft = session.query(Draft).filter(Draft.league_id==fantasyTeam.league_id).filter(Draft.event_key=="fim").first()
-                    session.flush()
-                    newTeamToAdd = TeamOwned(
-                        team_key=str(waiverclaim.team_claimed),
-                        fantasy_team_id=fantasyTeam.fantasy_team_id,
-                        league_id=fantasyTeam.league_id,
-                        draft_id=draftSoNotFail.draft_id
-                    )
-                    session.add(newTeamToAdd)
-                    session.flush()  
-                    waiverReportEmbed.description+=f"{fantasyTeam.fantasy_team_name} successfully added team {waiverclaim.team_claimed} and dropped {waiverclaim.team_to_drop}!\n"
-                    session.flush()
-                    #move waiver priority
-                    # Temporary placeholder value (e.g., set to -1 for the current priority)
-                    priorityToCheck.priority = -1
-                    session.flush()
-
-                    # Now adjust all priorities (e.g., shift them down)
-                    for prio in waiverPriorities.filter(WaiverPriority.priority > waiverNum).all():
-                        prio.priority -= 1
-                        session.flush()
-
-                    # Finally, assign the last priority to the current team
-                    priorityToCheck.priority = lastTeam
-                    session.delete(waiverclaim)
-                    session.flush()
-                    break
-                  elif (isTeamOnWaivers.count() == 0):
-                    waiverReportEmbed.description+=f"{fantasyTeam.fantasy_team_name} tried to claim team {waiverclaim.team_claimed}, however they are no longer on waivers, unable to process\n"
-                    session.delete(waiverclaim)
-                    session.flush()
-                  else:
-                    waiverReportEmbed.description+=f"{fantasyTeam.fantasy_team_name} tried to claim team {waiverclaim.team_claimed} but their designated drop team {waiverclaim.team_to_drop} is no longer on the team, unable to process\n"
-                    session.delete(waiverclaim)
-                    session.flush()
-              else:
-                waiverNum+=1
-          else:
-            waiverReportEmbed.description+="No waiver claims to process"
-          channel = await self.bot.fetch_channel(int(league.discord_channel))
-          if not channel == None:
-            await channel.send(embed=waiverReportEmbed)
-          session.query(TeamOnWaivers).filter(TeamOnWaivers.league_id==league.league_id).delete()
-          session.flush()
-          session.add_all(teamOnWaiversToAdd)
-          session.flush()
-      session.commit()
-      session.close()
+      await self.processWaiversTask(message)
 
   @app_commands.command(name="forceadddrop", description="Force an add/drop (ADMIN)")
   async def forceAddDrop(self, interaction: discord.Interaction, fantasyteamid: int, addteam: str, dropteam: str, towaivers: bool = True):
@@ -1395,32 +1408,36 @@ class Admin(commands.Cog):
     if (await self.verifyAdmin(interaction)):
       await interaction.response.send_message(f"Attempting to admin force trade {team1trading} force {team2trading} for team ids {teamid1} and {teamid2}", ephemeral=True)
       manageTeamCog = manageteam.ManageTeam(self.bot)
-      tradeProp: TradeProposal = await manageTeamCog.createTradeProposalTask(interaction, teamid1, teamid2, team1trading, team2trading, force=True)
-      await manageTeamCog.acceptTradeTask(interaction, teamid2, tradeProp.trade_id, force=True)
+      tradeId = await manageTeamCog.createTradeProposalTask(interaction, teamid1, teamid2, team1trading, team2trading, force=True)
+      if tradeId is None:
+        return
+      await manageTeamCog.acceptTradeTask(interaction, teamid2, tradeId, force=True)
 
   @app_commands.command(name="genweeks", description="Generate weeks for a given year (ADMIN)")
   async def genWeeks(self, interaction: discord.Interaction, year: int, week: int = -1):
     if (await self.verifyAdmin(interaction)):
-      session = await self.bot.get_session()
-      if week == -1:
-        await interaction.response.send_message(f"Attempting to generate all weeks for {year}")
-        session.query(WeekStatus).filter(WeekStatus.year==year).delete()
-        session.flush()
-        for k in range(1, 7):
-          weekStatToadd = WeekStatus(week=k, year=year, lineups_locked=False, scores_finalized=False, active=True)
+      def generate(session):
+        if week == -1:
+          session.query(WeekStatus).filter(WeekStatus.year==year).delete()
+          session.flush()
+          for k in range(1, 7):
+            weekStatToadd = WeekStatus(week=k, year=year, lineups_locked=False, scores_finalized=False, active=True)
+            session.add(weekStatToadd)
+            session.flush()
+        else:
+          session.query(WeekStatus).filter(WeekStatus.year==year).filter(WeekStatus.week==week).delete()
+          session.flush()
+          weekStatToadd = WeekStatus(week=week, year=year, lineups_locked=False, scores_finalized=False, active=True)
           session.add(weekStatToadd)
           session.flush()
+      if week == -1:
+        await interaction.response.send_message(f"Attempting to generate all weeks for {year}")
       else:
         await interaction.response.send_message(f"Attempting to generate week {week} for {year}")
-        session.query(WeekStatus).filter(WeekStatus.year==year).filter(WeekStatus.week==week).delete()
-        session.flush()
-        weekStatToadd = WeekStatus(week=week, year=year, lineups_locked=False, scores_finalized=False, active=True)
-        session.add(weekStatToadd)
-        session.flush()
       msg = await interaction.original_response()
-      session.commit()
+      await self.bot.runInSession(generate, commit=True)
+      await self.bot.invalidateCache(GLOBAL_SCOPE)
       await msg.edit(content="Success!")
-      session.close()
 
   @app_commands.command(name="scoredraft", description="Score an individual draft")
   async def score_draft(self, interaction: discord.Interaction):
@@ -1441,8 +1458,8 @@ class Admin(commands.Cog):
           await self.scoreOffseasonEventTask(interaction, draft.event_key)
         else:
           await self.scoreSingularEventTask(interaction, draft.event_key)
-        await self.scoreSingleDraft(interaction, draft.draft_id)
-        await self.notifySingleDraftTask(interaction, draft.draft_id)
+        if await self.scoreSingleDraft(interaction, draft.draft_id):
+          await self.notifySingleDraftTask(interaction, draft.draft_id)
 
   @app_commands.command(name="addeventteams", description="Add teams to an event (use for offseasons with released team list) (ADMIN)")
   async def addEventTeams(self, interaction: discord.Interaction, teams: str):
@@ -1,228 +1,67 @@
 import discord
 from discord import app_commands, Embed
 from discord.ext import commands
-from models.draft import Draft, DraftPick, DraftOrder, StatboticsData
+from models.draft import Draft, DraftPick, DraftOrder, DraftBoardMessage
 from models.scores import League, PlayerAuthorized, FantasyTeam, TeamOwned, Team, FRCEvent, TeamScore
 from models.transactions import WaiverPriority
-from sqlalchemy import Integer
+from services.cache import league_scope, draft_scope
+from services.draftengine import draft_pool_engine, epa_year
+from services.draftstate import draft_states
+from services.draftboard import draft_board_renderer, page_count, page_of_pick
+from services.draftpicks import make_draft_pick, PICK_MADE, NO_DRAFT, DRAFT_COMPLETE, NOT_YOUR_TURN, ALREADY_PICKED, NOT_ELIGIBLE
+import asyncio
 import logging
+import traceback
 import os
 from discord.ui import Button, View
-from math import ceil
 
 logger = logging.getLogger('discord')
+BOARD_UPDATE_DELAY = float(os.getenv("DRAFT_BOARD_UPDATE_DELAY", 2))
+
+# draft_id -> scheduled board update, shared by every Drafting instance
+pendingBoardUpdates = {}
+draftBoardView = None
 
 class Drafting(commands.Cog):
 
-  class DraftPaginationView(View):
-    def __init__(self, bot, interaction, session, draftOrder, draft, rounds_per_page, total_pages):
-        super().__init__(timeout=5000)
+  class DraftBoardView(View):
+    # One instance serves every live draft board; the fixed custom_ids let it survive restarts
+    def __init__(self, bot):
+        super().__init__(timeout=None)
         self.bot = bot
-        self.interaction = interaction
-        self.session = session
-        self.draftOrder = draftOrder
-        self.draft = draft
-        self.rounds_per_page = rounds_per_page
-        self.total_pages = total_pages
-        self.current_page = 0
-    
-    @discord.ui.button(label="Previous", style=discord.ButtonStyle.primary)
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.primary, custom_id="draftboard:previous")
     async def previous_button(self, interaction: discord.Interaction, button: Button):
         await interaction.response.defer()
-        if self.current_page > 0:
-            self.current_page -= 1
-            await self.update_embed(interaction)
+        await Drafting(self.bot).turnDraftBoardPage(interaction, -1)
 
-    @discord.ui.button(label="Next", style=discord.ButtonStyle.primary)
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.primary, custom_id="draftboard:next")
     async def next_button(self, interaction: discord.Interaction, button: Button):
         await interaction.response.defer()
-        if self.current_page < self.total_pages - 1:
-            self.current_page += 1
-            await self.update_embed(interaction)
-
-    async def update_embed(self, interaction: discord.Interaction):
-        draftCog = Drafting(self.bot)
-        new_embed = await draftCog.createDraftBoardEmbed(self.session, self.draftOrder, self.draft, self.current_page, self.total_pages, self.rounds_per_page)
-        self.children[0].disabled = self.current_page <= 0
-        self.children[1].disabled = self.current_page >= self.total_pages - 1       
-        await interaction.message.edit(embed=new_embed, view=self)
-
-    async def on_timeout(self):
-      for child in self.children:
-        child.disabled = True
-      await self.interaction.message.edit(view=self)
+        await Drafting(self.bot).turnDraftBoardPage(interaction, 1)
 
   def __init__(self, bot):
     self.bot = bot
 
   async def getCurrentPickTeamId(self, draft_id):
-    session = await self.bot.get_session()
-    unmadepicks = session.query(DraftPick).filter(DraftPick.draft_id==draft_id).filter(DraftPick.team_number=="-1").order_by(DraftPick.pick_number.asc())
-    if (unmadepicks.count() == 0):
-      session.close()
-      return -1
-    else:
-      session.close()
-      return unmadepicks.first().fantasy_team_id
+    state = await self.bot.runInSession(draft_states.get, draft_id)
+    return state.current_fantasy_team_id
     
   async def getCurrentPickNumber(self, draft_id):
-    session = await self.bot.get_session()
-    unmadepicks = session.query(DraftPick).filter(DraftPick.draft_id==draft_id).filter(DraftPick.team_number=="-1").order_by(DraftPick.pick_number.asc())
-    if (unmadepicks.count() == 0):
-      session.close()
-      return -1
-    else:
-      session.close()
-      return unmadepicks.first().pick_number
-
-  async def makeDraftPickTask(self, draft_id: int, team_number: str):
-    session = await self.bot.get_session()
-    pickToMake = session.query(DraftPick).filter(DraftPick.draft_id==draft_id).filter(DraftPick.team_number=="-1").order_by(DraftPick.pick_number.asc())
-    pickToMake.first().team_number = team_number
-    session.commit()
-    session.close()
-
-  async def teamIsUnpicked(self, draft_id: int, team_number: str):
-    session = await self.bot.get_session()
-    picksMade = session.query(DraftPick).filter(DraftPick.draft_id==draft_id).filter(DraftPick.team_number!="-1")
-    teamsPicked = set()
-    teamsPicked.update([pick.team_number for pick in picksMade.all()])
-    session.close()
-    return not team_number in teamsPicked
-  
-  async def teamIsInDraft(self, team_number: str, eventKey: str, year: int, isFiM: bool):
-    session = await self.bot.get_session()
-
-    # Query to get eligible teams based on whether it's FiM or not
-    if isFiM:
-        query = session.query(Team.team_number).distinct() \
-            .join(TeamScore, Team.team_number == TeamScore.team_key) \
-            .join(FRCEvent, TeamScore.event_key == FRCEvent.event_key) \
-            .filter(
-                Team.is_fim == isFiM,
-                FRCEvent.year == year
-            )
-    else:
-        query = session.query(TeamScore.team_key).distinct() \
-            .filter(TeamScore.event_key == eventKey)
-
-    # Execute the query and get the result
-    result = query.all()
-
-    # Close the session
-    session.close()
-
-    # Update the set of eligible teams and check if the given team is in the list
-    teamsEligible = {team[0] for team in result}
-    return team_number in teamsEligible
-  
-  async def getSuggestedTeamsList(self, eventKey: str, year: int, isFiM: bool, draft_id: int, isOffseason: bool=False):
-    session = await self.bot.get_session()
-
-    # Base query for Team and StatboticsData
-    query = session.query(Team.team_number, StatboticsData.year_end_epa).distinct() \
-        .join(TeamScore, Team.team_number == TeamScore.team_key) \
-        .join(FRCEvent, TeamScore.event_key == FRCEvent.event_key) \
-        .join(StatboticsData, Team.team_number == StatboticsData.team_number) \
-        .filter(Team.team_number.notin_(
-            session.query(DraftPick.team_number).filter(
-                DraftPick.draft_id == draft_id, 
-                DraftPick.team_number != '-1'
-            )
-        ))
-
-    # Apply different filters based on conditions
-    if isFiM:
-        query = query.filter(Team.is_fim == isFiM, FRCEvent.year == year, StatboticsData.year == year - 1)
-    elif not isOffseason:
-        query = session.query(TeamScore.team_key, StatboticsData.year_end_epa).distinct() \
-            .join(StatboticsData, TeamScore.team_key == StatboticsData.team_number) \
-            .filter(
-                TeamScore.event_key == eventKey,
-                StatboticsData.year == year - 1,
-                TeamScore.team_key.notin_(
-                    session.query(DraftPick.team_number).filter(
-                        DraftPick.draft_id == draft_id,
-                        DraftPick.team_number != '-1'
-                    )
-                )
-            )
-    else:
-        query = session.query(TeamScore.team_key, StatboticsData.year_end_epa).distinct() \
-            .join(StatboticsData, TeamScore.team_key == StatboticsData.team_number) \
-            .filter(
-                TeamScore.event_key == eventKey,
-                StatboticsData.year == year,
-                TeamScore.team_key.notin_(
-                    session.query(DraftPick.team_number).filter(
-                        DraftPick.draft_id == draft_id,
-                        DraftPick.team_number != '-1'
-                    )
-                )
-            )
-
-    # Order by year_end_epa descending
-    query = query.order_by(StatboticsData.year_end_epa.desc())
-
-    # Execute the query
-    result = query.all()
-
-    # Close the session after use
-    session.close()
-
-    return result
-
-  async def getAllAvailableTeamsList(self, eventKey: str, year: int, isFiM: bool, draft_id: int):
-    session = await self.bot.get_session()
-
-    if isFiM:
-        # Query for FiM teams
-        query = session.query(Team.team_number, Team.team_number.cast(Integer).label('team_number_int')).distinct() \
-            .join(TeamScore, Team.team_number == TeamScore.team_key) \
-            .join(FRCEvent, TeamScore.event_key == FRCEvent.event_key) \
-            .filter(
-                Team.is_fim == isFiM,
-                FRCEvent.year == year,
-                Team.team_number.notin_(
-                    session.query(DraftPick.team_number).filter(
-                        DraftPick.draft_id == draft_id,
-                        DraftPick.team_number != '-1'
-                    )
-                )
-            )
-    else:
-        # Query for non-FiM teams
-        query = session.query(TeamScore.team_key, TeamScore.team_key.cast(Integer).label('team_number_int')).distinct() \
-            .filter(
-                TeamScore.event_key == eventKey,
-                TeamScore.team_key.notin_(
-                    session.query(DraftPick.team_number).filter(
-                        DraftPick.draft_id == draft_id,
-                        DraftPick.team_number != '-1'
-                    )
-                )
-            )
-
-    # Order by team number (cast to int for sorting)
-    query = query.order_by('team_number_int')
-
-    # Execute the query and get the result
-    result = query.all()
+    state = await self.bot.runInSession(draft_states.get, draft_id)
+    return state.current_pick_number
 
-    # Close the session
-    session.close()
+  async def getSuggestedTeamsList(self, draft: Draft, league: League):
+    # (team_number, year_end_epa) of available teams with an EPA, best first
+    return await self.bot.runInSession(draft_pool_engine.suggested_teams, draft, league)
 
-    return result
+  async def getAllAvailableTeamsList(self, draft: Draft, league: League):
+    # Available team numbers in numeric order
+    return await self.bot.runInSession(draft_pool_engine.available_teams_by_number, draft, league)
 
-  async def postSuggestedTeams(self, interaction: discord.Interaction):
-    draft: Draft = await self.getDraftFromChannel(interaction=interaction)
-    message = await interaction.original_response()
-    if (draft == None):
-        await message.edit(content="No draft associated with this channel.")
-        return
-    league: League = await self.getLeague(draft_id=draft.draft_id)
-    suggestedTeams = await self.getSuggestedTeamsList(eventKey=draft.event_key, year=league.year, isFiM=league.is_fim, draft_id=draft.draft_id, isOffseason=league.offseason)
-    yearToSuggest = league.year if league.offseason else league.year - 1
+  async def createSuggestedTeamsEmbed(self, draft: Draft, league: League):
+    suggestedTeams = await self.getSuggestedTeamsList(draft=draft, league=league)
+    yearToSuggest = epa_year(league)
     embed = Embed(title="**Suggested teams (autodraft)**", description=f"```{'Team':>10s}{f'{yearToSuggest} EPA':>12s}\n")
     teamsRemaining = len(suggestedTeams)
     teamsToReport = 10
@@ -231,168 +70,196 @@ class Drafting(commands.Cog):
     for k in range(teamsToReport):
        embed.description+=f"{suggestedTeams[k][0]:>10s}{suggestedTeams[k][1]:>12d}\n"
     embed.description += "```"
+    return embed
+
+  async def postSuggestedTeams(self, interaction: discord.Interaction):
+    draft: Draft = await self.getDraftFromChannel(interaction=interaction)
+    message = await interaction.original_response()
+    if (draft == None):
+        await message.edit(content="No draft associated with this channel.")
+        return
+    league: League = await self.getLeague(draft_id=draft.draft_id)
+    embed = await self.createSuggestedTeamsEmbed(draft, league)
     await message.edit(embed=embed)
 
   async def getDraft(self, draft_id):
-    session = await self.bot.get_session()
-    draft = session.query(Draft).filter(Draft.draft_id==draft_id)
-    session.close()
-    if (draft.count() > 0):
-      return draft.first()
-    else:
-      return None
+    # Drafts and leagues come back detached; only their columns are read afterwards
+    return await self.bot.runInSession(lambda session: session.query(Draft).filter(Draft.draft_id==draft_id).first())
 
   async def getDraftFromChannel(self, interaction: discord.Interaction):
-    session = await self.bot.get_session()
-    draft = session.query(Draft).filter(Draft.discord_channel==str(interaction.channel_id))
-    session.close()
-    if (draft.count() > 0):
-      return draft.first()
-    else:
-      return None
+    return await self.bot.runInSession(lambda session: session.query(Draft).filter(Draft.discord_channel==str(interaction.channel_id)).first())
 
   async def getFantasyTeamIdFromDraftInteraction(self, interaction: discord.Interaction):
-        session = await self.bot.get_session()
-        largeQuery = session.query(FantasyTeam)\
-            .join(PlayerAuthorized, FantasyTeam.fantasy_team_id == PlayerAuthorized.fantasy_team_id)\
-            .join(League, FantasyTeam.league_id == League.league_id)\
-            .join(Draft, League.league_id == Draft.league_id)\
-            .filter(PlayerAuthorized.player_id == str(interaction.user.id))\
-            .filter(Draft.discord_channel == str(interaction.channel_id))
-        team = largeQuery.first()
-        session.close()
-        if team:
-            return team.fantasy_team_id
-        else:
-            return None
+        def query(session):
+            largeQuery = session.query(FantasyTeam.fantasy_team_id)\
+                .join(PlayerAuthorized, FantasyTeam.fantasy_team_id == PlayerAuthorized.fantasy_team_id)\
+                .join(League, FantasyTeam.league_id == League.league_id)\
+                .join(Draft, League.league_id == Draft.league_id)\
+                .filter(PlayerAuthorized.player_id == str(interaction.user.id))\
+                .filter(Draft.discord_channel == str(interaction.channel_id))
+            return largeQuery.scalar()
+        return await self.bot.runInSession(query)
 
   async def getLeague(self, draft_id):
-    draft: Draft = await self.getDraft(draft_id)
-    if draft == None:
-      return None
-    session = await self.bot.get_session()
-    league = session.query(League).filter(League.league_id==draft.league_id)
-    session.close()
-    if (league.count() > 0):
-      return league.first()
-    else:
-      return None
+    def query(session):
+      return session.query(League).join(Draft, Draft.league_id == League.league_id).filter(Draft.draft_id==draft_id).first()
+    return await self.bot.runInSession(query)
   
-  async def getCurrentPickTeamId(self, draft_id):
-    session = await self.bot.get_session()
-    unmadepicks = session.query(DraftPick).filter(DraftPick.draft_id==draft_id).filter(DraftPick.team_number=="-1").order_by(DraftPick.pick_number.asc())
-    session.close()
-    if (unmadepicks.count() == 0):
-        return -1
-    else:
-        return unmadepicks.first().fantasy_team_id
-    
   async def makeDraftPickHandler(self, interaction: discord.Interaction, team_number: str, force: bool):
     message = await interaction.original_response()
-    draft: Draft = await self.getDraftFromChannel(interaction=interaction)
-    if (draft == None):
+    try:
+      # Validate and record the pick in one transaction, locking the draft against concurrent picks
+      result = await self.bot.runInSession(make_draft_pick, channel_id=str(interaction.channel_id), player_id=str(interaction.user.id), team_number=team_number, force=force, commit=True)
+      if (result.status == PICK_MADE):
+        draft_states.record_pick(result.draft_id, result.pick_number, team_number)
+    except Exception:
+      logger.error(traceback.format_exc())
+      await message.edit(content="An error occurred while making the pick. Please try again.")
+      return
+    if (result.status == NO_DRAFT):
         await message.edit(content=f"Invalid draft channel")
-    draft_id=draft.draft_id
-    currentPickId = await self.getCurrentPickTeamId(draft_id)
-    league: League = await self.getLeague(draft_id)
-    userFantasyTeamId = await self.getFantasyTeamIdFromDraftInteraction(interaction)
-    if (currentPickId == -1):
+    elif (result.status == DRAFT_COMPLETE):
         await message.edit(content="Draft is complete! Invalid command.")
-    elif (force or currentPickId==userFantasyTeamId):
-        if (await self.teamIsUnpicked(draft_id=draft_id, team_number=team_number)):
-            if (await self.teamIsInDraft(team_number=team_number, eventKey=draft.event_key, year=league.year, isFiM=league.is_fim)):
-                await self.makeDraftPickTask(draft_id=draft_id, team_number=team_number)
-                await message.channel.send(content=f"Team {team_number} has been successfully selected!")
-            else:
-                await message.edit(content=f"Team {team_number} is not able to be drafted in this draft.")
-        else:
-            await message.edit(content=f"Team {team_number} has already been picked. Please try again.")
-        await self.postDraftBoard(interaction)
-        await self.postSuggestedTeams(interaction)
-        await self.notifyNextPick(interaction, draft_id=draft_id)
-        if (await self.getCurrentPickTeamId(draft_id=draft_id) == '-1'):
-           await interaction.channel.edit(archived=True, locked=True)
-    else:
+    elif (result.status == NOT_YOUR_TURN):
         await message.edit(content="It is not your turn to pick!")
+    elif (result.status == ALREADY_PICKED):
+        await message.edit(content=f"Team {team_number} has already been picked. Please try again.")
+    elif (result.status == NOT_ELIGIBLE):
+        await message.edit(content=f"Team {team_number} is not able to be drafted in this draft.")
+    elif (result.draft_complete):
+        # The thread is archived below, so the board has to be final before that
+        await self.updateDraftBoard(result.draft_id, interaction.channel)
+        await self.notifyNextPick(interaction, draft_id=result.draft_id, teamIdToPick=-1, announcement=f"Team {team_number} has been successfully selected!")
+        await interaction.channel.edit(archived=True, locked=True)
+    else:
+        self.scheduleDraftBoardUpdate(result.draft_id, interaction.channel)
+        await self.notifyNextPick(interaction, draft_id=result.draft_id, teamIdToPick=result.next_fantasy_team_id, announcement=f"Team {team_number} has been successfully selected!")
     
   async def postDraftBoard(self, interaction: discord.Interaction):
-      session = await self.bot.get_session()
       draft: Draft = await self.getDraftFromChannel(interaction=interaction)
       if (draft == None):
          ogresponse = await interaction.original_response()
          await ogresponse.edit(content="No draft associated with this channel.")
          return
-      draft_id = draft.draft_id
-      draftOrder = session.query(DraftOrder)\
-          .filter(DraftOrder.draft_id == draft_id)\
-          .order_by(DraftOrder.draft_slot.asc()).all()
-      total_rounds = draft.rounds
-      rounds_per_page = 4
-      total_pages = ceil(total_rounds / rounds_per_page)
-      currentPick = await self.getCurrentPickNumber(draft_id=draft_id)
-      currentPage = int((currentPick-1)/(rounds_per_page*len(draftOrder)))
-      if currentPage >= total_pages:
-         currentPage=total_pages-1
-      draftBoardEmbed = await self.createDraftBoardEmbed(session, draftOrder, draft, currentPage, total_pages, rounds_per_page)
-      view = self.DraftPaginationView(self.bot, interaction, session, draftOrder, draft, rounds_per_page, total_pages)
-      await interaction.channel.send(embed=draftBoardEmbed, view=view)
-      
-      session.close()
+      await self.sendDraftBoard(draft.draft_id, interaction.channel)
+
+  async def createDraftBoardEmbeds(self, draft_id, page=None):
+      # Board page (the page on the clock unless one is given) followed by the suggested teams
+      def load(session):
+        draft: Draft = session.query(Draft).filter(Draft.draft_id == draft_id).first()
+        league: League = draft.league
+        boardPage = page
+        if boardPage is None:
+          state = draft_states.get(session, draft_id)
+          boardPage = min(page_of_pick(state, state.current_pick_number), page_count(draft.rounds) - 1)
+        return draft, league, boardPage
+      draft, league, page = await self.bot.runInSession(load)
+      boardEmbed = await self.createDraftBoardEmbed(draft, page)
+      suggestedEmbed = await self.createSuggestedTeamsEmbed(draft, league)
+      return page, [boardEmbed, suggestedEmbed]
+
+  def getBoardMessage(self, session, draft_id):
+      return session.query(DraftBoardMessage.discord_channel, DraftBoardMessage.message_id)\
+        .filter(DraftBoardMessage.draft_id == draft_id).first()
+
+  def saveBoardPage(self, session, draft_id, page):
+      session.query(DraftBoardMessage).filter(DraftBoardMessage.draft_id == draft_id).update({DraftBoardMessage.page: page})
+
+  def saveBoardMessage(self, session, draft_id, channel_id, message_id, page):
+      # Record the new live board; returns the id of the one it replaces in the same channel, if any
+      boardMessage = session.query(DraftBoardMessage).filter(DraftBoardMessage.draft_id == draft_id).first()
+      previousMessageId = None
+      if boardMessage is None:
+        boardMessage = DraftBoardMessage(draft_id=draft_id)
+        session.add(boardMessage)
+      elif boardMessage.discord_channel == channel_id:
+        previousMessageId = boardMessage.message_id
+      boardMessage.discord_channel = channel_id
+      boardMessage.message_id = message_id
+      boardMessage.page = page
+      return previousMessageId
+
+  async def sendDraftBoard(self, draft_id, channel):
+      # Post a new live board and retire the previous one
+      page, embeds = await self.createDraftBoardEmbeds(draft_id)
+      newMessage = await channel.send(embeds=embeds, view=draftBoardView)
+      previousMessageId = await self.bot.runInSession(self.saveBoardMessage, draft_id, str(channel.id), str(newMessage.id), page, commit=True)
+      if previousMessageId is not None:
+        try:
+          await channel.get_partial_message(int(previousMessageId)).edit(view=None)
+        except discord.HTTPException:
+          pass
+
+  async def updateDraftBoard(self, draft_id, channel):
+      # Edit the live board in place, posting a new one if it is missing
+      boardMessage = await self.bot.runInSession(self.getBoardMessage, draft_id)
+      if boardMessage is None or boardMessage.discord_channel != str(channel.id):
+        await self.sendDraftBoard(draft_id, channel)
+        return
+      page, embeds = await self.createDraftBoardEmbeds(draft_id)
+      try:
+        await channel.get_partial_message(int(boardMessage.message_id)).edit(embeds=embeds, view=draftBoardView)
+      except discord.NotFound:
+        await self.sendDraftBoard(draft_id, channel)
+        return
+      await self.bot.runInSession(self.saveBoardPage, draft_id, page, commit=True)
+
+  def scheduleDraftBoardUpdate(self, draft_id, channel):
+      # Coalesce board updates: picks made while one is pending are picked up when it runs
+      if draft_id in pendingBoardUpdates:
+        return
+      pendingBoardUpdates[draft_id] = asyncio.create_task(self.runDraftBoardUpdate(draft_id, channel))
+
+  async def runDraftBoardUpdate(self, draft_id, channel):
+      try:
+        await asyncio.sleep(BOARD_UPDATE_DELAY)
+      finally:
+        pendingBoardUpdates.pop(draft_id, None)
+      try:
+        await self.updateDraftBoard(draft_id, channel)
+      except Exception:
+        logger.error(traceback.format_exc())
+
+  async def turnDraftBoardPage(self, interaction: discord.Interaction, step: int):
+      def load(session):
+        return session.query(DraftBoardMessage.draft_id, DraftBoardMessage.page, Draft.rounds)\
+          .join(Draft, Draft.draft_id == DraftBoardMessage.draft_id)\
+          .filter(DraftBoardMessage.message_id == str(interaction.message.id)).first()
+      boardMessage = await self.bot.runInSession(load)
+      if boardMessage is None:
+        await interaction.followup.send("This draft board is no longer live. Use /draftboard to see the current one.", ephemeral=True)
+        return
+      page = max(0, min(boardMessage.page + step, page_count(boardMessage.rounds) - 1))
+      if page == boardMessage.page:
+        return
+      page, embeds = await self.createDraftBoardEmbeds(boardMessage.draft_id, page)
+      await interaction.message.edit(embeds=embeds, view=draftBoardView)
+      await self.bot.runInSession(self.saveBoardPage, boardMessage.draft_id, page, commit=True)
 
   async def postFullDraftBoard(self, interaction: discord.Interaction):
-      session = await self.bot.get_session()
       draft: Draft = await self.getDraftFromChannel(interaction=interaction)
       if (draft == None):
          ogresponse = await interaction.original_response()
          await ogresponse.edit(content="No draft associated with this channel.")
          return
-      draft_id = draft.draft_id
-      draftOrder = session.query(DraftOrder)\
-          .filter(DraftOrder.draft_id == draft_id)\
-          .order_by(DraftOrder.draft_slot.asc()).all()
-      total_rounds = draft.rounds
-      rounds_per_page = 4
-      total_pages = ceil(total_rounds / rounds_per_page)
+      total_pages = page_count(draft.rounds)
       for k in range(total_pages):
-        draftBoardEmbed = await self.createDraftBoardEmbed(session, draftOrder, draft, k, total_pages, rounds_per_page)
-        view = self.DraftPaginationView(self.bot, interaction, session, draftOrder, draft, rounds_per_page, total_pages)
-        await interaction.channel.send(embed=draftBoardEmbed, view=view)      
-      session.close()
-
-  async def createDraftBoardEmbed(self, session, draftOrder, draft, current_page, total_pages, rounds_per_page):
-      draft_id = draft.draft_id
-      draftBoardEmbed = Embed(title=f"**Draft Board - Page {current_page+1}/{total_pages}**", description="```")
-      header = f"{'Team':^15s}{'':3s}"
-      for round_num in range(1 + current_page * rounds_per_page, min((current_page + 1) * rounds_per_page, draft.rounds) + 1):
-          header += f"{'Pick ' + str(round_num):>7s}{'':2s}"
-      draftBoardEmbed.description += header + "\n"
-      for draftSlot in draftOrder:
-          fantasyteam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id == draftSlot.fantasy_team_id).first()
-          draftPicks = session.query(DraftPick)\
-              .filter(DraftPick.fantasy_team_id == draftSlot.fantasy_team_id)\
-              .filter(DraftPick.pick_number > current_page*rounds_per_page*len(draftOrder))\
-              .filter(DraftPick.pick_number <= (current_page + 1)*rounds_per_page*len(draftOrder))\
-              .filter(DraftPick.draft_id == draft_id)\
-              .order_by(DraftPick.pick_number.asc()).all()
-
-          abbrevName = fantasyteam.fantasy_team_name[:15]  # Limit team name to 15 characters
-          draftBoardEmbed.description += f"{abbrevName:<15s}{'':3s}"
-          for pick in draftPicks:
-              pickToAdd = "---"
-              if pick.team_number == "-1" and ((await self.getCurrentPickNumber(draft_id=draft_id)) == pick.pick_number):
-                pickToAdd = "!PICK!"
-              elif not pick.team_number == "-1":
-                pickToAdd = pick.team_number
-              draftBoardEmbed.description+=f"{pickToAdd:>7s}{'':2s}"
-          draftBoardEmbed.description += "\n"
-      draftBoardEmbed.description += "```"
-      return draftBoardEmbed
+        draftBoardEmbed = await self.createDraftBoardEmbed(draft, k)
+        await interaction.channel.send(embed=draftBoardEmbed)
+
+  async def createDraftBoardEmbed(self, draft, current_page):
+      def render(session):
+        state = draft_states.get(session, draft.draft_id)
+        names = dict(session.query(FantasyTeam.fantasy_team_id, FantasyTeam.fantasy_team_name).filter(FantasyTeam.fantasy_team_id.in_(state.order)).all())
+        return draft_board_renderer.page(state, names, draft.rounds, current_page)
+      description = await self.bot.runInSession(render)
+      return Embed(title=f"**Draft Board - Page {current_page+1}/{page_count(draft.rounds)}**", description=description)
     
   async def postAllAvailableTeams(self, interaction: discord.Interaction):
       teamcount=0
       draft: Draft = await self.getDraftFromChannel(interaction)
       league: League = await self.getLeague(draft.draft_id)
-      allavailableteams = await self.getAllAvailableTeamsList(draft.event_key, league.year, league.is_fim, draft.draft_id)
+      allavailableteams = await self.getAllAvailableTeamsList(draft, league)
       #logger.info(allavailableteams)
       embed = None
       totalteams = len(allavailableteams)
@@ -402,7 +269,7 @@ class Drafting(commands.Cog):
               embed.description+="```"
               await interaction.channel.send(embed=embed)
            embed = Embed(description="```")
-        teamnumber = allavailableteams[teamcount][0]
+        teamnumber = allavailableteams[teamcount]
         embed.description+=f"{teamnumber:>7s}"
         teamcount+=1
         if (teamcount%8 == 0):
@@ -413,73 +280,83 @@ class Drafting(commands.Cog):
      #embed = Embed(description="```")
      
   async def finishDraft(self, draft_id):
-    session = await self.bot.get_session()
-    allDraftPicks = session.query(DraftPick).filter(DraftPick.draft_id==draft_id)
-    for team in allDraftPicks.all():
-      teamOwnedToAdd = TeamOwned(team_key=team.team_number, fantasy_team_id=team.fantasy_team_id, league_id=(await self.getLeague(draft_id)).league_id, draft_id=draft_id)
-      session.add(teamOwnedToAdd)
-    draftOrders = session.query(DraftOrder).filter(DraftOrder.draft_id==draft_id).order_by(DraftOrder.draft_slot.desc()).all()
-    waiverPriority = 1
-    for slot in draftOrders:
-       prioToAdd = WaiverPriority()
-       prioToAdd.priority=waiverPriority
-       prioToAdd.fantasy_team_id=slot.fantasy_team_id
-       fTeam: FantasyTeam = slot.fantasyTeam
-       league: League = fTeam.league
-       prioToAdd.league_id=league.league_id
-       session.add(prioToAdd)
-       waiverPriority+=1
-    session.commit()
-    session.close()
-
-  async def notifyNextPick(self, interaction: discord.Interaction, draft_id):
-    session = await self.bot.get_session()
-    teamIdToPick = await self.getCurrentPickTeamId(draft_id=draft_id)
+    def finish(session):
+      leagueId = session.query(Draft.league_id).filter(Draft.draft_id==draft_id).scalar()
+      allDraftPicks = session.query(DraftPick).filter(DraftPick.draft_id==draft_id)
+      for team in allDraftPicks.all():
+        teamOwnedToAdd = TeamOwned(team_key=team.team_number, fantasy_team_id=team.fantasy_team_id, league_id=leagueId, draft_id=draft_id)
+        session.add(teamOwnedToAdd)
+      draftOrders = session.query(DraftOrder).filter(DraftOrder.draft_id==draft_id).order_by(DraftOrder.draft_slot.desc()).all()
+      waiverPriority = 1
+      for slot in draftOrders:
+         prioToAdd = WaiverPriority()
+         prioToAdd.priority=waiverPriority
+         prioToAdd.fantasy_team_id=slot.fantasy_team_id
+         fTeam: FantasyTeam = slot.fantasyTeam
+         league: League = fTeam.league
+         prioToAdd.league_id=league.league_id
+         session.add(prioToAdd)
+         waiverPriority+=1
+      return leagueId
+    leagueId = await self.bot.runInSession(finish, commit=True)
+    await self.bot.invalidateCache(league_scope(leagueId), draft_scope(draft_id))
+
+  async def notifyNextPick(self, interaction: discord.Interaction, draft_id, teamIdToPick=None, announcement=None):
+    if teamIdToPick is None:
+      teamIdToPick = await self.getCurrentPickTeamId(draft_id=draft_id)
     msg = ""
+    if announcement:
+      msg += f"{announcement}\n"
     if teamIdToPick == -1:
       msg += "Draft is complete!"
       await self.finishDraft(draft_id=draft_id)
       await self.postFullDraftBoard(interaction=interaction)
     else:
-      usersToNotify = session.query(PlayerAuthorized).filter(PlayerAuthorized.fantasy_team_id==teamIdToPick)
-      teamToNotify = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==teamIdToPick).first()
-      for user in usersToNotify.all():
-        msg+= f"<@{user.player_id}> "
-      msg += f" **({teamToNotify.fantasy_team_name})** it is your turn to pick!"
+      def mentions(session):
+        usersToNotify = session.query(PlayerAuthorized).filter(PlayerAuthorized.fantasy_team_id==teamIdToPick)
+        teamToNotify = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==teamIdToPick).first()
+        text = ""
+        for user in usersToNotify.all():
+          text+= f"<@{user.player_id}> "
+        return text + f" **({teamToNotify.fantasy_team_name})** it is your turn to pick!"
+      msg += await self.bot.runInSession(mentions)
     await interaction.channel.send(msg)
-    session.close()
 
-  async def postTeamDraftBoard(self, interaction: discord.Interaction, team_id, draft_id):
-    session = await self.bot.get_session()
-    message = await interaction.original_response()
-    fantasyTeamResult = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==team_id)
-    if (fantasyTeamResult.count() == 0):
-        await message.edit(content="Invalid team id")
-        return
-    fTeamFirst = fantasyTeamResult.first()
+  def buildTeamDraftBoard(self, session, team_id):
+    # Embed of the team's drafted FRC teams and the week of each of their events, or None for an unknown team
+    fTeamFirst = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==team_id).first()
+    if fTeamFirst is None:
+        return None
     teamBoardEmbed = Embed(title=f"**{fTeamFirst.fantasy_team_name} Week-by-Week board**", description="```")
     teamBoardEmbed.description += f"{'Team':^4s}{'':1s}{'Week 1':^9s}{'':1s}{'Week 2':^9s}{'':1s}{'Week 3':^9s}{'':1s}{'Week 4':^9s}{'':1s}{'Week 5':^9}\n"
     teamsDrafted = session.query(DraftPick).filter(DraftPick.fantasy_team_id==team_id, DraftPick.team_number != "-1").order_by(DraftPick.team_number.asc())
     for team in teamsDrafted.all():
         teamEvents = (
-                session.query(TeamScore)
+                session.query(TeamScore.event_key, FRCEvent.week)
+                .join(FRCEvent, TeamScore.event_key == FRCEvent.event_key)
                 .filter(
                     TeamScore.team_key == team.team_number,
-                    TeamScore.event.has(FRCEvent.year == fTeamFirst.league.year)
+                    FRCEvent.year == fTeamFirst.league.year
                 )
             )
         weeks = ["---" for k in range(5)]
-        for event in teamEvents.all():
-            frcEvent = session.query(FRCEvent).filter(FRCEvent.event_key==event.event_key).first()
-            if int(frcEvent.week) < 6:
-                if (weeks[int(frcEvent.week)-1] == "---"):
-                    weeks[int(frcEvent.week)-1] = event.event_key
+        for event_key, week in teamEvents.all():
+            if int(week) < 6:
+                if (weeks[int(week)-1] == "---"):
+                    weeks[int(week)-1] = event_key
                 else:
-                    weeks[int(frcEvent.week)-1] = "2 Events"
+                    weeks[int(week)-1] = "2 Events"
         teamBoardEmbed.description+=f"{team.team_number:>4s}{'':1s}{weeks[0]:^9s}{'':1s}{weeks[1]:^9s}{'':1s}{weeks[2]:^9s}{'':1s}{weeks[3]:^9s}{'':1s}{weeks[4]:^9}\n"
     teamBoardEmbed.description += "```"
+    return teamBoardEmbed
+
+  async def postTeamDraftBoard(self, interaction: discord.Interaction, team_id, draft_id):
+    message = await interaction.original_response()
+    teamBoardEmbed = await self.bot.runInSession(self.buildTeamDraftBoard, team_id)
+    if teamBoardEmbed is None:
+        await message.edit(content="Invalid team id")
+        return
     await message.edit(embed=teamBoardEmbed, content="")
-    session.close()
 
   @app_commands.command(name="pick", description="Make a draft pick!")
   async def make_pick(self, interaction: discord.Interaction, team_number: str): 
@@ -519,6 +396,9 @@ class Drafting(commands.Cog):
         await message.edit(content="You are not part of any team in this draft!")
 
 async def setup(bot: commands.Bot) -> None:
+  global draftBoardView
+  draftBoardView = Drafting.DraftBoardView(bot)
+  bot.add_view(draftBoardView)
   cog = Drafting(bot)
   guild = await bot.fetch_guild(int(os.getenv("GUILD_ID")))
   assert guild is not None
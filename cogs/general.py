@@ -7,6 +7,8 @@ from models.scores import League, FantasyTeam, WeekStatus, FantasyScores, Player
 from models.transactions import WaiverPriority
 from models.draft import Draft
 from models.users import Player
+from services.rankings import rank_fantasy_teams
+from services.cache import league_scope
 from discord import Embed
 
 logger = logging.getLogger('discord')
@@ -23,27 +25,24 @@ class General(commands.Cog):
 
   @app_commands.command(name="leagues", description="Reports on active leagues and their league ids.")
   async def getLeagues(self, interaction: discord.Interaction):
-    session = await self.bot.get_session()
-    leagues = session.query(League).where(League.active == True)
+    def query(session):
+      return session.query(League.league_name, League.discord_channel).where(League.active == True).all()
+    leagues = await self.bot.runInSession(query)
     embed = Embed(title="**League Listing**", description="")
-    if (leagues.count() == 0):
+    if (len(leagues) == 0):
       embed.description+="No active leagues```"
       await interaction.response.send_message(embed=embed)
       return
-    for league in leagues.all():
+    for league in leagues:
       embed.description += f'{league.league_name:>15s}   <#{league.discord_channel}>\n'
     await interaction.response.send_message(embed=embed)
-    session.close()
 
-  @app_commands.command(name="teams", description="Reports on teams in the channel's league and their team IDs.")
-  async def getTeamsInLeague(self, interaction: discord.Interaction):
-    session = await self.bot.get_session()
-    league = session.query(League).where(League.discord_channel==str(interaction.channel_id))
-    if (league.count() == 0):
-      await interaction.response.send_message("No league associated with this channel")
-    leagueid = league.first().league_id
-    draftOrderEmbed = Embed(title=f"**Teams in {league.first().league_name}**", description=f"```{'Team ID':7s}{'':5s}{'Team Name (id)':30s}{'Waiver':^6s}\n")
-    fantasyTeams = session.query(FantasyTeam).where(FantasyTeam.league_id==leagueid).order_by(FantasyTeam.fantasy_team_id.asc()).all()
+  def buildTeamsEmbed(self, session, channel_id):
+    league = session.query(League).where(League.discord_channel==str(channel_id)).first()
+    if league is None:
+      return None
+    draftOrderEmbed = Embed(title=f"**Teams in {league.league_name}**", description=f"```{'Team ID':7s}{'':5s}{'Team Name (id)':30s}{'Waiver':^6s}\n")
+    fantasyTeams = session.query(FantasyTeam).where(FantasyTeam.league_id==league.league_id).order_by(FantasyTeam.fantasy_team_id.asc()).all()
     for team in fantasyTeams:
       if team.waiver_priority==None:
         draftOrderEmbed.description+=f"{team.fantasy_team_id:>7d}{'':5s}{team.fantasy_team_name:30s}\n"  
@@ -51,49 +50,55 @@ class General(commands.Cog):
         waiverprio = team.waiver_priority.priority
         draftOrderEmbed.description+=f"{team.fantasy_team_id:>7d}{'':5s}{team.fantasy_team_name:30s}{waiverprio:^6d}\n"  
     draftOrderEmbed.description+="```"
-    await interaction.response.send_message(embed=draftOrderEmbed)
-    session.close()
+    return draftOrderEmbed
 
-  @app_commands.command(name="waiverpriority", description="Reports on teams in the channel's league and their team IDs.")
-  async def waiverPriorityReport(self, interaction: discord.Interaction):
-    session = await self.bot.get_session()
-    league = session.query(League).where(League.discord_channel==str(interaction.channel_id))
-    if (league.count() == 0):
+  @app_commands.command(name="teams", description="Reports on teams in the channel's league and their team IDs.")
+  async def getTeamsInLeague(self, interaction: discord.Interaction):
+    draftOrderEmbed = await self.bot.runInSession(self.buildTeamsEmbed, interaction.channel_id)
+    if draftOrderEmbed is None:
       await interaction.response.send_message("No league associated with this channel")
-    leagueid = league.first().league_id
-    draftOrderEmbed = Embed(title=f"**Teams in {league.first().league_name}**", description=f"```{'Team ID':7s}{'':5s}{'Team Name (id)':30s}{'Waiver':^6s}\n")
-    fantasyTeams = session.query(WaiverPriority).where(WaiverPriority.league_id==leagueid).order_by(WaiverPriority.priority.asc()).all()
-    if not fantasyTeams:
-      await interaction.response.send_message("No waiver priorities yet!")
-      session.close()
       return
+    await interaction.response.send_message(embed=draftOrderEmbed)
+
+  def buildWaiverPriorityEmbed(self, session, channel_id):
+    # Embed of the league's waiver order, or a message explaining why there is none
+    league = session.query(League).where(League.discord_channel==str(channel_id)).first()
+    if league is None:
+      return "No league associated with this channel"
+    draftOrderEmbed = Embed(title=f"**Teams in {league.league_name}**", description=f"```{'Team ID':7s}{'':5s}{'Team Name (id)':30s}{'Waiver':^6s}\n")
+    fantasyTeams = session.query(WaiverPriority).where(WaiverPriority.league_id==league.league_id).order_by(WaiverPriority.priority.asc()).all()
+    if not fantasyTeams:
+      return "No waiver priorities yet!"
     for team in fantasyTeams:
       waiverprio = team.priority
       fantasyTeam = team.fantasy_team
       draftOrderEmbed.description+=f"{fantasyTeam.fantasy_team_id:>7d}{'':5s}{fantasyTeam.fantasy_team_name:30s}{waiverprio:^6d}\n"    
     draftOrderEmbed.description+="```"
+    return draftOrderEmbed
+
+  @app_commands.command(name="waiverpriority", description="Reports on teams in the channel's league and their team IDs.")
+  async def waiverPriorityReport(self, interaction: discord.Interaction):
+    draftOrderEmbed = await self.bot.runInSession(self.buildWaiverPriorityEmbed, interaction.channel_id)
+    if isinstance(draftOrderEmbed, str):
+      await interaction.response.send_message(draftOrderEmbed)
+      return
     await interaction.response.send_message(embed=draftOrderEmbed)
-    session.close()
 
   @app_commands.command(name="leaguesite", description="Retrieve a link to your league's webpage")
   async def getLeagueWebpage(self, interaction: discord.Interaction):
-    session = await self.bot.get_session()
-    league = session.query(League).where(League.discord_channel==str(interaction.channel_id))
-    if (league.count() == 0):
+    leagueid = await self.bot.runInSession(lambda session: session.query(League.league_id).where(League.discord_channel==str(interaction.channel_id)).scalar())
+    if leagueid is None:
       await interaction.response.send_message("No league associated with this channel")
-    leagueid = league.first().league_id
+      return
     await interaction.response.send_message(f"{websiteURL}/leagues/{leagueid}")
-    session.close()
 
   @app_commands.command(name="draftsite", description="Retrieve a link to your draft's webpage")
   async def getDraftWebpage(self, interaction: discord.Interaction):
-    session = await self.bot.get_session()
-    draft = session.query(Draft).where(Draft.discord_channel==str(interaction.channel_id))
-    if (draft.count() == 0):
+    draftid = await self.bot.runInSession(lambda session: session.query(Draft.league_id).where(Draft.discord_channel==str(interaction.channel_id)).scalar())
+    if draftid is None:
       await interaction.response.send_message("No draft associated with this channel")
-    draftid = draft.first().league_id
+      return
     await interaction.response.send_message(f"{websiteURL}/drafts/{draftid}")
-    session.close()
 
   @app_commands.command(name="website", description="Retrieve a link to the fantasy FiM website")
   async def getWebsite(self, interaction: discord.Interaction):    
@@ -119,38 +124,31 @@ class General(commands.Cog):
     embed.description += "\n"
     await interaction.response.send_message(embed=embed)
 
+  def loadStandings(self, session, channel_id, week: int):
+    # (league, week status, standings) for the channel's league, with league None if there is none
+    league = session.query(League).filter(League.is_fim == True, League.active == True, League.discord_channel==str(channel_id)).first()
+    if not league:
+      return None, None, None
+    week_status = session.query(WeekStatus).filter(WeekStatus.year == league.year, WeekStatus.week == week).first()
+    if not week_status:
+      return league, None, None
+    # Rank points and tiebreakers up to the specified week, already sorted
+    standings = [{
+        'team_name': team.fantasy_team_name,
+        'total_score': team.total_ranking_points,
+        'tiebreaker': team.tiebreaker,
+    } for team in rank_fantasy_teams(session, league.league_id, FantasyScores.week <= week).all()]
+    return league, week_status, standings
+
   @app_commands.command(name="standings", description="Reports on the rankings for the league in this channel")
   async def getLeagueStandingsTask(self, interaction: discord.Interaction, week: int):
     await interaction.response.send_message(f"Retrieving standings as of week {week}")
-    session = await self.bot.get_session()
-    league = session.query(League).filter(League.is_fim == True, League.active == True, League.discord_channel==str(interaction.channel_id)).first()
+    league, week_status, standings = await self.bot.runInSession(self.loadStandings, interaction.channel_id, week)
     if league:
         year = league.year
-        week_status = session.query(WeekStatus).filter(WeekStatus.year == year, WeekStatus.week == week).first()
         if not week_status:
             await interaction.followup.send(f"No status found for week {week} in year {year}.")
-            session.close()
             return
-        fantasy_teams = session.query(FantasyTeam).filter(FantasyTeam.league_id == league.league_id).all()
-        standings = []
-        for fantasy_team in fantasy_teams:
-            # Get scores up to the specified week
-            scores = session.query(FantasyScores).filter(
-                FantasyScores.fantasy_team_id == fantasy_team.fantasy_team_id,
-                FantasyScores.week <= week
-            ).all()
-            # Calculate total score and tiebreaker
-            total_score = sum(score.rank_points for score in scores)  # Total score based on rank points
-            tiebreaker = sum(score.weekly_score for score in scores)  # Tiebreaker based on weekly score
-
-            standings.append({
-                'team_name': fantasy_team.fantasy_team_name,
-                'total_score': total_score,
-                'tiebreaker': tiebreaker,
-            })
-
-        # Sort standings first by total score, then by tiebreaker
-        standings.sort(key=lambda x: (-x['total_score'], -x['tiebreaker']))
 
         # Prepare embed
         if week_status.scores_finalized:
@@ -170,84 +168,78 @@ class General(commands.Cog):
         await channel.send(embed=embed)
     else:
       await interaction.channel.send(content="No league associated with this channel!")
-    session.close()
 
   @app_commands.command(name="joindraft", description="Join an offseason draft! Can specify a team name")
   async def joinOffseasonDraft(self, interaction: discord.Interaction, teamname: str = None):
-    session = await self.bot.get_session()
-    
-    # Step 1: Find the league associated with the Discord channel
-    league = session.query(League).filter_by(discord_channel=str(interaction.channel_id)).first()
-    if not league:
-        await interaction.response.send_message("No league associated with this channel.")
-        return
+    def join(session):
+      # Returns (error message, league id, team name, team id)
+      # Step 1: Find the league associated with the Discord channel
+      league = session.query(League).filter_by(discord_channel=str(interaction.channel_id)).first()
+      if not league:
+          return "No league associated with this channel.", None, None, None
     
-    # Step 2: Check if the league is in the offseason
-    if not league.offseason:
-        await interaction.response.send_message("This league is not an offseason league.")
-        return
+      # Step 2: Check if the league is in the offseason
+      if not league.offseason:
+          return "This league is not an offseason league.", None, None, None
     
-    # Step 3: Check if the player is already on a FantasyTeam in this league
-    player_authorization = session.query(PlayerAuthorized).join(FantasyTeam).filter(
-        PlayerAuthorized.player_id == str(interaction.user.id),
-        FantasyTeam.league_id == league.league_id
-    ).first()
+      # Step 3: Check if the player is already on a FantasyTeam in this league
+      player_authorization = session.query(PlayerAuthorized).join(FantasyTeam).filter(
+          PlayerAuthorized.player_id == str(interaction.user.id),
+          FantasyTeam.league_id == league.league_id
+      ).first()
     
-    if player_authorization:
-        await interaction.response.send_message("You are already part of a fantasy team in this league.")
-        return
+      if player_authorization:
+          return "You are already part of a fantasy team in this league.", None, None, None
 
-    # Step 4: Check if the draft has already started
-    draft_started = session.query(Draft).filter_by(league_id=league.league_id, discord_channel=str(interaction.channel_id)).first()
-    if draft_started:
-        await interaction.response.send_message("The draft for this league has already started.")
-        return
+      # Step 4: Check if the draft has already started
+      draft_started = session.query(Draft).filter_by(league_id=league.league_id, discord_channel=str(interaction.channel_id)).first()
+      if draft_started:
+          return "The draft for this league has already started.", None, None, None
     
-    # Step 5: Check if the player has a Player object, if not, create one
-    player = session.query(Player).filter_by(user_id=str(interaction.user.id)).first()
-    if not player:
-        new_player = Player(
-            user_id=str(interaction.user.id),
-            is_admin=False  # Default setting for new players
-        )
-        session.add(new_player)
-        session.flush()
+      # Step 5: Check if the player has a Player object, if not, create one
+      player = session.query(Player).filter_by(user_id=str(interaction.user.id)).first()
+      if not player:
+          new_player = Player(
+              user_id=str(interaction.user.id),
+              is_admin=False  # Default setting for new players
+          )
+          session.add(new_player)
+          session.flush()
     
-    # Step 6: Create a new FantasyTeam for the user
-    max_team_id = session.query(FantasyTeam.fantasy_team_id).order_by(FantasyTeam.fantasy_team_id.desc()).first()
-    new_team_id = max_team_id[0] + 1 if max_team_id else 1
+      # Step 6: Check if the team name is unique in the league
+      requested_name = teamname
+      if requested_name:
+          existing_team = session.query(FantasyTeam).filter_by(league_id=league.league_id, fantasy_team_name=requested_name).first()
+          if existing_team:
+              requested_name = None  # Reset team name to None if it's already taken
+
+      # Use the provided team name or the player's Discord nickname if no valid team name is provided
+      new_team_name = requested_name if requested_name else interaction.user.display_name
     
-    # Step 7: Check if the team name is unique in the league
-    if teamname:
-        existing_team = session.query(FantasyTeam).filter_by(league_id=league.league_id, fantasy_team_name=teamname).first()
-        if existing_team:
-            teamname = None  # Reset team name to None if it's already taken
-
-    # Use the provided team name or the player's Discord nickname if no valid team name is provided
-    new_team_name = teamname if teamname else interaction.user.display_name
+      # Step 7: Create a new FantasyTeam for the user, the database assigns its id
+      new_fantasy_team = FantasyTeam(
+          league_id=league.league_id,
+          fantasy_team_name=new_team_name
+      )
     
-    new_fantasy_team = FantasyTeam(
-        fantasy_team_id=new_team_id,
-        league_id=league.league_id,
-        fantasy_team_name=new_team_name
-    )
+      session.add(new_fantasy_team)
+      session.flush()
+      # Step 8: Link the player to the new FantasyTeam
+      player_authorized = PlayerAuthorized(
+          player_id=str(interaction.user.id),
+          fantasy_team_id=new_fantasy_team.fantasy_team_id
+      )
     
-    session.add(new_fantasy_team)
-    session.flush()
-    # Step 8: Link the player to the new FantasyTeam
-    player_authorized = PlayerAuthorized(
-        player_id=str(interaction.user.id),
-        fantasy_team_id=new_team_id
-    )
-    
-    session.add(player_authorized)
-    
-    # Step 8: Commit changes and send a success message
-    session.commit()
-    await interaction.response.send_message(f"Successfully joined the offseason draft with team '{new_team_name}' and team ID {new_fantasy_team.fantasy_team_id}!")
+      session.add(player_authorized)
+      return None, league.league_id, new_team_name, new_fantasy_team.fantasy_team_id
+    error, leagueId, newTeamName, newTeamId = await self.bot.runInSession(join, commit=True)
+    if error:
+      await interaction.response.send_message(error)
+      return
+    await self.bot.invalidateCache(league_scope(leagueId))
+    await interaction.response.send_message(f"Successfully joined the offseason draft with team '{newTeamName}' and team ID {newTeamId}!")
 
     
-    session.close()
 
 async def setup(bot: commands.Bot) -> None:
   cog = General(bot)
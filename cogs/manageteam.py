@@ -7,6 +7,7 @@ from models.scores import *
 from models.users import Player
 from models.transactions import WaiverClaim, TeamOnWaivers, WaiverPriority, TradeProposal, TradeTeams
 from models.draft import Draft
+from services.cache import league_scope
 from sqlalchemy import delete
 from sqlalchemy.sql import text
 from datetime import datetime, timedelta
@@ -28,70 +29,69 @@ class ManageTeam(commands.Cog):
         else:
             return True
 
-    async def getWaiverClaimPriority(self, fantasyId):
-        session = await self.bot.get_session()
-        waiverprio = session.query(WaiverClaim).filter(WaiverClaim.fantasy_team==fantasyId).order_by(WaiverClaim.priority.desc()).first()
+    def nextWaiverClaimPriority(self, session, fantasyId):
+        waiverprio = session.query(WaiverClaim).filter(WaiverClaim.fantasy_team_id==fantasyId).order_by(WaiverClaim.priority.desc()).first()
         if not waiverprio:
             return 1
         else:
-            return waiverprio.priority + 1            
+            return waiverprio.priority + 1
 
-    async def postTeamBoard(self, interaction: discord.Interaction, fantasyTeam: int):
-        session = await self.bot.get_session()
-        message = await interaction.original_response()
-        fantasyTeamResult = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==fantasyTeam)
-        if (fantasyTeamResult.count() == 0):
-            await message.edit(content="Invalid team id")
-            return
-        fTeamFirst: FantasyTeam = fantasyTeamResult.first()
+    async def getWaiverClaimPriority(self, fantasyId):
+        return await self.bot.runInSession(self.nextWaiverClaimPriority, fantasyId)
+
+    def buildTeamBoard(self, session, fantasyTeam: int):
+        # Embed of the team's roster and the week of each of their events, or None for an unknown team
+        fTeamFirst: FantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==fantasyTeam).first()
+        if fTeamFirst is None:
+            return None
         teamBoardEmbed = Embed(title=f"**{fTeamFirst.fantasy_team_name} Week-by-Week board**", description="```")
         teamBoardEmbed.description += f"{'Team':^4s}{'':1s}{'Week 1':^9s}{'':1s}{'Week 2':^9s}{'':1s}{'Week 3':^9s}{'':1s}{'Week 4':^9s}{'':1s}{'Week 5':^9}\n"
         teamsOwned = session.query(TeamOwned).filter(TeamOwned.fantasy_team_id==fantasyTeam).order_by(TeamOwned.team_key.asc())
         for team in teamsOwned.all():
             teamEvents = (
-                session.query(TeamScore)
+                session.query(TeamScore.event_key, FRCEvent.week)
+                .join(FRCEvent, TeamScore.event_key == FRCEvent.event_key)
                 .filter(
                     TeamScore.team_key == team.team_key,
-                    TeamScore.event.has(FRCEvent.year == fTeamFirst.league.year)
+                    FRCEvent.year == fTeamFirst.league.year
                 )
             )
             weeks = ["---" for k in range(5)]
-            for event in teamEvents.all():
-                frcEvent = session.query(FRCEvent).filter(FRCEvent.event_key==event.event_key).first()
-                if int(frcEvent.week) < STATESWEEK:
-                    if (weeks[int(frcEvent.week)-1] == "---"):
-                        weeks[int(frcEvent.week)-1] = event.event_key
+            for event_key, week in teamEvents.all():
+                if int(week) < STATESWEEK:
+                    if (weeks[int(week)-1] == "---"):
+                        weeks[int(week)-1] = event_key
                     else:
-                        weeks[int(frcEvent.week)-1] = "2 Events"
+                        weeks[int(week)-1] = "2 Events"
             teamBoardEmbed.description+=f"{team.team_key:>4s}{'':1s}{weeks[0]:^9s}{'':1s}{weeks[1]:^9s}{'':1s}{weeks[2]:^9s}{'':1s}{weeks[3]:^9s}{'':1s}{weeks[4]:^9}\n"
         teamBoardEmbed.description += "```"
+        return teamBoardEmbed
+
+    async def postTeamBoard(self, interaction: discord.Interaction, fantasyTeam: int):
+        message = await interaction.original_response()
+        teamBoardEmbed = await self.bot.runInSession(self.buildTeamBoard, fantasyTeam)
+        if teamBoardEmbed is None:
+            await message.edit(content="Invalid team id")
+            return
         await message.edit(embed=teamBoardEmbed, content="")
-        session.close()
 
     async def getFantasyTeamIdFromInteraction(self, interaction: discord.Interaction):
-        session = await self.bot.get_session()
-        largeQuery = session.query(FantasyTeam)\
-            .join(PlayerAuthorized, FantasyTeam.fantasy_team_id == PlayerAuthorized.fantasy_team_id)\
-            .join(League, FantasyTeam.league_id == League.league_id)\
-            .filter(PlayerAuthorized.player_id == str(interaction.user.id))\
-            .filter(League.discord_channel == str(interaction.channel_id))
-        team = largeQuery.first()
-        session.close()
-        if team:
-            return team.fantasy_team_id
-        else:
-            return None
-
-    async def startTeamTask(self, interaction: discord.Interaction, frcteam: str, week: int, fantasyId: int):
-        deferred = await interaction.original_response()
-        session = await self.bot.get_session()
+        def query(session):
+            largeQuery = session.query(FantasyTeam.fantasy_team_id)\
+                .join(PlayerAuthorized, FantasyTeam.fantasy_team_id == PlayerAuthorized.fantasy_team_id)\
+                .join(League, FantasyTeam.league_id == League.league_id)\
+                .filter(PlayerAuthorized.player_id == str(interaction.user.id))\
+                .filter(League.discord_channel == str(interaction.channel_id))
+            return largeQuery.scalar()
+        return await self.bot.runInSession(query)
+
+    def startTeamInSession(self, session, frcteam: str, week: int, fantasyId: int):
+        # Start the team for the week; returns the reply and the league whose cache to invalidate, if any
         fantasyteam: FantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==fantasyId).first()
         league: League = session.query(League).filter(League.league_id==fantasyteam.league_id).first()
         #is this a fim season long league?
         if (not league.is_fim):
-            await deferred.edit(content="This league does not support starts/sits.")
-            session.close()
-            return
+            return "This league does not support starts/sits.", None
         
         # Check if lineups are locked for the given week in this league
         week_status = session.query(WeekStatus)\
@@ -99,62 +99,58 @@ class ManageTeam(commands.Cog):
             .filter(WeekStatus.week == week).first()
 
         if week_status and week_status.lineups_locked:
-            await deferred.edit(content="Lineups are locked for this week, you cannot modify your lineup at this time.")
-            session.close()
-            return
+            return "Lineups are locked for this week, you cannot modify your lineup at this time.", None
         #do you own the team?
         teamowned = session.query(TeamOwned)\
                 .filter(TeamOwned.team_key==frcteam)\
                 .filter(TeamOwned.league_id==league.league_id)\
                 .filter(TeamOwned.fantasy_team_id==fantasyId)
         if (teamowned.count() == 0):
-            await deferred.edit(content="You do not own this team.")
-            session.close()
-            return
+            return "You do not own this team.", None
         teamsStartedRecords = session.query(TeamStarted).filter(TeamStarted.fantasy_team_id==fantasyId).filter(TeamStarted.week==week)
         if ((league.team_starts <= teamsStartedRecords.count() and week < STATESWEEK) or (league.team_starts + STATESEXTRA <= teamsStartedRecords.count() and week == STATESWEEK)):
-            await deferred.edit(content="Already starting max number of teams this week.")
-        else:
-            #get frc events in fim this week
-            frcevents = session.query(FRCEvent).filter(FRCEvent.year==league.year).filter(FRCEvent.week==week).filter(FRCEvent.is_fim==True)
-            eventList = [event.event_key for event in frcevents.all()]
-            #does team compete in fim this week?
-            teamcompeting = session.query(TeamScore).filter(TeamScore.team_key==frcteam)\
-                .filter(TeamScore.event_key.in_(eventList))
-            #is your team already starting?
-            alreadyStarting = teamsStartedRecords.filter(TeamStarted.team_number==frcteam).count()
-            #has your team been started twice this year already?
-            teamStartedCount = session.query(TeamStarted)\
-                .filter(TeamStarted.league_id==league.league_id)\
-                .filter(TeamStarted.team_number==frcteam)\
-                .filter(TeamStarted.week < STATESWEEK)
-            if (teamcompeting.count() == 0):
-                await deferred.edit(content="This team is not competing this week!")
-            elif (teamcompeting.count() > 1):
-                await deferred.edit(content="Please contact a fantasy admin to start your team. They are competing at multiple FiM events this week which is a special case.")
-            elif (alreadyStarting > 0):
-                await deferred.edit(content="This team is already starting this week!")
-            elif (not week == STATESWEEK and teamStartedCount.count() >= MAXSTARTS):
-                await deferred.edit(content=f"This team may not be started again until States, they have reached the maximum of {MAXSTARTS}")
-            else:
-                eventkey = teamcompeting.first().event_key
-                frcevent: FRCEvent = session.query(FRCEvent).filter(FRCEvent.event_key==eventkey).first()
-                teamStartedToAdd = TeamStarted(fantasy_team_id=fantasyId, team_number=frcteam, league_id=league.league_id, event_key=eventkey, week=week)
-                session.add(teamStartedToAdd)
-                session.commit()
-                await deferred.edit(content=f"{fantasyteam.fantasy_team_name} is starting team {frcteam} competing at {frcevent.event_name} in week {week}!")
-        session.close()
+            return "Already starting max number of teams this week.", None
+        #get frc events in fim this week
+        frcevents = session.query(FRCEvent).filter(FRCEvent.year==league.year).filter(FRCEvent.week==week).filter(FRCEvent.is_fim==True)
+        eventList = [event.event_key for event in frcevents.all()]
+        #does team compete in fim this week?
+        teamcompeting = session.query(TeamScore).filter(TeamScore.team_key==frcteam)\
+            .filter(TeamScore.event_key.in_(eventList))
+        #is your team already starting?
+        alreadyStarting = teamsStartedRecords.filter(TeamStarted.team_number==frcteam).count()
+        #has your team been started twice this year already?
+        teamStartedCount = session.query(TeamStarted)\
+            .filter(TeamStarted.league_id==league.league_id)\
+            .filter(TeamStarted.team_number==frcteam)\
+            .filter(TeamStarted.week < STATESWEEK)
+        if (teamcompeting.count() == 0):
+            return "This team is not competing this week!", None
+        elif (teamcompeting.count() > 1):
+            return "Please contact a fantasy admin to start your team. They are competing at multiple FiM events this week which is a special case.", None
+        elif (alreadyStarting > 0):
+            return "This team is already starting this week!", None
+        elif (not week == STATESWEEK and teamStartedCount.count() >= MAXSTARTS):
+            return f"This team may not be started again until States, they have reached the maximum of {MAXSTARTS}", None
+        eventkey = teamcompeting.first().event_key
+        frcevent: FRCEvent = session.query(FRCEvent).filter(FRCEvent.event_key==eventkey).first()
+        teamStartedToAdd = TeamStarted(fantasy_team_id=fantasyId, team_number=frcteam, league_id=league.league_id, event_key=eventkey, week=week)
+        session.add(teamStartedToAdd)
+        return f"{fantasyteam.fantasy_team_name} is starting team {frcteam} competing at {frcevent.event_name} in week {week}!", league.league_id
 
-    async def sitTeamTask(self, interaction: discord.Interaction, frcteam: str, week: int, fantasyId: int):
+    async def startTeamTask(self, interaction: discord.Interaction, frcteam: str, week: int, fantasyId: int):
         deferred = await interaction.original_response()
-        session = await self.bot.get_session()
+        reply, leagueId = await self.bot.runInSession(self.startTeamInSession, frcteam, week, fantasyId, commit=True)
+        if leagueId is not None:
+            await self.bot.invalidateCache(league_scope(leagueId))
+        await deferred.edit(content=reply)
+
+    def sitTeamInSession(self, session, frcteam: str, week: int, fantasyId: int):
+        # Sit the team for the week; returns the reply and the league whose cache to invalidate, if any
         fantasyteam: FantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==fantasyId).first()
         league: League = session.query(League).filter(League.league_id==fantasyteam.league_id).first()
         #is this a fim season long league?
         if (not league.is_fim):
-            await deferred.edit(content="This league does not support starts/sits.")
-            session.close()
-            return
+            return "This league does not support starts/sits.", None
         
         # Check if lineups are locked for the given week in this league
         week_status = session.query(WeekStatus)\
@@ -162,9 +158,7 @@ class ManageTeam(commands.Cog):
             .filter(WeekStatus.week == week).first()
 
         if week_status and week_status.lineups_locked:
-            await deferred.edit(content="Lineups are locked for this week, you cannot modify your lineup at this time.")
-            session.close()
-            return
+            return "Lineups are locked for this week, you cannot modify your lineup at this time.", None
         
         #is this team actually starting for you?
         teamstarted = session.query(TeamStarted)\
@@ -173,106 +167,116 @@ class ManageTeam(commands.Cog):
                 .filter(TeamStarted.fantasy_team_id==fantasyId)\
                 .filter(TeamStarted.week==week)
         if (teamstarted.count() == 0):
-            await deferred.edit(content="You are not currently starting this team.")
+            return "You are not currently starting this team.", None
         elif (teamstarted.count() > 1):
-            await deferred.edit(content="Please contact a fantasy admin to sit your team. You are starting them at multiple FiM events this week which is a special case.")
-        else:
-            event: FRCEvent = teamstarted.first().event
-            teamstarted.delete()
-            session.commit()
-            await deferred.edit(content=f"{fantasyteam.fantasy_team_name} is sitting team {frcteam} competing at {event.event_name} in week {week}.")
-        session.close()
+            return "Please contact a fantasy admin to sit your team. You are starting them at multiple FiM events this week which is a special case.", None
+        event: FRCEvent = teamstarted.first().event
+        eventName = event.event_name
+        teamstarted.delete()
+        return f"{fantasyteam.fantasy_team_name} is sitting team {frcteam} competing at {eventName} in week {week}.", league.league_id
+
+    async def sitTeamTask(self, interaction: discord.Interaction, frcteam: str, week: int, fantasyId: int):
+        deferred = await interaction.original_response()
+        reply, leagueId = await self.bot.runInSession(self.sitTeamInSession, frcteam, week, fantasyId, commit=True)
+        if leagueId is not None:
+            await self.bot.invalidateCache(league_scope(leagueId))
+        await deferred.edit(content=reply)
 
     async def renameTeamTask(self, interaction: discord.Interaction, newname: str, fantasyId: int):
         deferred = await interaction.original_response()
-        session = await self.bot.get_session()
-        fantasyteam: FantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==fantasyId).first()
-        oldname = fantasyteam.fantasy_team_name
-        fantasyteam.fantasy_team_name=newname
-        session.commit()
-        await deferred.edit(content=f"Team **{oldname}** renamed to **{newname}** (Team id {fantasyteam.fantasy_team_id})")
-        session.close()
+        def rename(session):
+            fantasyteam: FantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==fantasyId).first()
+            oldname = fantasyteam.fantasy_team_name
+            fantasyteam.fantasy_team_name=newname
+            return oldname, fantasyteam.league_id
+        oldname, leagueId = await self.bot.runInSession(rename, commit=True)
+        await self.bot.invalidateCache(league_scope(leagueId))
+        await deferred.edit(content=f"Team **{oldname}** renamed to **{newname}** (Team id {fantasyId})")
 
     async def viewStartsTask(self, interaction: discord.Interaction, fantasyId: int):
-        session = await self.bot.get_session()
-        # retrieve league starts data
-        fantasyteam: FantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==fantasyId).first()
-        league: League = fantasyteam.league
-        teamsToStart = league.team_starts
-        #retrieve teamstarted for team
-        teamsStarted = session.query(TeamStarted).filter(TeamStarted.fantasy_team_id==fantasyId)
-        # for every week
-        embed = Embed(title=f"**{fantasyteam.fantasy_team_name} Starting Lineups**", description=f"```{'':^8s}")
-        for team in range(1, teamsToStart+STATESEXTRA+1):
-            if team>league.team_starts:
-                embed.description += f"{f'Team {team}':^7s}\n"
-            else:
-                embed.description += f"{f'Team {team}':^7s}{'':2s}"
-        for week in range(1,STATESWEEK+1):
-            # grab every started team and fill in embed
-            weekTeamsStarted = teamsStarted.filter(TeamStarted.week==week).all()
-            lineToAdd = ["-----" for _ in range(teamsToStart)]
-            for _ in range(STATESEXTRA):
-                if not week == STATESWEEK:
-                    lineToAdd.append("")
-                else:
-                    lineToAdd.append("-----")
-            count = 0
-            for start in weekTeamsStarted:
-                lineToAdd[count] = start.team.team_number
-                count += 1
-            embed.description+=f"{f'Week {week}':^8s}"
-            for k in range(teamsToStart+STATESEXTRA):
-                if k+1 > teamsToStart:
-                    embed.description+=f"{lineToAdd[k]:^7s}\n"
+        def buildStarts(session):
+            # retrieve league starts data
+            fantasyteam: FantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==fantasyId).first()
+            league: League = fantasyteam.league
+            teamsToStart = league.team_starts
+            #retrieve teamstarted for team
+            teamsStarted = session.query(TeamStarted).filter(TeamStarted.fantasy_team_id==fantasyId)
+            # for every week
+            embed = Embed(title=f"**{fantasyteam.fantasy_team_name} Starting Lineups**", description=f"```{'':^8s}")
+            for team in range(1, teamsToStart+STATESEXTRA+1):
+                if team>league.team_starts:
+                    embed.description += f"{f'Team {team}':^7s}\n"
                 else:
-                    embed.description+=f"{lineToAdd[k]:^7s}{'':2s}"
+                    embed.description += f"{f'Team {team}':^7s}{'':2s}"
+            for week in range(1,STATESWEEK+1):
+                # grab every started team and fill in embed
+                weekTeamsStarted = teamsStarted.filter(TeamStarted.week==week).all()
+                lineToAdd = ["-----" for _ in range(teamsToStart)]
+                for _ in range(STATESEXTRA):
+                    if not week == STATESWEEK:
+                        lineToAdd.append("")
+                    else:
+                        lineToAdd.append("-----")
+                count = 0
+                for start in weekTeamsStarted:
+                    lineToAdd[count] = start.team.team_number
+                    count += 1
+                embed.description+=f"{f'Week {week}':^8s}"
+                for k in range(teamsToStart+STATESEXTRA):
+                    if k+1 > teamsToStart:
+                        embed.description+=f"{lineToAdd[k]:^7s}\n"
+                    else:
+                        embed.description+=f"{lineToAdd[k]:^7s}{'':2s}"
+            embed.description+="```"
+            return embed
+        embed = await self.bot.runInSession(buildStarts)
         # send embed
         response = await interaction.original_response()
-        embed.description+="```"
         await response.edit(embed=embed, content="")
-        session.close()
 
     async def viewMyClaimsTask(self, interaction: discord.Interaction, fantasyId: int):
-        session = await self.bot.get_session()
-        # retrieve waiver claim data
+        def buildClaims(session):
+            # retrieve waiver claim data
+            waiverClaims = session.query(WaiverClaim).filter(WaiverClaim.fantasy_team_id==fantasyId).order_by(WaiverClaim.priority.asc())
+            if waiverClaims.count() == 0:
+                return None
+            waiverPriority: WaiverPriority = session.query(WaiverPriority).filter(WaiverPriority.fantasy_team_id==fantasyId).first()
+            embed = Embed(title=f"**Waiver Claims - Team Priority: {waiverPriority.priority}**", description=f"```{'Priority':^12s}{'Claimed Team':^16s}{'Team to drop':^16s}\n")
+            for claim in waiverClaims.all():
+                embed.description+=f"{claim.priority:^12d}{claim.team_claimed:^16s}{claim.team_to_drop:^16s}\n"
+            embed.description+="```"
+            return embed
         response = await interaction.original_response()
-        waiverClaims = session.query(WaiverClaim).filter(WaiverClaim.fantasy_team_id==fantasyId).order_by(WaiverClaim.priority.asc())
-        if waiverClaims.count() == 0:
+        embed = await self.bot.runInSession(buildClaims)
+        if embed is None:
             await response.edit(content="You currently have no active claims.")
             return
-        waiverPriority: WaiverPriority = session.query(WaiverPriority).filter(WaiverPriority.fantasy_team_id==fantasyId).first()
-        embed = Embed(title=f"**Waiver Claims - Team Priority: {waiverPriority.priority}**", description=f"```{'Priority':^12s}{'Claimed Team':^16s}{'Team to drop':^16s}\n")
-        for claim in waiverClaims.all():
-            embed.description+=f"{claim.priority:^12d}{claim.team_claimed:^16s}{claim.team_to_drop:^16s}\n"
-        embed.description+="```"
         await response.edit(embed=embed, content="")
-        session.close()
 
     async def addDropTeamTask(self, interaction: discord.Interaction, addTeam: str, dropTeam: str, fantasyId: int, force: bool = False, toWaivers: bool = True):
-        session = await self.bot.get_session()
         message = await interaction.original_response()
         currentWeek = await self.bot.getCurrentWeek()
         if currentWeek.lineups_locked == True:
             await message.edit(content="Cannot make transaction with locked lineups.")
             return
-        #check if own dropTeam
-        teamDropOwned = session.query(TeamOwned)\
-            .filter(TeamOwned.team_key==str(dropTeam))\
-            .filter(TeamOwned.fantasy_team_id==fantasyId)
-        fantasyTeam: FantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==fantasyId).first()
-        teamsOnWaivers = session.query(TeamOnWaivers).filter(TeamOnWaivers.team_number==str(addTeam)).filter(TeamOnWaivers.league_id==fantasyTeam.league_id) #on waivers
-        teamAddOwnedByOther = session.query(TeamOwned).filter(TeamOwned.league_id==fantasyTeam.league_id).filter(TeamOwned.team_key==str(addTeam)) #on team already
-        teamInFiM = session.query(Team).filter(Team.team_number==str(addTeam)).filter(Team.is_fim==True) #is in fim
-        if (teamDropOwned.count() == 0):
-            await message.edit(content="You do not own the team you are attempting to drop!")
-        elif (teamsOnWaivers.count() > 0 and not force):
-            await message.edit(content="Team is on waivers. Please submit a claim instead.")
-        elif (teamAddOwnedByOther.count() > 0):
-            await message.edit(content="This team is already owned.")
-        elif (teamInFiM.count() == 0):
-            await message.edit(content="This team is not in FiM.")
-        else:
+        def addDrop(session):
+            # Returns (error message, fantasy team name, league id)
+            #check if own dropTeam
+            teamDropOwned = session.query(TeamOwned)\
+                .filter(TeamOwned.team_key==str(dropTeam))\
+                .filter(TeamOwned.fantasy_team_id==fantasyId)
+            fantasyTeam: FantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==fantasyId).first()
+            teamsOnWaivers = session.query(TeamOnWaivers).filter(TeamOnWaivers.team_number==str(addTeam)).filter(TeamOnWaivers.league_id==fantasyTeam.league_id) #on waivers
+            teamAddOwnedByOther = session.query(TeamOwned).filter(TeamOwned.league_id==fantasyTeam.league_id).filter(TeamOwned.team_key==str(addTeam)) #on team already
+            teamInFiM = session.query(Team).filter(Team.team_number==str(addTeam)).filter(Team.is_fim==True) #is in fim
+            if (teamDropOwned.count() == 0):
+                return "You do not own the team you are attempting to drop!", None, None
+            elif (teamsOnWaivers.count() > 0 and not force):
+                return "Team is on waivers. Please submit a claim instead.", None, None
+            elif (teamAddOwnedByOther.count() > 0):
+                return "This team is already owned.", None, None
+            elif (teamInFiM.count() == 0):
+                return "This team is not in FiM.", None, None
             if toWaivers:
                 newWaiver = TeamOnWaivers(league_id=fantasyTeam.league_id, team_number=dropTeam)
                 session.add(newWaiver)
@@ -285,6 +289,7 @@ class ManageTeam(commands.Cog):
             session.query(TeamOwned).filter(TeamOwned.league_id==fantasyTeam.league_id).filter(TeamOwned.team_key==dropTeam).delete()
             draftSoNotFail: Draft = session.query(Draft).filter(Draft.league_id==fantasyTeam.league_id).filter(Draft.event_key=="fim").first()
             session.flush()
+            #add addTeam
             newTeamToAdd = TeamOwned(
                 team_key=str(addTeam),
                 fantasy_team_id=fantasyId,
@@ -293,58 +298,57 @@ class ManageTeam(commands.Cog):
             )
             session.add(newTeamToAdd)
             session.flush()  # Try flushing to see if the error occurs here
-            await message.channel.send(content=f"{fantasyTeam.fantasy_team_name} successfully added team {addTeam} and dropped {dropTeam}!")
-            session.commit()
-        #add addTeam
-        session.close()
+            return None, fantasyTeam.fantasy_team_name, fantasyTeam.league_id
+        error, fantasyTeamName, leagueId = await self.bot.runInSession(addDrop, commit=True)
+        if error:
+            await message.edit(content=error)
+            return
+        await message.channel.send(content=f"{fantasyTeamName} successfully added team {addTeam} and dropped {dropTeam}!")
+        await self.bot.invalidateCache(league_scope(leagueId))
 
     async def makeWaiverClaimTask(self, interaction: discord.Interaction, fantasyId: int, addTeam: str, dropTeam: str):
-        session = await self.bot.get_session()
         #get original message to edit
         originalMessage = await interaction.original_response()
-        #check if addTeam is on waivers
-        fantasyTeam: FantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==fantasyId).first()
-        teamsOnWaivers = session.query(TeamOnWaivers).filter(TeamOnWaivers.team_number==addTeam).filter(TeamOnWaivers.league_id==fantasyTeam.league_id)
-        teamowned = session.query(TeamOwned)\
-                .filter(TeamOwned.team_key==dropTeam)\
-                .filter(TeamOwned.fantasy_team_id==fantasyId)
-        waiverClaimAlreadyMade = session.query(WaiverClaim)\
-                .filter(WaiverClaim.fantasy_team_id==fantasyId)\
-                .filter(WaiverClaim.team_claimed==addTeam)\
-                .filter(WaiverClaim.team_to_drop==dropTeam)
-        if (teamsOnWaivers.count() == 0):
-            await originalMessage.edit(content=f"Team {addTeam} is not on waivers!")
-        #check if own dropTeam
-        elif (teamowned.count() == 0):
-            await originalMessage.edit(content=f"You do not own team {dropTeam}.")
-        #check if already made exact waiver claim
-        elif (waiverClaimAlreadyMade.count() > 0):
-            await originalMessage.edit(content=f"You have already made this claim!")
-        #create waiver claim
-        else:
-            newPriority = await self.getWaiverClaimPriority(fantasyId)
+        def makeClaim(session):
+            #check if addTeam is on waivers
+            fantasyTeam: FantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==fantasyId).first()
+            teamsOnWaivers = session.query(TeamOnWaivers).filter(TeamOnWaivers.team_number==addTeam).filter(TeamOnWaivers.league_id==fantasyTeam.league_id)
+            teamowned = session.query(TeamOwned)\
+                    .filter(TeamOwned.team_key==dropTeam)\
+                    .filter(TeamOwned.fantasy_team_id==fantasyId)
+            waiverClaimAlreadyMade = session.query(WaiverClaim)\
+                    .filter(WaiverClaim.fantasy_team_id==fantasyId)\
+                    .filter(WaiverClaim.team_claimed==addTeam)\
+                    .filter(WaiverClaim.team_to_drop==dropTeam)
+            if (teamsOnWaivers.count() == 0):
+                return f"Team {addTeam} is not on waivers!"
+            #check if own dropTeam
+            elif (teamowned.count() == 0):
+                return f"You do not own team {dropTeam}."
+            #check if already made exact waiver claim
+            elif (waiverClaimAlreadyMade.count() > 0):
+                return f"You have already made this claim!"
+            #create waiver claim
+            newPriority = self.nextWaiverClaimPriority(session, fantasyId)
             waiverClaim = WaiverClaim(fantasy_team_id=fantasyId,\
                                       league_id=fantasyTeam.league_id, team_claimed=addTeam,\
                                         team_to_drop=dropTeam, priority=newPriority)
             session.add(waiverClaim)
-            await originalMessage.edit(content=f"Successfully created claim for {addTeam}!")
-            session.commit()
-        #close session
-        session.close()
+            return f"Successfully created claim for {addTeam}!"
+        await originalMessage.edit(content=await self.bot.runInSession(makeClaim, commit=True))
 
     async def cancelClaimTask(self, interaction: discord.Interaction, fantasyId: int, priority: int):
-        session = await self.bot.get_session()
         #get original message to edit
         originalMessage = await interaction.original_response()
-        #check if claim id exists
-        waiverClaimExists = session.query(WaiverClaim)\
-                .filter(WaiverClaim.fantasy_team_id==fantasyId)\
-                .filter(WaiverClaim.priority>=priority)
-        
-        if (waiverClaimExists.filter(WaiverClaim.priority==priority).count() == 0):
-            await originalMessage.edit(content=f"You do not have a claim with this priority!")
-        #create waiver claim
-        else:
+        def cancelClaim(session):
+            #check if claim id exists
+            waiverClaimExists = session.query(WaiverClaim)\
+                    .filter(WaiverClaim.fantasy_team_id==fantasyId)\
+                    .filter(WaiverClaim.priority>=priority)
+            
+            if (waiverClaimExists.filter(WaiverClaim.priority==priority).count() == 0):
+                return f"You do not have a claim with this priority!"
+            #create waiver claim
             claimToCancel = waiverClaimExists.first()
             addTeam = claimToCancel.team_claimed
             dropTeam = claimToCancel.team_to_drop
@@ -352,141 +356,140 @@ class ManageTeam(commands.Cog):
             claimsToShift = waiverClaimExists.filter(WaiverClaim.priority>priority).all()
             for claim in claimsToShift:
                 claim.priority-=1
-            await originalMessage.edit(content=f"Successfully canceled claim for {addTeam} which was dropping {dropTeam}")
-            session.commit()
-        #close session
-        session.close()
+            return f"Successfully canceled claim for {addTeam} which was dropping {dropTeam}"
+        await originalMessage.edit(content=await self.bot.runInSession(cancelClaim, commit=True))
 
     async def createTradeProposalTask(self, interaction: discord.Interaction, fantasyId: int, otherFantasyId: int, teamsOffered: str, teamsRequested: str, force: bool = False) -> TradeProposal:
-        session = await self.bot.get_session()
         originalMessage = await interaction.original_response()
         # Check if lineups are locked for the given week in this league
         week_status = await self.bot.getCurrentWeek()
 
         if week_status and week_status.lineups_locked:
             await originalMessage.edit(content="Lineups are locked for this week, you cannot modify your lineup at this time.")
-            session.close()
-            return
-        proposer_team: FantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==fantasyId).first()
-        proposed_to_team: FantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==otherFantasyId)\
-            .filter(FantasyTeam.league_id==proposer_team.league_id).first()
-        if not proposer_team and not proposed_to_team:
-            await originalMessage.edit(content=f"Invalid fantasy team ID provided.")
-            return
-        expiration_time = datetime.now() + timedelta(hours=1)
-
-        new_trade = TradeProposal(
-            league_id=proposer_team.league_id,
-            proposer_team_id=fantasyId,
-            proposed_to_team_id=otherFantasyId,
-            expiration=expiration_time
-        )
-        session.add(new_trade)
-        session.flush()
-        offeredTeamsList = [team.strip() for team in teamsOffered.split(',')]
-        requestedTeamsList = [team.strip() for team in teamsRequested.split(',')]
-
-        if not len(offeredTeamsList) == len(requestedTeamsList):
-            await originalMessage.edit(content="Must offer the exact same amount of teams.")
-            session.close()
             return
-
-        tradeProposalEmbed = Embed(title="**Trade Proposal Alert!**", description="")
-        offerText = f"**{proposer_team.fantasy_team_name} is offering the following teams:**\n"
-        teamsInTradeCount = len(offeredTeamsList)
-        i = 1
-        # Validate that the proposer owns the offered teams
-        for team_key in offeredTeamsList:
-            ownership = session.query(TeamOwned).filter_by(team_key=team_key, fantasy_team_id=fantasyId).first()
-            if not ownership:
-                await originalMessage.edit(content=f"Team {team_key} is not owned by the proposer.")
-                return
-            new_trade_team = TradeTeams(
-                trade_id=new_trade.trade_id,
-                team_key=team_key,
-                is_offered=True
-            )
-            offerText+=f"{team_key}"
-            if (i < teamsInTradeCount):
-                offerText+=", "
-            else:
-                offerText+="\n"
-            session.add(new_trade_team)
-            i+=1
-        requestTeamText = f"**{proposed_to_team.fantasy_team_name} would send in return the following teams:**\n"
-        # Validate that the proposed-to team owns the requested teams
-        i=1
-        for team_key in requestedTeamsList:
-            ownership = session.query(TeamOwned).filter_by(team_key=team_key, fantasy_team_id=otherFantasyId).first()
-            if not ownership:
-                await originalMessage.edit(content=f"Team {team_key} is not owned by the proposed-to team.")
-                return
-            new_trade_team = TradeTeams(
-                trade_id=new_trade.trade_id,
-                team_key=team_key,
-                is_offered=False
+        def propose(session):
+            # Returns (error message, proposal embed, players to notify, trade id)
+            proposer_team: FantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==fantasyId).first()
+            proposed_to_team: FantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id==otherFantasyId)\
+                .filter(FantasyTeam.league_id==proposer_team.league_id).first()
+            if not proposer_team and not proposed_to_team:
+                return f"Invalid fantasy team ID provided.", None, None, None
+            offeredTeamsList = [team.strip() for team in teamsOffered.split(',')]
+            requestedTeamsList = [team.strip() for team in teamsRequested.split(',')]
+
+            if not len(offeredTeamsList) == len(requestedTeamsList):
+                return "Must offer the exact same amount of teams.", None, None, None
+            # Validate that the proposer owns the offered teams and the proposed-to team the requested ones
+            for team_key in offeredTeamsList:
+                if not session.query(TeamOwned).filter_by(team_key=team_key, fantasy_team_id=fantasyId).first():
+                    return f"Team {team_key} is not owned by the proposer.", None, None, None
+            for team_key in requestedTeamsList:
+                if not session.query(TeamOwned).filter_by(team_key=team_key, fantasy_team_id=otherFantasyId).first():
+                    return f"Team {team_key} is not owned by the proposed-to team.", None, None, None
+            expiration_time = datetime.now() + timedelta(hours=1)
+
+            new_trade = TradeProposal(
+                league_id=proposer_team.league_id,
+                proposer_team_id=fantasyId,
+                proposed_to_team_id=otherFantasyId,
+                expiration=expiration_time
             )
-            requestTeamText+=f"{team_key}"
-            if (i < teamsInTradeCount):
-                requestTeamText+=", "
-            else:
-                requestTeamText+="\n"
-            session.add(new_trade_team)
-            i+=1
-        acceptText=f"**If you wish to accept, use command `/accept {new_trade.trade_id}` within 1 hour.**\n"
-        declineText=f"*If you wish to decline, use command `/decline {new_trade.trade_id}`.*\n"
-        tradeProposalEmbed.description+=offerText+requestTeamText+acceptText+declineText
-        #add notifs for other team
-        playersToNotif = session.query(PlayerAuthorized).filter(PlayerAuthorized.fantasy_team_id==otherFantasyId)
-        notifText = ""
-        for player in playersToNotif.all():
-            notifText += f"<@{player.player_id}> "
+            session.add(new_trade)
+            session.flush()
+
+            tradeProposalEmbed = Embed(title="**Trade Proposal Alert!**", description="")
+            offerText = f"**{proposer_team.fantasy_team_name} is offering the following teams:**\n"
+            teamsInTradeCount = len(offeredTeamsList)
+            i = 1
+            for team_key in offeredTeamsList:
+                new_trade_team = TradeTeams(
+                    trade_id=new_trade.trade_id,
+                    team_key=team_key,
+                    is_offered=True
+                )
+                offerText+=f"{team_key}"
+                if (i < teamsInTradeCount):
+                    offerText+=", "
+                else:
+                    offerText+="\n"
+                session.add(new_trade_team)
+                i+=1
+            requestTeamText = f"**{proposed_to_team.fantasy_team_name} would send in return the following teams:**\n"
+            i=1
+            for team_key in requestedTeamsList:
+                new_trade_team = TradeTeams(
+                    trade_id=new_trade.trade_id,
+                    team_key=team_key,
+                    is_offered=False
+                )
+                requestTeamText+=f"{team_key}"
+                if (i < teamsInTradeCount):
+                    requestTeamText+=", "
+                else:
+                    requestTeamText+="\n"
+                session.add(new_trade_team)
+                i+=1
+            acceptText=f"**If you wish to accept, use command `/accept {new_trade.trade_id}` within 1 hour.**\n"
+            declineText=f"*If you wish to decline, use command `/decline {new_trade.trade_id}`.*\n"
+            tradeProposalEmbed.description+=offerText+requestTeamText+acceptText+declineText
+            #add notifs for other team
+            playersToNotif = session.query(PlayerAuthorized).filter(PlayerAuthorized.fantasy_team_id==otherFantasyId)
+            notifText = ""
+            for player in playersToNotif.all():
+                notifText += f"<@{player.player_id}> "
+            return None, tradeProposalEmbed, notifText, new_trade.trade_id
+        error, tradeProposalEmbed, notifText, tradeId = await self.bot.runInSession(propose, commit=True)
+        if error:
+            await originalMessage.edit(content=error)
+            return
         if not force:
             await interaction.channel.send(embed=tradeProposalEmbed, content=notifText)
-        # Commit all the teams involved in the trade
-        session.commit()
-        tradeProp = session.query(TradeProposal).filter(TradeProposal.trade_id==new_trade.trade_id).first()
-        session.close() 
         if force:
-            return tradeProp
+            return tradeId
 
     async def declineTradeTask(self, interaction: discord.Interaction, fantasyId: int, tradeId: int):
-        session = await self.bot.get_session()
         message = await interaction.original_response()
-        tradeProposal = session.query(TradeProposal).filter(TradeProposal.proposed_to_team_id==fantasyId).filter(TradeProposal.trade_id==tradeId)
-        if tradeProposal.count() > 0:
+        def decline(session):
+            tradeProposal = session.query(TradeProposal).filter(TradeProposal.proposed_to_team_id==fantasyId).filter(TradeProposal.trade_id==tradeId)
+            if tradeProposal.count() == 0:
+                return False
             session.query(TradeTeams).filter(TradeTeams.trade_id==tradeId).delete()
             session.flush()
             tradeProposal.delete()
-            session.commit()
+            return True
+        if await self.bot.runInSession(decline, commit=True):
             await interaction.channel.send(f"Trade proposal {tradeId} declined.")
         else:
             await message.edit(content=f"You did not have a pending proposal with id {tradeId}.")
-        session.close()
 
     async def acceptTradeTask(self, interaction: discord.Interaction, fantasyId: int, tradeId: int, force:bool = False):
-        session = await self.bot.get_session()
         message = await interaction.original_response()
-        tradeProposal = session.query(TradeProposal).filter(TradeProposal.proposed_to_team_id==fantasyId).filter(TradeProposal.trade_id==tradeId)
-        proposalObj = tradeProposal.first()
         currentWeek = await self.bot.getCurrentWeek()
         if (currentWeek.lineups_locked == True and not force):
             await message.edit("Cannot accept a trade while lineups are locked!")
             return
-        if force or tradeProposal.count() > 0:
+        def accept(session):
+            # Returns (error message, trade embed, league id)
+            tradeProposal = session.query(TradeProposal).filter(TradeProposal.proposed_to_team_id==fantasyId).filter(TradeProposal.trade_id==tradeId)
+            proposalObj = tradeProposal.first()
+            if not (force or tradeProposal.count() > 0):
+                return f"You did not have a pending proposal with id {tradeId}.", None, None
             offeredTeamsList = session.query(TradeTeams).filter(TradeTeams.trade_id==tradeId).filter(TradeTeams.is_offered==True).all()
             requestedTeamsList = session.query(TradeTeams).filter(TradeTeams.trade_id==tradeId).filter(TradeTeams.is_offered==False).all()
+            # Validate that the proposer still owns the offered teams and the proposed-to team the requested ones
+            for tradeTeam in offeredTeamsList:
+                if not session.query(TeamOwned).filter(TeamOwned.team_key==tradeTeam.team_key).filter(TeamOwned.fantasy_team_id==proposalObj.proposer_team_id).first():
+                    return f"Team {tradeTeam.team_key} is no longer owned by the proposer.", None, None
+            for tradeTeam in requestedTeamsList:
+                if not session.query(TeamOwned).filter(TeamOwned.team_key==tradeTeam.team_key).filter(TeamOwned.fantasy_team_id==fantasyId).first():
+                    return f"Team {tradeTeam.team_key} is no longer owned by the proposed-to team.", None, None
             #add trade transaction logic
-            # Validate that the proposer owns the offered teams
             tradeConfirmedEmbed = Embed(title="**Trade Alert!**", description="")
             offerText = f"**{proposalObj.proposer_team.fantasy_team_name} is sending the following teams:**\n"
             teamsInTradeCount = len(offeredTeamsList)
             i = 1
             for tradeTeam in offeredTeamsList:
                 ownership = session.query(TeamOwned).filter(TeamOwned.team_key==tradeTeam.team_key).filter(TeamOwned.fantasy_team_id==proposalObj.proposer_team_id).first()
-                if not ownership:
-                    await message.edit(content=f"Team {tradeTeam.team_key} is no longer owned by the proposer.")
-                    return
                 ownership.fantasy_team_id=proposalObj.proposed_to_team_id
                 session.flush()
                 session.query(TeamStarted).filter(TeamStarted.week>=currentWeek.week)\
@@ -500,13 +503,9 @@ class ManageTeam(commands.Cog):
                     offerText+="\n"
                 i+=1
             requestTeamText = f"**{proposalObj.proposed_to_team.fantasy_team_name} is sending the following teams in return:**\n"
-            # Validate that the proposed-to team owns the requested teams
             i=1
             for tradeTeam in requestedTeamsList:
                 ownership = session.query(TeamOwned).filter(TeamOwned.team_key==tradeTeam.team_key).filter(TeamOwned.fantasy_team_id==fantasyId).first()
-                if not ownership:
-                    await message.edit(content=f"Team {tradeTeam.team_key} is no longer owned by the proposed-to team.")
-                    return
                 ownership.fantasy_team_id=proposalObj.proposer_team_id
                 session.flush()
                 session.query(TeamStarted).filter(TeamStarted.week>=currentWeek.week)\
@@ -519,15 +518,18 @@ class ManageTeam(commands.Cog):
                 else:
                     requestTeamText+="\n"
                 i+=1
+            leagueId = proposalObj.league_id
             session.query(TradeTeams).filter(TradeTeams.trade_id==tradeId).delete()
             session.flush()
             tradeProposal.delete()
-            session.commit()
             tradeConfirmedEmbed.description+=offerText+requestTeamText
-            await interaction.channel.send(embed=tradeConfirmedEmbed)
-        else:
-            await message.edit(content=f"You did not have a pending proposal with id {tradeId}.")
-        session.close()
+            return None, tradeConfirmedEmbed, leagueId
+        error, tradeConfirmedEmbed, leagueId = await self.bot.runInSession(accept, commit=True)
+        if error:
+            await message.edit(content=error)
+            return
+        await self.bot.invalidateCache(league_scope(leagueId))
+        await interaction.channel.send(embed=tradeConfirmedEmbed)
 
     @app_commands.command(name="viewteam", description="View a fantasy team and when their FRC teams compete")
     async def viewATeam(self, interaction: discord.Interaction, fantasyteam: int):
@@ -569,29 +571,27 @@ class ManageTeam(commands.Cog):
     @app_commands.command(name="addusertoteam", description="Add an authorized user to your fantasy team")
     async def authorizeUser(self, interaction: discord.Interaction, user: discord.User):
         if await self.bot.verifyTeamMember(interaction, interaction.user):
-            session = await self.bot.get_session()
-            player = session.query(Player).filter(Player.user_id == str(user.id))
-            if player.count() == 0:
-                session.add(Player(user_id=user.id, is_admin=False))
-                session.commit()
+            def addPlayer(session):
+                player = session.query(Player).filter(Player.user_id == str(user.id))
+                if player.count() == 0:
+                    session.add(Player(user_id=user.id, is_admin=False))
+            await self.bot.runInSession(addPlayer, commit=True)
             if await self.bot.verifyTeamMember(interaction, user):
-                session.close()
                 await interaction.response.send_message("You can't add someone already on your team!")
             elif not await self.bot.verifyNotInLeague(interaction, user):
-                session.close()
                 await interaction.response.send_message("You can't add someone who is already in another team in the league!")
             else:
                 fantasyteamid = await self.getFantasyTeamIdFromInteraction(interaction)
                 if fantasyteamid is None:
-                    session.close()
                     await interaction.response.send_message("Could not find your fantasy team.")
                     return
-                authorizeToAdd = PlayerAuthorized(fantasy_team_id=fantasyteamid, player_id=user.id)
-                session.add(authorizeToAdd)
-                session.commit()
-                fantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id == fantasyteamid).first()
-                await interaction.response.send_message(f"Successfully added <@{user.id}> to {fantasyTeam.fantasy_team_name}!")
-            session.close()
+                def authorize(session):
+                    authorizeToAdd = PlayerAuthorized(fantasy_team_id=fantasyteamid, player_id=user.id)
+                    session.add(authorizeToAdd)
+                    fantasyTeam = session.query(FantasyTeam).filter(FantasyTeam.fantasy_team_id == fantasyteamid).first()
+                    return fantasyTeam.fantasy_team_name
+                fantasyTeamName = await self.bot.runInSession(authorize, commit=True)
+                await interaction.response.send_message(f"Successfully added <@{user.id}> to {fantasyTeamName}!")
         else:
             await interaction.response.send_message("You are not part of any team in this league!")
 
@@ -12,53 +12,58 @@ class Scores(commands.Cog):
   def __init__(self, bot):
     self.bot = bot
 
-  async def getFRCTeamReport(self, interaction: discord.Interaction, frcTeam: str):
-    session = await self.bot.get_session()
-    message = await interaction.original_response()
-    leagueToGrabReport: League = session.query(League).filter(League.discord_channel==str(interaction.channel_id)).first()
+  def buildFRCTeamReport(self, session, channel_id, frcTeam: str):
+    # Report embed for the FRC team within the channel's league, or an error message
+    leagueToGrabReport: League = session.query(League).filter(League.discord_channel==str(channel_id)).first()
     frcTeamToReport: Team = session.query(Team).filter(Team.team_number==frcTeam).filter(Team.is_fim==True).first()
     if not leagueToGrabReport:
-      await message.edit(content="No league associated with this channel.")
+      return "No league associated with this channel."
     elif not frcTeamToReport:
-      await message.edit(content="No league associated with this channel.")
+      return "No league associated with this channel."
+    # Variables to fill in before the snippet
+
+    team_number = frcTeamToReport.team_number
+    team_name = frcTeamToReport.name
+    team_status = "Free Agent"  # Change to "On Waivers" or "Free Agent" as needed
+    ownedBy: TeamOwned = session.query(TeamOwned).filter(TeamOwned.league_id==leagueToGrabReport.league_id)\
+      .filter(TeamOwned.team_key==frcTeam).first()
+    if ownedBy:
+      team_status = f"Owned by {ownedBy.fantasyTeam.fantasy_team_name}"
     else:
-      # Variables to fill in before the snippet
+      onWaivers: TeamOnWaivers = session.query(TeamOnWaivers).filter(TeamOnWaivers.league_id==leagueToGrabReport.league_id)\
+                                                              .filter(TeamOnWaivers.team_number==frcTeam).first()
+      if onWaivers:
+        team_status = "On Waivers"
+    team_starts = session.query(TeamStarted).filter(TeamStarted.team_number==frcTeam).filter(TeamStarted.league_id==leagueToGrabReport.league_id).count()
+    events_attending = (
+        session.query(TeamScore)
+        .join(FRCEvent, TeamScore.event_key == FRCEvent.event_key)  # Join with FRCEvent
+        .filter(TeamScore.team_key == frcTeam)  # Filter by the team key
+        .order_by(FRCEvent.week)  # Order by the week attribute
+        .all()
+    )
 
-      team_number = frcTeamToReport.team_number
-      team_name = frcTeamToReport.name
-      team_status = "Free Agent"  # Change to "On Waivers" or "Free Agent" as needed
-      ownedBy: TeamOwned = session.query(TeamOwned).filter(TeamOwned.league_id==leagueToGrabReport.league_id)\
-        .filter(TeamOwned.team_key==frcTeam).first()
-      if ownedBy:
-        team_status = f"Owned by {ownedBy.fantasyTeam.fantasy_team_name}"
-      else:
-        onWaivers: TeamOnWaivers = session.query(TeamOnWaivers).filter(TeamOnWaivers.league_id==leagueToGrabReport.league_id)\
-                                                                .filter(TeamOnWaivers.team_number==frcTeam).first()
-        if onWaivers:
-          team_status = "On Waivers"
-      team_starts = session.query(TeamStarted).filter(TeamStarted.team_number==frcTeam).filter(TeamStarted.league_id==leagueToGrabReport.league_id).count()
-      events_attending = (
-          session.query(TeamScore)
-          .join(FRCEvent, TeamScore.event_key == FRCEvent.event_key)  # Join with FRCEvent
-          .filter(TeamScore.team_key == frcTeam)  # Filter by the team key
-          .order_by(FRCEvent.week)  # Order by the week attribute
-          .all()
-      )
+    # Create the embed
+    embed = discord.Embed(title=f"**Team {team_number} Report**", color=discord.Color.blue())
 
-      # Create the embed
-      embed = discord.Embed(title=f"**Team {team_number} Report**", color=discord.Color.blue())
+    # Add fields
+    embed.add_field(name="Team Name", value=team_name, inline=False)
+    embed.add_field(name="Team Status", value=team_status, inline=False)
+    embed.add_field(name="Team Starts", value=str(team_starts), inline=False)
 
-      # Add fields
-      embed.add_field(name="Team Name", value=team_name, inline=False)
-      embed.add_field(name="Team Status", value=team_status, inline=False)
-      embed.add_field(name="Team Starts", value=str(team_starts), inline=False)
+    # Format events attending using TeamScore objects
+    events_info = "\n".join([f"{score.event.event_name} - {score.score_team()} points" if score.score_team() > 0 else f"{score.event.event_name} - Week {score.event.week}" for score in events_attending if score.event.is_fim==True])
+    embed.add_field(name="Events Attending", value=events_info if events_info else "None", inline=False)
 
-      # Format events attending using TeamScore objects
-      events_info = "\n".join([f"{score.event.event_name} - {score.score_team()} points" if score.score_team() > 0 else f"{score.event.event_name} - Week {score.event.week}" for score in events_attending if score.event.is_fim==True])
-      embed.add_field(name="Events Attending", value=events_info if events_info else "None", inline=False)
+    return embed
 
-      # Send the embed (example)
-      await message.edit(embed=embed)
+  async def getFRCTeamReport(self, interaction: discord.Interaction, frcTeam: str):
+    message = await interaction.original_response()
+    report = await self.bot.runInSession(self.buildFRCTeamReport, interaction.channel_id, frcTeam)
+    if isinstance(report, str):
+      await message.edit(content=report)
+    else:
+      await message.edit(embed=report)
 
   @app_commands.command(name="scores", description="Retrieve Scores")
   async def getScores(self, interaction: discord.Interaction):
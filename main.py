@@ -10,8 +10,14 @@ from dotenv import load_dotenv
 from models.base import Base
 from models.scores import PlayerAuthorized, League, FantasyTeam, WeekStatus
 import cogs.admin as admin
-import time
-import threading
+from services.cache import bump_cache_versions
+from services.apiclient import ApiClient
+from services.httpcache import HttpCache
+from services.scheduler import Scheduler
+from services.poolstats import InstrumentedQueuePool
+from services.dbexecutor import DbExecutor
+import datetime
+import traceback
 
 
 load_dotenv()
@@ -30,9 +36,35 @@ class FantasyFiMBot(commands.Bot):
                          intents=discord.Intents.all(),
                          applpication_id=os.getenv("DISCORD_APPLICATION_ID"))
 
-        self.engine = create_engine(url=conn_str, pool_size=20, max_overflow=40, pool_pre_ping=True, pool_recycle=60)
-        self.session = self.engine.connect()
+        self.engine = create_engine(url=conn_str, poolclass=InstrumentedQueuePool, pool_size=20, max_overflow=40, pool_pre_ping=True, pool_recycle=60)
         Base.metadata.create_all(self.engine)
+        # One session factory for the whole bot
+        self.Session = sessionmaker(bind=self.engine)
+        # Blocking database work runs here instead of on the event loop, one thread per pooled connection
+        self.dbExecutor = DbExecutor(self.Session, max_workers=int(os.getenv("DB_THREADS", 20)))
+        # Shared HTTP client for TBA and Statbotics (bot.http is discord.py's own client)
+        self.apiClient = ApiClient(max_concurrency=int(os.getenv("HTTP_MAX_CONCURRENCY", 8)),
+                                   rate_per_host=float(os.getenv("HTTP_RATE_PER_HOST", 10)),
+                                   timeout=float(os.getenv("HTTP_TIMEOUT", 30)),
+                                   retries=int(os.getenv("HTTP_RETRIES", 3)),
+                                   cache=HttpCache(os.getenv("HTTP_CACHE_PATH", "http_cache.sqlite3")))
+        # Recurring admin jobs; an empty schedule leaves the job off
+        self.scheduler = Scheduler(self.runInSession, jitter=float(os.getenv("SCHEDULE_JITTER", 60)))
+        jobs = {
+            "district_import": (os.getenv("SCHEDULE_DISTRICT_IMPORT", "0 7 * * *"), self.district_update_job),
+            "waivers": (os.getenv("SCHEDULE_WAIVERS", ""), self.waiver_job),
+            "reminders": (os.getenv("SCHEDULE_REMINDERS", ""), self.reminder_job),
+            "score_refresh": (os.getenv("SCHEDULE_SCORE_REFRESH", ""), self.score_refresh_job),
+        }
+        for name, (schedule, job) in jobs.items():
+            if schedule:
+                self.scheduler.add_job(name, schedule, job)
+
+    async def close(self):
+        await self.scheduler.stop()
+        await self.apiClient.close()
+        await super().close()
+        self.dbExecutor.shutdown()
 
     async def log_message(self, title="Title", message="Message", embed: discord.Embed=None):
         logChannel = await self.fetch_channel(int(os.getenv("LOGGING_CHANNEL_ID")))
@@ -41,84 +73,94 @@ class FantasyFiMBot(commands.Bot):
             embed=embed
         return await logChannel.send(embed = embed)
 
-    def run_scheduled_district_update(self):
-        while True:
-            now = time.localtime()
-            if now.tm_hour == 7 and now.tm_min == 0:
-                self.loop.create_task(self.district_update_job())
-            time.sleep(60)
-
     async def district_update_job(self):
         adminCog = admin.Admin(self)
-        await adminCog.importFullDistrctTask(2025)
+        await adminCog.importFullDistrctTask(datetime.date.today().year)
+
+    async def waiver_job(self):
+        adminCog = admin.Admin(self)
+        message = await self.log_message("Scheduled waivers", "Attempting to process waivers")
+        await adminCog.processWaiversTask(message)
 
-    async def get_session(self):
-        Session = sessionmaker(bind=self.engine)
-        return Session()
+    async def reminder_job(self):
+        adminCog = admin.Admin(self)
+        message = await self.log_message("Scheduled reminders", "Reminding all users with unfilled lineups to fill them.")
+        await adminCog.remindPlayersTask(message)
+
+    async def score_refresh_job(self):
+        currentWeek = await self.getCurrentWeek()
+        if currentWeek is None or currentWeek.scores_finalized:
+            return
+        adminCog = admin.Admin(self)
+        message = await self.log_message("Scheduled score refresh", f"Scoring all leagues for {currentWeek.year} week {currentWeek.week}")
+        # Unofficial refresh: league channels are only notified by /scoreupdate
+        await adminCog.updateScoresTask(message, currentWeek.year, currentWeek.week,
+                                        states=currentWeek.week == admin.STATES_WEEK, notify=False)
+
+    def poolUsage(self) -> dict:
+        return self.engine.pool.usage()
+
+    async def runInSession(self, fn, *args, commit=False, **kwargs):
+        # fn(session, *args, **kwargs) on a database thread with its own session, see DbExecutor.run_in_session
+        return await self.dbExecutor.run_in_session(fn, *args, commit=commit, **kwargs)
+
+    async def invalidateCache(self, *scopes):
+        # Bump API cache versions so the website stops serving responses built before this write
+        try:
+            await self.runInSession(bump_cache_versions, *scopes, commit=True)
+        except Exception:
+            logger.error(traceback.format_exc())
     
     async def verifyTeamMember(self, interaction: discord.Interaction, user: discord.User):
-        session = await self.get_session()
-
-        # Perform the query with correct joins and conditions
-        largeQuery = session.query(PlayerAuthorized, FantasyTeam, League)\
-            .join(FantasyTeam, PlayerAuthorized.fantasy_team_id == FantasyTeam.fantasy_team_id)\
-            .join(League, FantasyTeam.league_id == League.league_id)\
-            .filter(PlayerAuthorized.player_id == str(interaction.user.id))\
-            .filter(League.discord_channel == str(interaction.channel_id))
-
-        # Check if the query returns any results
-        if largeQuery.count() == 0:
-            session.close()
-            return False
-
-        # Get the fantasy team ID from the first result row
-        teamid = largeQuery.first().FantasyTeam.fantasy_team_id
-        logger.info(f"teamid {teamid}")
-
-        # Now check if the given user is authorized in the same team
-        users = session.query(PlayerAuthorized)\
-            .filter(PlayerAuthorized.player_id == str(user.id))\
-            .filter(PlayerAuthorized.fantasy_team_id == int(teamid))
-
-        session.close()
-        return users.count() > 0
+        def query(session):
+            # Perform the query with correct joins and conditions
+            largeQuery = session.query(PlayerAuthorized, FantasyTeam, League)\
+                .join(FantasyTeam, PlayerAuthorized.fantasy_team_id == FantasyTeam.fantasy_team_id)\
+                .join(League, FantasyTeam.league_id == League.league_id)\
+                .filter(PlayerAuthorized.player_id == str(interaction.user.id))\
+                .filter(League.discord_channel == str(interaction.channel_id))
+
+            # Check if the query returns any results
+            firstResult = largeQuery.first()
+            if firstResult is None:
+                return False
+
+            # Get the fantasy team ID from the first result row
+            teamid = firstResult.FantasyTeam.fantasy_team_id
+            logger.info(f"teamid {teamid}")
+
+            # Now check if the given user is authorized in the same team
+            users = session.query(PlayerAuthorized)\
+                .filter(PlayerAuthorized.player_id == str(user.id))\
+                .filter(PlayerAuthorized.fantasy_team_id == int(teamid))
+            return users.count() > 0
+        return await self.runInSession(query)
     
     async def verifyTeamMemberByTeamId(self, fantasyId: int, user: discord.User):
-        session = await self.get_session()
-
-        # Now check if the given user is authorized in the same team
-        users = session.query(PlayerAuthorized)\
-            .filter(PlayerAuthorized.player_id == str(user.id))\
-            .filter(PlayerAuthorized.fantasy_team_id == int(fantasyId))
-
-        session.close()
-        return users.count() > 0
+        def query(session):
+            # Now check if the given user is authorized in the same team
+            users = session.query(PlayerAuthorized)\
+                .filter(PlayerAuthorized.player_id == str(user.id))\
+                .filter(PlayerAuthorized.fantasy_team_id == int(fantasyId))
+            return users.count() > 0
+        return await self.runInSession(query)
 
     async def verifyNotInLeague(self, interaction: discord.Interaction, user: discord.User):
-        session = await self.get_session()
-
-        # Query to find any fantasy team in the league where the user is already a member
-        existingTeamQuery = session.query(PlayerAuthorized)\
-            .join(FantasyTeam, PlayerAuthorized.fantasy_team_id == FantasyTeam.fantasy_team_id)\
-            .join(League, FantasyTeam.league_id == League.league_id)\
-            .filter(PlayerAuthorized.player_id == str(user.id))\
-            .filter(League.discord_channel == str(interaction.channel_id))
-
-        # Debugging: Print or log the results to see if the query is returning anything
-        found_teams = existingTeamQuery.all()
-
-        if len(found_teams) > 0:
-            session.close()
-            return False  # The user is already part of the league
-
-        session.close()
-        return True  # The user is not part of the league
+        def query(session):
+            # Query to find any fantasy team in the league where the user is already a member
+            existingTeamQuery = session.query(PlayerAuthorized)\
+                .join(FantasyTeam, PlayerAuthorized.fantasy_team_id == FantasyTeam.fantasy_team_id)\
+                .join(League, FantasyTeam.league_id == League.league_id)\
+                .filter(PlayerAuthorized.player_id == str(user.id))\
+                .filter(League.discord_channel == str(interaction.channel_id))
+            # The user is not part of the league if nothing is found
+            return existingTeamQuery.first() is None
+        return await self.runInSession(query)
 
     async def getCurrentWeek(self) -> WeekStatus:
-        session = await self.get_session()
-        week = session.query(WeekStatus).filter(WeekStatus.active==True).order_by(WeekStatus.year.asc()).order_by(WeekStatus.week.asc()).first()
-        session.close() 
-        return week
+        def query(session):
+            return session.query(WeekStatus).filter(WeekStatus.active==True).order_by(WeekStatus.year.asc()).order_by(WeekStatus.week.asc()).first()
+        return await self.runInSession(query)
 
     async def setup_hook(self):
         await self.load_extension("cogs.general")
@@ -133,8 +175,9 @@ class FantasyFiMBot(commands.Bot):
 
         await bot.change_presence(activity=discord.Activity(
             type=discord.ActivityType.competing, name=str("Fantasy FiM!")))
-        
-        threading.Thread(target=self.run_scheduled_district_update, daemon=True).start()
+
+        # on_ready fires again after reconnects; the scheduler only starts once
+        await self.scheduler.start()
 
         logger.info("Bot startup complete!")
 
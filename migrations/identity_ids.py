@@ -0,0 +1,57 @@
+"""
+Moves league, fantasyteam and draft ids onto database generated identities.
+
+Ids used to be picked by the bot as max(id) + 1, so existing columns are either plain integers
+or SERIAL columns whose sequence never advanced. Each column is switched to GENERATED BY DEFAULT
+AS IDENTITY and the identity is started after the highest existing id. Safe to run more than once.
+
+    python -m migrations.identity_ids
+"""
+import logging
+import os
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+logger = logging.getLogger(__name__)
+
+ID_COLUMNS = [
+    ("league", "league_id"),
+    ("fantasyteam", "fantasy_team_id"),
+    ("draft", "draft_id"),
+]
+
+
+def migrate_column(connection, table: str, column: str):
+    is_identity, default = connection.execute(text(
+        "SELECT is_identity, column_default FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column"
+    ), {"table": table, "column": column}).one()
+    if is_identity != "YES":
+        # A SERIAL column's sequence is owned by the column and would be left behind
+        sequence = connection.execute(text("SELECT pg_get_serial_sequence(:table, :column)"),
+                                      {"table": table, "column": column}).scalar()
+        if default is not None:
+            connection.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} DROP DEFAULT"))
+        if sequence is not None:
+            connection.execute(text(f"DROP SEQUENCE {sequence}"))
+        connection.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} ADD GENERATED BY DEFAULT AS IDENTITY"))
+        logger.info(f"{table}.{column} is now an identity column")
+    next_id = connection.execute(text(f"SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}")).scalar()
+    connection.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} RESTART WITH {next_id}"))
+    logger.info(f"{table}.{column} continues from {next_id}")
+
+
+def migrate(engine):
+    if engine.dialect.name != "postgresql":
+        # SQLite already numbers INTEGER PRIMARY KEY columns itself
+        logger.info(f"Nothing to migrate on {engine.dialect.name}")
+        return
+    with engine.begin() as connection:
+        for table, column in ID_COLUMNS:
+            migrate_column(connection, table, column)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv()
+    migrate(create_engine(os.getenv("DATABASE_URL")))
@@ -0,0 +1,34 @@
+"""
+Creates the indexes declared on the models that an existing database is missing.
+
+create_all only builds indexes together with a new table, so tables created before an index was
+declared need this once. Indexes that already exist are left alone, so it is safe to rerun.
+
+    python -m migrations.indexes
+"""
+import logging
+import os
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, inspect
+from models.base import Base
+
+logger = logging.getLogger(__name__)
+
+
+def migrate(engine):
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            index.create(engine)
+            logger.info(f"Created index {index.name} on {table.name}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv()
+    migrate(create_engine(os.getenv("DATABASE_URL")))
@@ -3,4 +3,6 @@ Base = declarative_base()
 from models.users import *
 from models.scores import *
 from models.draft import *
-from models.transactions import *
\ No newline at end of file
+from models.transactions import *
+from models.cache import *
+from models.jobs import *
\ No newline at end of file
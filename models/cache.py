@@ -0,0 +1,8 @@
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+class CacheVersion(Base):
+  __tablename__ = "cacheversion"
+  scope: Mapped[str] = mapped_column(String(50), primary_key=True)
+  version: Mapped[int] = mapped_column(Integer(), nullable=False, default=0)
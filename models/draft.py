@@ -1,11 +1,14 @@
-from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy import ForeignKey, Identity, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .base import Base
 
 
 class Draft(Base):
   __tablename__ = "draft"
-  draft_id: Mapped[int] = mapped_column(Integer(), primary_key=True)
+  __table_args__ = (
+    Index("ix_draft_discord_channel", "discord_channel"),
+  )
+  draft_id: Mapped[int] = mapped_column(Integer(), Identity(), primary_key=True)
   league_id: Mapped[int] = mapped_column(ForeignKey("league.league_id"))
   event_key: Mapped[int] = mapped_column(ForeignKey("frcevent.event_key"))
   discord_channel: Mapped[str] = mapped_column(String(30))
@@ -25,6 +28,9 @@ class DraftOrder(Base):
 
 class DraftPick(Base):
   __tablename__ = "draftpick"
+  __table_args__ = (
+    Index("ix_draftpick_draft_team", "draft_id", "team_number"),
+  )
   fantasy_team_id: Mapped[int] = mapped_column(ForeignKey("fantasyteam.fantasy_team_id"), primary_key=True)
   draft_id: Mapped[int] = mapped_column(ForeignKey("draft.draft_id"), primary_key=True)
   pick_number: Mapped[int] = mapped_column(Integer(), nullable=False, primary_key=True)
@@ -40,4 +46,26 @@ class StatboticsData(Base):
   year: Mapped[int] = mapped_column(Integer(), primary_key=True)
   year_end_epa: Mapped[int] = mapped_column(Integer())
 
-  team = relationship("Team")
\ No newline at end of file
+  team = relationship("Team")
+
+class DraftPoolTeam(Base):
+  __tablename__ = "draftpoolteam"
+  __table_args__ = (
+    Index("ix_draftpoolteam_draft_rank", "draft_id", "pool_rank"),
+  )
+  draft_id: Mapped[int] = mapped_column(ForeignKey("draft.draft_id"), primary_key=True)
+  team_number: Mapped[str] = mapped_column(ForeignKey("teams.team_number"), primary_key=True)
+  pool_rank: Mapped[int] = mapped_column(Integer(), nullable=False)
+  year_end_epa: Mapped[int] = mapped_column(Integer(), nullable=True)
+
+  team = relationship("Team")
+  draft = relationship("Draft")
+
+class DraftBoardMessage(Base):
+  __tablename__ = "draftboardmessage"
+  draft_id: Mapped[int] = mapped_column(ForeignKey("draft.draft_id"), primary_key=True)
+  discord_channel: Mapped[str] = mapped_column(String(30))
+  message_id: Mapped[str] = mapped_column(String(30))
+  page: Mapped[int] = mapped_column(Integer(), nullable=False, default=0)
+
+  draft = relationship("Draft")
@@ -0,0 +1,14 @@
+from sqlalchemy import Integer, String, DateTime, Double
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from .base import Base
+
+class JobRun(Base):
+  __tablename__ = "jobrun"
+  job_name: Mapped[str] = mapped_column(String(50), primary_key=True)
+  last_started: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+  last_finished: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+  last_duration: Mapped[float] = mapped_column(Double(), nullable=True)
+  last_status: Mapped[str] = mapped_column(String(20), nullable=True)
+  run_count: Mapped[int] = mapped_column(Integer(), nullable=False, default=0)
+  failure_count: Mapped[int] = mapped_column(Integer(), nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, ForeignKey, String, Integer, Double
+from sqlalchemy import Boolean, ForeignKey, Identity, Index, String, Integer, Double
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import json
 import math
@@ -31,6 +31,9 @@ class FRCEvent(Base):
 
 class TeamScore(Base):
   __tablename__ = "teamscore"
+  __table_args__ = (
+    Index("ix_teamscore_event_key", "event_key"),
+  )
   team_key: Mapped[str] = mapped_column(ForeignKey("teams.team_number"), primary_key=True)
   event_key: Mapped[str] = mapped_column(ForeignKey("frcevent.event_key"), primary_key=True)
   qual_points: Mapped[int] = mapped_column(Integer(), nullable=False, default=0)
@@ -92,7 +95,10 @@ class TeamScore(Base):
 
 class League(Base):
   __tablename__ = "league"
-  league_id: Mapped[int] = mapped_column(primary_key=True)
+  __table_args__ = (
+    Index("ix_league_discord_channel", "discord_channel"),
+  )
+  league_id: Mapped[int] = mapped_column(Integer(), Identity(), primary_key=True)
   league_name: Mapped[str] = mapped_column(String(255), nullable=False)
   offseason: Mapped[bool] = mapped_column(Boolean(), nullable=False, default=False)
   team_limit: Mapped[int] = mapped_column(Integer(), nullable=False, default=8)
@@ -108,7 +114,10 @@ class League(Base):
 
 class FantasyTeam(Base):
   __tablename__ = "fantasyteam"
-  fantasy_team_id: Mapped[int] = mapped_column(Integer(), primary_key=True)
+  __table_args__ = (
+    Index("ix_fantasyteam_league_id", "league_id"),
+  )
+  fantasy_team_id: Mapped[int] = mapped_column(Integer(), Identity(), primary_key=True)
   fantasy_team_name: Mapped[str] = mapped_column(String(255), nullable=False)
   league_id: Mapped[int] = mapped_column(ForeignKey("league.league_id"), nullable=False)
 
@@ -118,6 +127,10 @@ class FantasyTeam(Base):
 
 class TeamOwned(Base):
   __tablename__ = "teamowned"
+  __table_args__ = (
+    Index("ix_teamowned_league_team", "league_id", "team_key"),
+    Index("ix_teamowned_fantasy_team_id", "fantasy_team_id"),
+  )
   team_key: Mapped[str] = mapped_column(ForeignKey("teams.team_number"), primary_key=True)
   fantasy_team_id: Mapped[int] = mapped_column(ForeignKey("fantasyteam.fantasy_team_id"),\
                                                primary_key=True)
@@ -135,6 +148,10 @@ class TeamOwned(Base):
 
 class TeamStarted(Base):
   __tablename__ = "teamstarted"
+  __table_args__ = (
+    Index("ix_teamstarted_fantasy_team_week", "fantasy_team_id", "week"),
+    Index("ix_teamstarted_league_team", "league_id", "team_number"),
+  )
   fantasy_team_id: Mapped[int] = mapped_column(ForeignKey("fantasyteam.fantasy_team_id"),\
                                             primary_key=True)
   team_number: Mapped[str] = mapped_column(ForeignKey("teams.team_number"), primary_key=True)
@@ -150,6 +167,9 @@ class TeamStarted(Base):
 
 class PlayerAuthorized(Base):
   __tablename__ = "playerauthorized"
+  __table_args__ = (
+    Index("ix_playerauthorized_fantasy_team_id", "fantasy_team_id"),
+  )
   player_id: Mapped[str] = mapped_column(ForeignKey("players.user_id"),
                                         primary_key=True)
   fantasy_team_id: Mapped[int] = mapped_column(ForeignKey("fantasyteam.fantasy_team_id"), primary_key=True)
@@ -166,6 +186,9 @@ class WeekStatus(Base):
 
 class FantasyScores(Base):
   __tablename__ = "fantasyscores"
+  __table_args__ = (
+    Index("ix_fantasyscores_league_week", "league_id", "week"),
+  )
   league_id: Mapped[int] = mapped_column(ForeignKey("league.league_id"), primary_key=True)
   fantasy_team_id: Mapped[int] = mapped_column(ForeignKey("fantasyteam.fantasy_team_id"), primary_key=True)
   week: Mapped[int] = mapped_column(Integer(), primary_key=True)
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from urllib.parse import urlsplit
+import aiohttp
+from services.httpcache import HttpCache
+
+logger = logging.getLogger('discord')
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ApiResponse:
+    """Status, headers and body of a finished request."""
+
+    def __init__(self, url: str, status: int, headers: dict, body: bytes):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    @property
+    def not_modified(self) -> bool:
+        """The server confirmed the cached body is current; body holds the cached copy."""
+        return self.status == 304
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+
+class _HostLimiter:
+    """Spaces requests to one host at least 1/rate seconds apart."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._lock = asyncio.Lock()
+        self._next = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+                now = self._next
+            self._next = now + self.interval
+
+
+class ApiClient:
+    """
+    Shared aiohttp client for the external APIs the bot imports from.
+
+    Requests are bounded by one concurrency semaphore, rate limited per host, time out
+    after `timeout` seconds and are retried with exponential backoff on connection errors,
+    timeouts, 429 and 5xx responses. The aiohttp session is created on first use so the
+    client can be built before the event loop runs.
+
+    With an HttpCache, conditional requests send the stored ETag / Last-Modified and a 304
+    comes back with the cached body. Responses are only stored through remember(), so
+    callers can wait until the data has been applied to the database.
+    """
+
+    def __init__(self, max_concurrency: int = 8, rate_per_host: float = 10, host_rates: dict = None,
+                 timeout: float = 30, retries: int = 3, backoff: float = 1, cache: HttpCache = None):
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.rate_per_host = rate_per_host
+        self.host_rates = host_rates or {}
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self._session = None
+        self._semaphore = None
+        self._limiters = {}
+
+    def _client_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=self.timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    def _limiter(self, url: str) -> _HostLimiter:
+        host = urlsplit(url).hostname
+        if host not in self._limiters:
+            self._limiters[host] = _HostLimiter(self.host_rates.get(host, self.rate_per_host))
+        return self._limiters[host]
+
+    def _retry_delay(self, attempt: int, response: ApiResponse = None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * (2 ** attempt) + random.uniform(0, self.backoff)
+
+    async def get(self, url: str, headers: dict = None, conditional: bool = False) -> ApiResponse:
+        """
+        GET the url and return the final response. Non-retryable error statuses are returned
+        as is; exhausted retries re-raise the last connection error or return the last response.
+        """
+        cached = self.cache.lookup(url) if conditional and self.cache is not None else None
+        if cached is not None:
+            etag, last_modified, body = cached
+            headers = dict(headers or {})
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+            response = await self._get(url, headers)
+            if response.not_modified:
+                response.body = body
+            return response
+        return await self._get(url, headers)
+
+    def remember(self, response: ApiResponse):
+        """Store a successful response with its validators for later conditional requests."""
+        if self.cache is None or not response.ok:
+            return
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.cache.store(response.url, etag, last_modified, response.body)
+
+    def forget(self, url: str):
+        if self.cache is not None:
+            self.cache.forget(url)
+
+    async def _get(self, url: str, headers: dict = None) -> ApiResponse:
+        session = self._client_session()
+        limiter = self._limiter(url)
+        for attempt in range(self.retries + 1):
+            response = None
+            try:
+                async with self._semaphore:
+                    await limiter.wait()
+                    async with session.get(url, headers=headers) as resp:
+                        response = ApiResponse(url, resp.status, resp.headers.copy(), await resp.read())
+                if response.status not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+                logger.warning(f"GET {url} returned {response.status}, retrying")
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"GET {url} failed (attempt {attempt + 1}), retrying")
+            await asyncio.sleep(self._retry_delay(attempt, response))
+
+    async def get_json(self, url: str, headers: dict = None):
+        return (await self.get(url, headers=headers)).json()
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        if self.cache is not None:
+            self.cache.close()
@@ -0,0 +1,29 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def bulk_upsert(session: Session, model, rows: list, index_elements: list, update_columns: list, batch_size: int = 500):
+    """
+    Insert rows (dicts of column values) into model's table, updating update_columns of rows
+    whose index_elements already exist. Postgres and SQLite use INSERT ... ON CONFLICT in
+    batches of batch_size; other databases fall back to one merge per row. The caller commits.
+    """
+    if not rows:
+        return
+    dialect = session.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        for start in range(0, len(rows), batch_size):
+            stmt = insert(model).values(rows[start:start + batch_size])
+            if update_columns:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=index_elements,
+                    set_={column: stmt.excluded[column] for column in update_columns}
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+            session.execute(stmt)
+    else:
+        for row in rows:
+            session.merge(model(**row))
+    session.flush()
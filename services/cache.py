@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from models.cache import CacheVersion
+
+# Data shared by every league (teams, events, team scores, statbotics, week status)
+GLOBAL_SCOPE = "global"
+
+
+def league_scope(league_id) -> str:
+    return f"league:{league_id}"
+
+
+def draft_scope(draft_id) -> str:
+    return f"draft:{draft_id}"
+
+
+def bump_cache_versions(session: Session, *scopes):
+    """
+    Increment the version counter of every given scope so cached responses built
+    from the old versions are no longer served. The caller commits the session.
+    """
+    scopes = set(scopes)
+    if not scopes:
+        return
+    dialect = session.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(CacheVersion).values([{"scope": scope, "version": 1} for scope in scopes])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CacheVersion.scope],
+            set_={"version": CacheVersion.version + 1}
+        )
+        session.execute(stmt)
+    else:
+        existing = {row.scope: row for row in session.query(CacheVersion).filter(CacheVersion.scope.in_(scopes)).with_for_update()}
+        for scope in scopes:
+            if scope in existing:
+                existing[scope].version += 1
+            else:
+                session.add(CacheVersion(scope=scope, version=1))
+    session.flush()
+
+
+def get_cache_versions(session: Session, scopes) -> tuple:
+    """Current version of each scope, in the order given. Unknown scopes are version 0."""
+    versions = dict(session.query(CacheVersion.scope, CacheVersion.version).filter(CacheVersion.scope.in_(scopes)).all())
+    return tuple(versions.get(scope, 0) for scope in scopes)
+
+
+class ResponseCache:
+    """
+    Thread-safe in-process cache with a time-to-live and least-recently-used eviction.
+
+    Keys should include the scope versions the value was built from, so a bumped
+    version makes the old entry unreachable and the TTL only bounds memory use.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
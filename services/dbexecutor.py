@@ -0,0 +1,37 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.orm import sessionmaker
+
+
+class DbExecutor:
+    """
+    Runs blocking database work on its own threads so the event loop keeps serving other
+    commands meanwhile. Size the threads to the connection pool, one per pooled connection.
+    """
+
+    def __init__(self, session_factory: sessionmaker, max_workers: int):
+        self.session_factory = session_factory
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+
+    async def run_in_session(self, fn, *args, commit: bool = False, **kwargs):
+        """
+        Call fn(session, *args, **kwargs) on a database thread with a session of its own and return
+        its result. The session is committed if commit is set, rolled back if fn raises and always
+        closed, so anything returned must already be loaded (returned ORM objects are detached).
+        """
+        def work():
+            session = self.session_factory()
+            try:
+                result = fn(session, *args, **kwargs)
+                if commit:
+                    session.commit()
+                return result
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+        return await asyncio.get_running_loop().run_in_executor(self.executor, work)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,97 @@
+import threading
+from math import ceil
+from services.draftstate import DraftState, OPEN_PICK
+
+ROUNDS_PER_PAGE = 4
+
+
+def page_count(rounds: int, rounds_per_page: int = ROUNDS_PER_PAGE) -> int:
+    return ceil(rounds / rounds_per_page)
+
+
+def page_of_pick(state: DraftState, pick_number: int, rounds_per_page: int = ROUNDS_PER_PAGE) -> int:
+    """Board page showing the given pick, page 0 when the draft is complete."""
+    if pick_number == -1:
+        return 0
+    return (pick_number - 1) // (rounds_per_page * max(len(state.order), 1))
+
+
+class _Board:
+    def __init__(self, state: DraftState, names: tuple, rounds: int):
+        self.state = state
+        self.names = names
+        self.rounds = rounds
+        self.cursor = state.current_pick_number
+        # page -> rendered embed description
+        self.pages = {}
+
+
+class DraftBoardRenderer:
+    """
+    Renders draft board pages from a DraftState, caching each page's text per draft and pick
+    cursor. When the cursor moves, only the pages holding the picks made since the last
+    render (and the new pick on the clock) are rendered again.
+    """
+
+    def __init__(self, rounds_per_page: int = ROUNDS_PER_PAGE):
+        self.rounds_per_page = rounds_per_page
+        self._boards = {}
+        self._lock = threading.Lock()
+
+    def page(self, state: DraftState, names: dict, rounds: int, page: int) -> str:
+        """Embed description for one board page. names maps fantasy_team_id to team name."""
+        names_key = tuple(names.get(fantasy_team_id) for fantasy_team_id in state.order)
+        with self._lock:
+            board = self._boards.get(state.draft_id)
+            if board is None or board.state is not state or board.names != names_key or board.rounds != rounds:
+                board = _Board(state, names_key, rounds)
+                self._boards[state.draft_id] = board
+            elif board.cursor != state.current_pick_number:
+                self._drop_changed_pages(board)
+            text = board.pages.get(page)
+            if text is None:
+                text = self._render(state, names, rounds, page)
+                board.pages[page] = text
+            return text
+
+    def discard(self, draft_id: int):
+        with self._lock:
+            self._boards.pop(draft_id, None)
+
+    def _drop_changed_pages(self, board: _Board):
+        # The cursor only moves forward within one DraftState, so every pick between the old
+        # and the new cursor lives on a page in that range
+        first = page_of_pick(board.state, board.cursor, self.rounds_per_page)
+        cursor = board.state.current_pick_number
+        last = page_count(board.rounds, self.rounds_per_page) - 1 if cursor == -1 else page_of_pick(board.state, cursor, self.rounds_per_page)
+        for page in range(first, last + 1):
+            board.pages.pop(page, None)
+        board.cursor = cursor
+
+    def _render(self, state: DraftState, names: dict, rounds: int, page: int) -> str:
+        teams = len(state.order)
+        first_pick = page * self.rounds_per_page * teams
+        last_pick = (page + 1) * self.rounds_per_page * teams
+        current_pick = state.current_pick_number
+        header = f"{'Team':^15s}{'':3s}"
+        for round_num in range(1 + page * self.rounds_per_page, min((page + 1) * self.rounds_per_page, rounds) + 1):
+            header += f"{'Pick ' + str(round_num):>7s}{'':2s}"
+        lines = [header]
+        for fantasy_team_id in state.order:
+            abbrev_name = (names.get(fantasy_team_id) or "")[:15]  # Limit team name to 15 characters
+            line = f"{abbrev_name:<15s}{'':3s}"
+            for pick_number in state.picks_by_team.get(fantasy_team_id, []):
+                if pick_number <= first_pick or pick_number > last_pick:
+                    continue
+                selection = state.selections[pick_number]
+                cell = "---"
+                if selection == OPEN_PICK and pick_number == current_pick:
+                    cell = "!PICK!"
+                elif selection != OPEN_PICK:
+                    cell = selection
+                line += f"{cell:>7s}{'':2s}"
+            lines.append(line)
+        return "```" + "\n".join(lines) + "\n```"
+
+
+draft_board_renderer = DraftBoardRenderer()
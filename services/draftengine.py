@@ -0,0 +1,97 @@
+from sqlalchemy.orm import Session
+from models.draft import Draft, DraftPick, DraftPoolTeam, StatboticsData
+from models.scores import League, Team, TeamScore, FRCEvent
+from services.cache import ResponseCache, GLOBAL_SCOPE, get_cache_versions
+
+
+def epa_year(league: League) -> int:
+    """Statbotics season teams are ranked by: the current one for offseason leagues, otherwise the previous one."""
+    return league.year if league.offseason else league.year - 1
+
+
+def team_number_key(team_number: str):
+    """Sort key ordering team numbers numerically, with non-numeric numbers last."""
+    return (0, int(team_number), "") if team_number.isdigit() else (1, 0, team_number)
+
+
+class DraftPoolEngine:
+    """
+    Single source of truth for which teams a draft can still pick.
+
+    Eligibility sets are cached per (draft, year, is_fim, event_key) together with the
+    global cache version, which every command that changes event registrations bumps,
+    so the bot and the API both drop stale sets without talking to each other.
+    """
+
+    def __init__(self, maxsize: int = 64, ttl: float = 3600):
+        self._eligible = ResponseCache(maxsize=maxsize, ttl=ttl)
+
+    def eligible_teams(self, session: Session, draft: Draft, league: League) -> frozenset:
+        """Every team that may be drafted in the given draft, picked or not."""
+        version = get_cache_versions(session, [GLOBAL_SCOPE])
+        key = (draft.draft_id, league.year, league.is_fim, draft.event_key, version)
+        eligible = self._eligible.get(key)
+        if eligible is None:
+            if league.is_fim:
+                query = session.query(Team.team_number).distinct() \
+                    .join(TeamScore, Team.team_number == TeamScore.team_key) \
+                    .join(FRCEvent, TeamScore.event_key == FRCEvent.event_key) \
+                    .filter(Team.is_fim == True, FRCEvent.year == league.year)
+            else:
+                query = session.query(TeamScore.team_key).distinct() \
+                    .filter(TeamScore.event_key == draft.event_key)
+            eligible = frozenset(row[0] for row in query.all())
+            self._eligible.set(key, eligible)
+        return eligible
+
+    def invalidate(self):
+        """Forget every cached eligibility set, for callers that changed registrations in an uncommitted session."""
+        self._eligible.clear()
+
+    def is_eligible(self, session: Session, draft: Draft, league: League, team_number: str) -> bool:
+        return team_number in self.eligible_teams(session, draft, league)
+
+    def picked_teams(self, session: Session, draft_id: int) -> set:
+        return {
+            row.team_number for row in session.query(DraftPick.team_number)
+            .filter(DraftPick.draft_id == draft_id, DraftPick.team_number != "-1")
+        }
+
+    def compute_pool(self, session: Session, draft: Draft, league: League) -> list:
+        """
+        Eligible, unpicked teams of a draft as (team_number, year_end_epa) tuples, highest EPA
+        first, teams without EPA last and ties broken by team number.
+        """
+        remaining = self.eligible_teams(session, draft, league) - self.picked_teams(session, draft.draft_id)
+        epas = dict(
+            session.query(StatboticsData.team_number, StatboticsData.year_end_epa)
+            .filter(StatboticsData.year == epa_year(league), StatboticsData.team_number.in_(remaining))
+            .all()
+        ) if remaining else {}
+        pool = [(team_number, epas.get(team_number)) for team_number in remaining]
+        pool.sort(key=lambda row: (not row[1], -(row[1] or 0), row[0]))
+        return pool
+
+    def available_pool(self, session: Session, draft: Draft, league: League) -> list:
+        """
+        Available pool of a draft in EPA order. Reads the pool materialized at draft start and
+        falls back to computing it when the draft has none yet (not started, or started before
+        pools existed).
+        """
+        pool = session.query(DraftPoolTeam.team_number, DraftPoolTeam.year_end_epa) \
+            .filter(DraftPoolTeam.draft_id == draft.draft_id) \
+            .order_by(DraftPoolTeam.pool_rank.asc()).all()
+        if pool:
+            return [tuple(row) for row in pool]
+        return self.compute_pool(session, draft, league)
+
+    def suggested_teams(self, session: Session, draft: Draft, league: League) -> list:
+        """Available teams that have an EPA, best first."""
+        return [row for row in self.available_pool(session, draft, league) if row[1] is not None]
+
+    def available_teams_by_number(self, session: Session, draft: Draft, league: League) -> list:
+        """Available team numbers in numeric order."""
+        return sorted((row[0] for row in self.available_pool(session, draft, league)), key=team_number_key)
+
+
+draft_pool_engine = DraftPoolEngine()
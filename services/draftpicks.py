@@ -0,0 +1,98 @@
+from sqlalchemy.orm import Session
+from models.draft import Draft, DraftPick
+from models.scores import PlayerAuthorized
+from services.cache import draft_scope, bump_cache_versions
+from services.draftengine import draft_pool_engine
+from services.draftpool import remove_from_available_pool
+from services.draftstate import draft_states, OPEN_PICK
+
+PICK_MADE = "picked"
+NO_DRAFT = "no_draft"
+DRAFT_COMPLETE = "complete"
+NOT_YOUR_TURN = "not_your_turn"
+ALREADY_PICKED = "already_picked"
+NOT_ELIGIBLE = "not_eligible"
+
+
+class PickResult:
+    """Outcome of a pick attempt and the state of the draft once it was applied."""
+
+    def __init__(self, status: str, draft_id: int = None, team_number: str = None, pick_number: int = None,
+                 next_pick_number: int = None, next_fantasy_team_id: int = None):
+        self.status = status
+        self.draft_id = draft_id
+        self.team_number = team_number
+        self.pick_number = pick_number
+        self.next_pick_number = next_pick_number
+        self.next_fantasy_team_id = next_fantasy_team_id
+
+    @property
+    def draft_complete(self) -> bool:
+        return self.draft_id is not None and self.next_pick_number is None
+
+
+def lock_current_pick(session: Session, draft_id: int):
+    """
+    Lock the DraftPick row on the clock according to the in-memory draft state, reloading
+    the state when the database disagrees with it. Returns (state, pick), pick being None
+    once the draft is complete.
+    """
+    state = draft_states.get(session, draft_id)
+    for _ in range(2):
+        if state.complete:
+            return state, None
+        pick = session.query(DraftPick).filter(
+            DraftPick.draft_id == draft_id,
+            DraftPick.pick_number == state.current_pick_number
+        ).with_for_update().first()
+        if pick is not None and pick.team_number == OPEN_PICK:
+            return state, pick
+        # Picks were changed outside the pick pipeline; rebuild the state from the database
+        state = draft_states.load(session, draft_id)
+    raise RuntimeError(f"Draft {draft_id} state does not match its draft picks")
+
+
+def make_draft_pick(session: Session, channel_id: str, player_id: str, team_number: str, force: bool = False) -> PickResult:
+    """
+    Validate and record the next pick of the draft running in the given channel.
+
+    The turn and duplicate checks use the in-memory draft state. The draft row and the pick
+    on the clock are locked for the rest of the transaction, so concurrent picks in the same
+    draft are applied one after another against the latest state. Writes are flushed but not
+    committed: the caller commits, then calls draft_states.record_pick for a PICK_MADE result.
+    """
+    draft = session.query(Draft).filter(Draft.discord_channel == channel_id).with_for_update().first()
+    if draft is None:
+        return PickResult(NO_DRAFT)
+    league = draft.league
+
+    state, current_pick = lock_current_pick(session, draft.draft_id)
+    if current_pick is None:
+        return PickResult(DRAFT_COMPLETE, draft.draft_id, team_number)
+
+    def unchanged(status):
+        return PickResult(status, draft.draft_id, team_number, None, current_pick.pick_number, current_pick.fantasy_team_id)
+
+    if not force:
+        authorized = session.query(PlayerAuthorized.player_id).filter(
+            PlayerAuthorized.player_id == player_id,
+            PlayerAuthorized.fantasy_team_id == current_pick.fantasy_team_id
+        ).first()
+        if authorized is None:
+            return unchanged(NOT_YOUR_TURN)
+
+    if state.is_picked(team_number):
+        return unchanged(ALREADY_PICKED)
+
+    if not draft_pool_engine.is_eligible(session, draft, league, team_number):
+        return unchanged(NOT_ELIGIBLE)
+
+    current_pick.team_number = team_number
+    remove_from_available_pool(session, draft.draft_id, team_number)
+    bump_cache_versions(session, draft_scope(draft.draft_id))
+    session.flush()
+
+    next_pick_number = state.next_open_pick(after=current_pick.pick_number)
+    if next_pick_number is None:
+        return PickResult(PICK_MADE, draft.draft_id, team_number, current_pick.pick_number)
+    return PickResult(PICK_MADE, draft.draft_id, team_number, current_pick.pick_number, next_pick_number, state.owners[next_pick_number])
@@ -0,0 +1,38 @@
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from models.draft import Draft, DraftPoolTeam
+from models.scores import League
+from services.draftengine import draft_pool_engine
+
+
+def build_available_pool(session: Session, draft: Draft, league: League):
+    """
+    Materialize the available pool of a draft into DraftPoolTeam, replacing any previous
+    pool. The caller commits the session.
+    """
+    clear_available_pool(session, draft.draft_id)
+    pool = draft_pool_engine.compute_pool(session, draft, league)
+    if pool:
+        session.execute(insert(DraftPoolTeam), [
+            {"draft_id": draft.draft_id, "team_number": team_number, "pool_rank": rank, "year_end_epa": epa}
+            for rank, (team_number, epa) in enumerate(pool, start=1)
+        ])
+    session.flush()
+
+
+def refresh_available_pool(session: Session, draft: Draft, league: League):
+    """Rebuild the pool of a draft only if one has been materialized already."""
+    if session.query(DraftPoolTeam.team_number).filter(DraftPoolTeam.draft_id == draft.draft_id).first() is not None:
+        draft_pool_engine.invalidate()
+        build_available_pool(session, draft, league)
+
+
+def clear_available_pool(session: Session, draft_id: int):
+    session.query(DraftPoolTeam).filter(DraftPoolTeam.draft_id == draft_id).delete(synchronize_session=False)
+
+
+def remove_from_available_pool(session: Session, draft_id: int, team_number: str):
+    session.query(DraftPoolTeam).filter(
+        DraftPoolTeam.draft_id == draft_id,
+        DraftPoolTeam.team_number == team_number
+    ).delete(synchronize_session=False)
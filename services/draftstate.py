@@ -0,0 +1,113 @@
+import threading
+from sqlalchemy.orm import Session
+from models.draft import DraftPick, DraftOrder
+
+OPEN_PICK = "-1"
+
+
+class DraftState:
+    """
+    In-memory view of a live draft: who owns every pick, what has been picked and
+    which pick is on the clock.
+    """
+
+    def __init__(self, draft_id: int, order: list, picks: list):
+        self.draft_id = draft_id
+        # fantasy_team_id of every draft slot, in slot order
+        self.order = order
+        # pick_number -> fantasy_team_id and pick_number -> team_number ("-1" while open)
+        self.owners = {}
+        self.selections = {}
+        for pick_number, fantasy_team_id, team_number in picks:
+            self.owners[pick_number] = fantasy_team_id
+            self.selections[pick_number] = team_number
+        # fantasy_team_id -> its pick_numbers in order
+        self.picks_by_team = {}
+        for pick_number in sorted(self.owners):
+            self.picks_by_team.setdefault(self.owners[pick_number], []).append(pick_number)
+        self.picked = {team_number for team_number in self.selections.values() if team_number != OPEN_PICK}
+        self._pick_numbers = sorted(self.owners)
+        self._cursor = 0
+        self._advance()
+
+    @classmethod
+    def load(cls, session: Session, draft_id: int) -> "DraftState":
+        order = [
+            row.fantasy_team_id for row in session.query(DraftOrder.fantasy_team_id)
+            .filter(DraftOrder.draft_id == draft_id)
+            .order_by(DraftOrder.draft_slot.asc())
+        ]
+        picks = session.query(DraftPick.pick_number, DraftPick.fantasy_team_id, DraftPick.team_number) \
+            .filter(DraftPick.draft_id == draft_id).all()
+        return cls(draft_id, order, picks)
+
+    def _advance(self):
+        while self._cursor < len(self._pick_numbers) and self.selections[self._pick_numbers[self._cursor]] != OPEN_PICK:
+            self._cursor += 1
+
+    @property
+    def complete(self) -> bool:
+        return self._cursor >= len(self._pick_numbers)
+
+    @property
+    def current_pick_number(self) -> int:
+        """Pick on the clock, or -1 once every pick is made (or the draft has no picks)."""
+        return -1 if self.complete else self._pick_numbers[self._cursor]
+
+    @property
+    def current_fantasy_team_id(self) -> int:
+        return -1 if self.complete else self.owners[self.current_pick_number]
+
+    def next_open_pick(self, after: int):
+        """First open pick_number after the given one, or None if there is none."""
+        for pick_number in self._pick_numbers[self._cursor:]:
+            if pick_number > after and self.selections[pick_number] == OPEN_PICK:
+                return pick_number
+        return None
+
+    def is_picked(self, team_number: str) -> bool:
+        return team_number in self.picked
+
+    def record_pick(self, pick_number: int, team_number: str):
+        self.selections[pick_number] = team_number
+        self.picked.add(team_number)
+        self._advance()
+
+
+class DraftStateRegistry:
+    """
+    Process-wide DraftState per draft. States are loaded on first use, so they are rebuilt
+    lazily after a restart; commands that rewrite picks outside the pick pipeline discard
+    the draft's state so the next use reloads it.
+    """
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def get(self, session: Session, draft_id: int) -> DraftState:
+        with self._lock:
+            state = self._states.get(draft_id)
+        if state is None:
+            state = self.load(session, draft_id)
+        return state
+
+    def load(self, session: Session, draft_id: int) -> DraftState:
+        state = DraftState.load(session, draft_id)
+        with self._lock:
+            self._states[draft_id] = state
+        return state
+
+    def record_pick(self, draft_id: int, pick_number: int, team_number: str):
+        """Write a committed pick through to the cached state, if the draft has one."""
+        with self._lock:
+            state = self._states.get(draft_id)
+            if state is not None:
+                state.record_pick(pick_number, team_number)
+
+    def discard(self, draft_id: int):
+        with self._lock:
+            self._states.pop(draft_id, None)
+
+
+draft_states = DraftStateRegistry()
@@ -0,0 +1,41 @@
+import sqlite3
+import threading
+import time
+
+
+class HttpCache:
+    """
+    On-disk cache of GET responses keyed by URL, holding the body together with the
+    ETag / Last-Modified validators needed to revalidate it with a conditional request.
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body BLOB, stored_at REAL)"
+            )
+
+    def lookup(self, url: str):
+        """(etag, last_modified, body) stored for the url, or None."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT etag, last_modified, body FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+
+    def store(self, url: str, etag: str, last_modified: str, body: bytes):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (url, etag, last_modified, body, stored_at) VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, body, time.time())
+            )
+
+    def forget(self, url: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
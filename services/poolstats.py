@@ -0,0 +1,71 @@
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+    """Counters for connection checkouts: how many, how long they waited and how many timed out."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.peak_checked_out = 0
+
+    def record(self, wait: float, checked_out: int, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    @property
+    def average_wait(self) -> float:
+        return self.total_wait / self.checkouts if self.checkouts else 0.0
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that times every checkout, including waiting for a free connection and opening
+    a new one, in a PoolStats shared with the pools it is recreated as.
+    """
+
+    def __init__(self, *args, stats: PoolStats = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = stats or PoolStats()
+
+    def _do_get(self):
+        start = time.monotonic()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record(time.monotonic() - start, self.checkedout(), timed_out=True)
+            raise
+        self.stats.record(time.monotonic() - start, self.checkedout())
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def usage(self) -> dict:
+        """Current pool occupancy together with the recorded checkout statistics."""
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "peak_checked_out": self.stats.peak_checked_out,
+            "checkouts": self.stats.checkouts,
+            "timeouts": self.stats.timeouts,
+            "average_wait": self.stats.average_wait,
+            "max_wait": self.stats.max_wait,
+        }
@@ -0,0 +1,39 @@
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+from models.scores import FantasyTeam, FantasyScores
+
+
+def rank_fantasy_teams(session: Session, league_id: int, *score_filters):
+    """
+    Rank every fantasy team in a league in a single aggregate query.
+
+    Teams are ordered by cumulative rank points with cumulative weekly score as the
+    tiebreaker. Only FantasyScores rows matching score_filters are counted, and teams
+    without any matching scores are still returned with zero totals.
+
+    Returns rows with fantasy_team_id, fantasy_team_name, total_ranking_points,
+    tiebreaker and standing (1 for first place, ties share a standing).
+    """
+    total_ranking_points = func.coalesce(func.sum(FantasyScores.rank_points), 0)
+    tiebreaker = func.coalesce(func.sum(FantasyScores.weekly_score), 0)
+    standing = func.rank().over(
+        order_by=(total_ranking_points.desc(), tiebreaker.desc())
+    ).label("standing")
+
+    return session.query(
+        FantasyTeam.fantasy_team_id,
+        FantasyTeam.fantasy_team_name,
+        total_ranking_points.label("total_ranking_points"),
+        tiebreaker.label("tiebreaker"),
+        standing
+    ).outerjoin(
+        FantasyScores, and_(FantasyScores.fantasy_team_id == FantasyTeam.fantasy_team_id, *score_filters)
+    ).filter(
+        FantasyTeam.league_id == league_id
+    ).group_by(
+        FantasyTeam.fantasy_team_id,
+        FantasyTeam.fantasy_team_name
+    ).order_by(
+        standing,
+        FantasyTeam.fantasy_team_id.asc()
+    )
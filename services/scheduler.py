@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import random
+import time
+import traceback
+from datetime import datetime, timedelta
+from models.jobs import JobRun
+
+logger = logging.getLogger('discord')
+
+# Longest single sleep, so a suspended host or a clock change is noticed within a minute
+MAX_SLEEP = 60
+
+
+class CronSpec:
+    """
+    Five-field cron expression: minute hour day-of-month month day-of-week, in local time.
+    Fields accept *, numbers, ranges (a-b), steps (*/n, a-b/n) and comma separated lists.
+    Day-of-week counts from Sunday (0, 7 also means Sunday). As in cron, when both day
+    fields are restricted a day matching either of them is due.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' needs 5 fields")
+        self.expression = expression
+        self.minutes = self._parse(fields[0], 0, 59)
+        self.hours = self._parse(fields[1], 0, 23)
+        self.days = self._parse(fields[2], 1, 31)
+        self.months = self._parse(fields[3], 1, 12)
+        self.weekdays = {day % 7 for day in self._parse(fields[4], 0, 7)}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> set:
+        values = set()
+        for part in field.split(","):
+            span, _, step = part.partition("/")
+            step = int(step) if step else 1
+            if span == "*":
+                start, end = low, high
+            elif "-" in span:
+                start, end = (int(value) for value in span.split("-", 1))
+            else:
+                start = int(span)
+                end = high if "/" in part else start
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Cron field '{field}' is outside {low}-{high}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        in_days = moment.day in self.days
+        in_weekdays = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return in_weekdays
+        if self._any_weekday:
+            return in_days
+        return in_days or in_weekdays
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First minute strictly after moment that matches the expression."""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+
+class Job:
+    """A scheduled coroutine and its run metrics for this process."""
+
+    def __init__(self, name: str, spec: CronSpec, func, jitter: float):
+        self.name = name
+        self.spec = spec
+        self.func = func
+        self.jitter = jitter
+        self.next_run = None
+        self.lock = asyncio.Lock()
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_duration = None
+        self.total_duration = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self.lock.locked()
+
+    @property
+    def average_duration(self):
+        return self.total_duration / self.runs if self.runs else None
+
+
+class Scheduler:
+    """
+    Runs coroutine jobs on cron schedules inside the bot's event loop.
+
+    Every job's last start is kept in the jobrun table, so a run that fell due while the bot
+    was down is made once at startup. Each run starts up to `jitter` seconds after its due
+    time, and a job that is still running when it is due again skips that run. Run counts
+    and durations are logged after every run and stored on the job's JobRun row.
+    """
+
+    def __init__(self, run_in_session, jitter: float = 0):
+        # Coroutine function running fn(session, ...) off the event loop, as bot.runInSession does
+        self.run_in_session = run_in_session
+        self.jitter = jitter
+        self.jobs = {}
+        self._tasks = []
+        # Runs in flight, referenced so they are not garbage collected mid-run
+        self._running = set()
+
+    def add_job(self, name: str, expression: str, func, jitter: float = None):
+        """Schedule func, a coroutine function taking no arguments, under a unique name."""
+        if name in self.jobs:
+            raise ValueError(f"Job {name} is already scheduled")
+        self.jobs[name] = Job(name, CronSpec(expression), func, self.jitter if jitter is None else jitter)
+
+    @property
+    def started(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        if self.started:
+            return
+        last_started = await self.run_in_session(self._last_started)
+        now = datetime.now()
+        for job in self.jobs.values():
+            # A missed run comes out in the past and runs straight away
+            job.next_run = job.spec.next_after(last_started.get(job.name) or now)
+            logger.info(f"Scheduled job {job.name} ({job.spec.expression}), next run {job.next_run}")
+            self._tasks.append(asyncio.create_task(self._loop(job)))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _loop(self, job: Job):
+        while True:
+            due = job.next_run + timedelta(seconds=random.uniform(0, job.jitter))
+            while (remaining := (due - datetime.now()).total_seconds()) > 0:
+                await asyncio.sleep(min(remaining, MAX_SLEEP))
+            job.next_run = job.spec.next_after(max(job.next_run, datetime.now()))
+            run = asyncio.create_task(self._run(job))
+            self._running.add(run)
+            run.add_done_callback(self._running.discard)
+
+    async def _run(self, job: Job):
+        if job.running:
+            job.skipped += 1
+            logger.warning(f"Job {job.name} is still running, skipping this run")
+            return
+        async with job.lock:
+            started = datetime.now()
+            await self._record(job.name, started=started)
+            timer = time.monotonic()
+            status = "ok"
+            try:
+                await job.func()
+            except Exception:
+                status = "failed"
+                job.failures += 1
+                logger.error(f"Job {job.name} failed\n{traceback.format_exc()}")
+            duration = time.monotonic() - timer
+            job.runs += 1
+            job.last_duration = duration
+            job.total_duration += duration
+            await self._record(job.name, finished=datetime.now(), duration=duration, status=status)
+            logger.info(f"Job {job.name} {status} in {duration:.1f}s "
+                        f"({job.runs} runs, {job.failures} failed, {job.skipped} skipped, avg {job.average_duration:.1f}s)")
+
+    def _last_started(self, session) -> dict:
+        return dict(session.query(JobRun.job_name, JobRun.last_started)
+                    .filter(JobRun.job_name.in_(list(self.jobs))).all())
+
+    async def _record(self, name: str, started: datetime = None, finished: datetime = None,
+                      duration: float = None, status: str = None):
+        try:
+            await self.run_in_session(self._store_run, name, started, finished, duration, status, commit=True)
+        except Exception:
+            logger.error(traceback.format_exc())
+
+    @staticmethod
+    def _store_run(session, name: str, started: datetime, finished: datetime, duration: float, status: str):
+        job_run = session.get(JobRun, name)
+        if job_run is None:
+            job_run = JobRun(job_name=name, run_count=0, failure_count=0)
+            session.add(job_run)
+        if started is not None:
+            job_run.last_started = started
+        if finished is not None:
+            job_run.last_finished = finished
+            job_run.last_duration = duration
+            job_run.last_status = status
+            job_run.run_count += 1
+            if status != "ok":
+                job_run.failure_count += 1
@@ -0,0 +1,135 @@
+from collections import defaultdict
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from models.scores import League, FantasyTeam, FRCEvent, TeamScore, TeamStarted, FantasyScores
+from models.draft import Draft, DraftPick
+from services.bulk import bulk_upsert
+
+# Drafts held in these weeks (states and champs) score every event of the year, not just their own
+SEASON_TOTAL_WEEKS = (6, 7, 8, 9)
+
+
+def rank_points(weekly_scores: dict, team_count: int, locked: list = ()) -> dict:
+    """
+    Rank points per fantasy team for one league's week, from weekly_scores keyed by team id.
+    Teams in locked take the top places in order with team_count, team_count - 1, ... points.
+    The rest are ranked by weekly score below them, place p earning team_count - p, and tied
+    teams share the higher value.
+    """
+    points = {team_id: team_count - i for i, team_id in enumerate(locked)}
+    ranked = sorted((team_id for team_id in weekly_scores if team_id not in points),
+                    key=lambda team_id: weekly_scores[team_id], reverse=True)
+    for i, team_id in enumerate(ranked):
+        if i > 0 and weekly_scores[team_id] == weekly_scores[ranked[i - 1]]:
+            points[team_id] = points[ranked[i - 1]]
+        else:
+            points[team_id] = team_count - (i + len(locked) + 1)
+    return points
+
+
+def season_points(session: Session, year: int, team_numbers) -> dict:
+    """
+    Points each of team_numbers scored across every event of the year, keyed by team number.
+    States weeks and drafts held at states or later count a team's points this way.
+    """
+    points = defaultdict(int)
+    for score in session.query(TeamScore).join(FRCEvent, TeamScore.event_key == FRCEvent.event_key)\
+            .filter(FRCEvent.year == year, TeamScore.team_key.in_(set(team_numbers))):
+        points[score.team_key] += score.score_team()
+    return points
+
+
+def score_week(session: Session, year: int, week: int, states: bool = False) -> list:
+    """
+    Score and rank every FiM league of the year for the week, writing all their FantasyScores
+    rows in one bulk upsert. The caller commits.
+
+    A fantasy team scores the points its started teams earned at the events they were started
+    at. At states every event of the year counts, and the three teams with the most rank points
+    from earlier weeks are locked into the top three places. Returns the scored league ids.
+    """
+    teams_by_league = {}
+    for league_id, fantasy_team_id in session.query(League.league_id, FantasyTeam.fantasy_team_id)\
+            .outerjoin(FantasyTeam, FantasyTeam.league_id == League.league_id)\
+            .filter(League.is_fim == True, League.year == year)\
+            .order_by(League.league_id, FantasyTeam.fantasy_team_id):
+        # Leagues without teams are still reported as scored
+        team_ids = teams_by_league.setdefault(league_id, [])
+        if fantasy_team_id is not None:
+            team_ids.append(fantasy_team_id)
+
+    starts = session.query(TeamStarted.fantasy_team_id, TeamStarted.team_number, TeamStarted.event_key)\
+        .join(League, TeamStarted.league_id == League.league_id)\
+        .filter(League.is_fim == True, League.year == year, TeamStarted.week == week).all()
+
+    weekly_scores = defaultdict(int)
+    if states:
+        team_points = season_points(session, year, {team_number for _, team_number, _ in starts})
+        for fantasy_team_id, team_number, _ in starts:
+            weekly_scores[fantasy_team_id] += team_points[team_number]
+    else:
+        event_points = {(score.team_key, score.event_key): score.score_team()
+                        for score in session.query(TeamScore).join(FRCEvent, TeamScore.event_key == FRCEvent.event_key)
+                        .filter(FRCEvent.year == year, FRCEvent.week == week)}
+        for fantasy_team_id, team_number, event_key in starts:
+            weekly_scores[fantasy_team_id] += event_points.get((team_number, event_key), 0)
+
+    earlier_points = {}
+    if states:
+        earlier_points = dict(session.query(FantasyScores.fantasy_team_id, func.sum(FantasyScores.rank_points))
+                              .filter(FantasyScores.league_id.in_(list(teams_by_league)), FantasyScores.week < week)
+                              .group_by(FantasyScores.fantasy_team_id).all())
+
+    rows = []
+    for league_id, team_ids in teams_by_league.items():
+        scores = {team_id: weekly_scores[team_id] for team_id in team_ids}
+        locked = sorted(team_ids, key=lambda team_id: earlier_points.get(team_id) or 0, reverse=True)[:3] if states else []
+        for team_id, points in rank_points(scores, len(team_ids), locked).items():
+            rows.append({"league_id": league_id, "fantasy_team_id": team_id, "week": week, "event_key": f"fim{year}",
+                         "rank_points": points, "weekly_score": scores[team_id]})
+    bulk_upsert(session, FantasyScores, rows,
+                index_elements=[FantasyScores.league_id, FantasyScores.fantasy_team_id, FantasyScores.week, FantasyScores.event_key],
+                update_columns=["rank_points", "weekly_score"])
+    return list(teams_by_league)
+
+
+def score_draft(session: Session, draft_id: int) -> tuple:
+    """
+    Score and rank the fantasy teams of a single draft's league from the teams they picked,
+    writing their FantasyScores rows for the draft's event in one bulk upsert. The caller commits.
+
+    A picked team scores its points at the draft's event, or at every event of the league's year
+    for drafts held at states or later. Returns (league id, event key), and raises LookupError for
+    an unknown draft or a draft whose event is not imported.
+    """
+    draft = session.query(Draft).filter(Draft.draft_id == draft_id).first()
+    if draft is None:
+        raise LookupError(f"No draft with id {draft_id}")
+    event = session.query(FRCEvent).filter(FRCEvent.event_key == draft.event_key).first()
+    if event is None:
+        raise LookupError(f"No event {draft.event_key} for draft {draft_id}")
+    league = session.query(League).filter(League.league_id == draft.league_id).one()
+    team_ids = [team_id for team_id, in session.query(FantasyTeam.fantasy_team_id)
+                .filter(FantasyTeam.league_id == league.league_id).order_by(FantasyTeam.fantasy_team_id)]
+    picks = session.query(DraftPick.fantasy_team_id, DraftPick.team_number)\
+        .filter(DraftPick.draft_id == draft_id).all()
+
+    picked_teams = {team_number for _, team_number in picks}
+    if event.week in SEASON_TOTAL_WEEKS:
+        team_points = season_points(session, league.year, picked_teams)
+    else:
+        team_points = defaultdict(int)
+        for score in session.query(TeamScore)\
+                .filter(TeamScore.event_key == event.event_key, TeamScore.team_key.in_(picked_teams)):
+            team_points[score.team_key] += score.score_team()
+
+    weekly_scores = {team_id: 0 for team_id in team_ids}
+    for fantasy_team_id, team_number in picks:
+        weekly_scores[fantasy_team_id] += team_points[team_number]
+    rows = [{"league_id": league.league_id, "fantasy_team_id": team_id, "week": event.week, "event_key": event.event_key,
+             "rank_points": points, "weekly_score": weekly_scores[team_id]}
+            for team_id, points in rank_points(weekly_scores, len(team_ids)).items()]
+    bulk_upsert(session, FantasyScores, rows,
+                index_elements=[FantasyScores.league_id, FantasyScores.fantasy_team_id, FantasyScores.week, FantasyScores.event_key],
+                update_columns=["rank_points", "weekly_score"])
+    return league.league_id, event.event_key
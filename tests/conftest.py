@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# app.py builds its engine from DATABASE_URL at import, so point it at a throwaway SQLite file first
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "fantasyfim.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models.base  # noqa: E402,F401  models.base must be imported before the model modules
@@ -0,0 +1,95 @@
+import pytest
+from sqlalchemy import event
+import app as api
+from models.base import Base
+from models.scores import Team, FRCEvent, TeamScore, League, FantasyTeam, TeamOwned
+from models.draft import Draft
+
+YEAR = 2025
+ROSTER_SIZE = 12
+# Statements one roster request may run, whatever the league size
+MAX_QUERIES = 3
+
+
+@pytest.fixture
+def session():
+    Base.metadata.drop_all(api.engine)
+    Base.metadata.create_all(api.engine)
+    api.response_cache.clear()
+    with api.Session() as session:
+        yield session
+
+
+@pytest.fixture
+def client():
+    return api.app.test_client()
+
+
+@pytest.fixture
+def statements():
+    """SQL statements the API runs while the test is active."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(api.engine, "after_cursor_execute", record)
+    yield executed
+    event.remove(api.engine, "after_cursor_execute", record)
+
+
+def seed_league(session, league_id: int, team_count: int, weeks: int = 0):
+    """A FiM league with team_count fantasy teams of ROSTER_SIZE teams, each playing one event per week."""
+    session.add(League(league_id=league_id, league_name=f"League {league_id}", is_fim=True, year=YEAR,
+                       discord_channel=str(league_id), team_size_limit=ROSTER_SIZE))
+    session.add(FRCEvent(event_key=f"{YEAR}l{league_id}draft", event_name="Draft Event", year=YEAR, week=0, is_fim=True))
+    session.add(Draft(draft_id=league_id, league_id=league_id, event_key=f"{YEAR}l{league_id}draft",
+                      discord_channel=str(league_id)))
+    for week in range(1, weeks + 1):
+        session.add(FRCEvent(event_key=f"{YEAR}l{league_id}w{week}", event_name=f"Week {week} Event",
+                             year=YEAR, week=week, is_fim=True))
+    for slot in range(team_count):
+        fantasy_team_id = league_id * 100 + slot
+        session.add(FantasyTeam(fantasy_team_id=fantasy_team_id, fantasy_team_name=f"Team {slot}", league_id=league_id))
+        for pick in range(ROSTER_SIZE):
+            team_number = str(fantasy_team_id * 100 + pick)
+            session.add(Team(team_number=team_number, name=f"FRC {team_number}"))
+            session.add(TeamOwned(team_key=team_number, fantasy_team_id=fantasy_team_id, league_id=league_id,
+                                  draft_id=league_id))
+            for week in range(1, weeks + 1):
+                session.add(TeamScore(team_key=team_number, event_key=f"{YEAR}l{league_id}w{week}"))
+    session.commit()
+
+
+def count_queries(client, statements, url: str):
+    statements.clear()
+    response = client.get(url)
+    assert response.status_code == 200
+    return len(statements), response.get_json()
+
+
+def test_rosters_query_count_is_independent_of_team_count(session, client, statements):
+    seed_league(session, 1, team_count=2)
+    seed_league(session, 2, team_count=16)
+
+    small_count, small = count_queries(client, statements, "/api/leagues/1/rosters")
+    large_count, large = count_queries(client, statements, "/api/leagues/2/rosters")
+
+    assert len(small) == 2 and len(large) == 16
+    assert all(len(team["roster"]) == ROSTER_SIZE for team in large)
+    assert small_count == large_count <= MAX_QUERIES
+
+
+def test_roster_weeks_query_count_is_independent_of_league_size(session, client, statements):
+    seed_league(session, 1, team_count=2, weeks=1)
+    seed_league(session, 2, team_count=16, weeks=12)
+
+    small_count, small = count_queries(client, statements, "/api/leagues/1/rosterWeeks")
+    large_count, large = count_queries(client, statements, "/api/leagues/2/rosterWeeks")
+
+    assert len(small) == 2 and len(large) == 16
+    for team in large:
+        assert len(team["roster"]) == ROSTER_SIZE
+        # Only events before States (week 6) are listed
+        assert all([event["week"] for event in frc_team["events"]] == [1, 2, 3, 4, 5] for frc_team in team["roster"])
+    assert small_count == large_count <= MAX_QUERIES
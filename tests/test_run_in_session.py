@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models.scores import Team
+from services.dbexecutor import DbExecutor
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine("sqlite:///" + str(tmp_path / "executor.db"))
+    Base.metadata.create_all(engine)
+    executor = DbExecutor(sessionmaker(bind=engine), max_workers=2)
+    yield executor
+    executor.shutdown()
+    engine.dispose()
+
+
+def test_slow_session_work_does_not_block_other_coroutines(db):
+    release = threading.Event()
+
+    def slow(session):
+        session.query(Team).count()
+        # Holds its database thread until the test lets it go
+        return release.wait(timeout=5)
+
+    async def main():
+        slow_task = asyncio.create_task(db.run_in_session(slow))
+        await asyncio.sleep(0)
+        count = await asyncio.wait_for(db.run_in_session(lambda session: session.query(Team).count()), timeout=2)
+        still_running = not slow_task.done()
+        release.set()
+        return count, still_running, await slow_task
+
+    assert asyncio.run(main()) == (0, True, True)
+
+
+def test_commit_persists_and_errors_roll_back(db):
+    def add_team(session, team_number):
+        session.add(Team(team_number=team_number, name=f"FRC {team_number}"))
+
+    def add_team_and_fail(session):
+        add_team(session, "2")
+        session.flush()
+        raise RuntimeError("failed after writing")
+
+    async def main():
+        await db.run_in_session(add_team, "1", commit=True)
+        with pytest.raises(RuntimeError):
+            await db.run_in_session(add_team_and_fail, commit=True)
+        return await db.run_in_session(lambda session: [team.team_number for team in session.query(Team)])
+
+    assert asyncio.run(main()) == ["1"]
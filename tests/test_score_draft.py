@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from models.base import Base
+from models.scores import Team, FRCEvent, TeamScore, League, FantasyTeam, FantasyScores
+from models.draft import Draft, DraftPick
+from services.scoring import score_draft
+
+YEAR = 2025
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine("sqlite:///" + str(tmp_path / "scoring.db"))
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def seed_draft(session, draft_week: int):
+    """An offseason league whose two teams each drafted one FRC team that played at two events."""
+    session.add(League(league_id=1, league_name="Offseason", offseason=True, is_fim=False, year=YEAR,
+                       discord_channel="1", team_size_limit=1))
+    session.add(FRCEvent(event_key=f"{YEAR}draft", event_name="Draft Event", year=YEAR, week=draft_week, is_fim=False))
+    session.add(FRCEvent(event_key=f"{YEAR}other", event_name="Other Event", year=YEAR, week=2, is_fim=True))
+    # Same week, another year: never counted
+    session.add(FRCEvent(event_key=f"{YEAR - 1}other", event_name="Last Year", year=YEAR - 1, week=2, is_fim=True))
+    session.add(Draft(draft_id=1, league_id=1, event_key=f"{YEAR}draft", discord_channel="1", rounds=1))
+    for fantasy_team_id, team_number, draft_points, other_points in ((1, "100", 10, 30), (2, "200", 20, 5)):
+        session.add(FantasyTeam(fantasy_team_id=fantasy_team_id, fantasy_team_name=f"Team {fantasy_team_id}", league_id=1))
+        session.add(Team(team_number=team_number, name=f"FRC {team_number}"))
+        session.add(DraftPick(draft_id=1, fantasy_team_id=fantasy_team_id, pick_number=fantasy_team_id, team_number=team_number))
+        session.add(TeamScore(team_key=team_number, event_key=f"{YEAR}draft", qual_points=draft_points))
+        session.add(TeamScore(team_key=team_number, event_key=f"{YEAR}other", qual_points=other_points))
+        session.add(TeamScore(team_key=team_number, event_key=f"{YEAR - 1}other", qual_points=100))
+    session.commit()
+
+
+def scores(session):
+    return {row.fantasy_team_id: (row.weekly_score, row.rank_points) for row in session.query(FantasyScores)}
+
+
+def test_draft_scores_only_its_own_event(session):
+    seed_draft(session, draft_week=3)
+    assert score_draft(session, 1) == (1, f"{YEAR}draft")
+    session.commit()
+    assert scores(session) == {1: (10, 0), 2: (20, 1)}
+
+
+def test_states_draft_scores_every_event_of_the_year(session):
+    seed_draft(session, draft_week=6)
+    score_draft(session, 1)
+    session.commit()
+    assert scores(session) == {1: (40, 1), 2: (25, 0)}
+
+
+def test_unknown_draft_or_event_is_reported(session):
+    seed_draft(session, draft_week=3)
+    with pytest.raises(LookupError, match="No draft"):
+        score_draft(session, 2)
+    session.query(FRCEvent).filter(FRCEvent.event_key == f"{YEAR}draft").delete()
+    with pytest.raises(LookupError, match="No event"):
+        score_draft(session, 1)
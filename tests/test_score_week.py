@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from models.base import Base
+from models.scores import Team, FRCEvent, TeamScore, League, FantasyTeam, TeamStarted, FantasyScores
+from services.scoring import score_week
+
+YEAR = 2025
+STATES_WEEK = 6
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine("sqlite:///" + str(tmp_path / "scoring.db"))
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def seed_states(session):
+    """A FiM league of four teams, each starting one FRC team at states that also played a district event."""
+    session.add(League(league_id=1, league_name="FiM", is_fim=True, year=YEAR, discord_channel="1", team_size_limit=1))
+    session.add(FRCEvent(event_key=f"{YEAR}district", event_name="District", year=YEAR, week=2, is_fim=True))
+    session.add(FRCEvent(event_key=f"{YEAR}states", event_name="States", year=YEAR, week=STATES_WEEK, is_fim=True))
+    # States of another year: never counted
+    session.add(FRCEvent(event_key=f"{YEAR - 1}states", event_name="Last States", year=YEAR - 1, week=STATES_WEEK, is_fim=True))
+    # (fantasy team, FRC team, district points, states points, rank points from earlier weeks)
+    for fantasy_team_id, team_number, district_points, states_points, earlier in (
+            (1, "100", 30, 10, 1), (2, "200", 0, 20, 3), (3, "300", 5, 1, 2), (4, "400", 50, 5, None)):
+        session.add(FantasyTeam(fantasy_team_id=fantasy_team_id, fantasy_team_name=f"Team {fantasy_team_id}", league_id=1))
+        session.add(Team(team_number=team_number, name=f"FRC {team_number}"))
+        session.add(TeamStarted(fantasy_team_id=fantasy_team_id, team_number=team_number, league_id=1,
+                                event_key=f"{YEAR}states", week=STATES_WEEK))
+        session.add(TeamScore(team_key=team_number, event_key=f"{YEAR}district", qual_points=district_points))
+        session.add(TeamScore(team_key=team_number, event_key=f"{YEAR}states", qual_points=states_points))
+        session.add(TeamScore(team_key=team_number, event_key=f"{YEAR - 1}states", qual_points=100))
+        if earlier is not None:
+            session.add(FantasyScores(league_id=1, fantasy_team_id=fantasy_team_id, week=1, event_key=f"fim{YEAR}",
+                                      rank_points=earlier, weekly_score=0))
+    session.commit()
+
+
+def scores(session, week):
+    return {row.fantasy_team_id: (row.weekly_score, row.rank_points)
+            for row in session.query(FantasyScores).filter(FantasyScores.week == week)}
+
+
+def test_states_scores_every_event_of_the_year(session):
+    seed_states(session)
+    assert score_week(session, YEAR, STATES_WEEK, states=True) == [1]
+    session.commit()
+    # The top three of earlier weeks keep the top places; the rest rank below them by weekly score
+    assert scores(session, STATES_WEEK) == {2: (20, 4), 3: (6, 3), 1: (40, 2), 4: (55, 0)}
+
+
+def test_other_weeks_score_only_the_started_event(session):
+    seed_states(session)
+    score_week(session, YEAR, STATES_WEEK)
+    session.commit()
+    assert scores(session, STATES_WEEK) == {1: (10, 2), 2: (20, 3), 3: (1, 0), 4: (5, 1)}
@@ -0,0 +1,189 @@
+"""
+Checks that the bot's and API's hot queries are served by indexes.
+
+Builds the schema in the Postgres database given by SCHEMA_CHECK_DATABASE_URL (never point this at
+production), fills empty tables with a season's worth of synthetic leagues, drafts and scores,
+then runs EXPLAIN on each canonical query. Exits non-zero if any plan sequentially scans a table
+holding at least --min-rows rows.
+
+    python -m tools.schema_check [--min-rows 1000]
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, func, insert, select, text
+from sqlalchemy.orm import Session
+from models.base import Base
+from models.scores import Team, FRCEvent, TeamScore, League, FantasyTeam, TeamOwned, TeamStarted, \
+    PlayerAuthorized, FantasyScores
+from models.draft import Draft, DraftPick, DraftPoolTeam
+from models.users import Player
+from migrations import indexes
+
+logger = logging.getLogger(__name__)
+
+YEAR = 2025
+WEEKS = 6
+TEAMS = 4000
+EVENTS = 180
+TEAMS_PER_EVENT = 40
+LEAGUES = 1500
+FIM_LEAGUES = 60
+TEAMS_PER_LEAGUE = 8
+ROUNDS = 3
+POOL_SIZE = 40
+BATCH_SIZE = 5000
+
+
+def _insert(session: Session, model, rows: list):
+    for start in range(0, len(rows), BATCH_SIZE):
+        session.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+def seed(session: Session, rng: random.Random):
+    """Synthetic data sized like a busy season: FiM season leagues plus many offseason drafts."""
+    teams = [str(number) for number in range(1, TEAMS + 1)]
+    _insert(session, Team, [{"team_number": team, "name": f"Team {team}", "is_fim": rng.random() < 0.15,
+                             "rookie_year": rng.randint(1992, YEAR)} for team in teams])
+    events = [{"event_key": f"{YEAR}ev{i}", "event_name": f"Event {i}", "year": YEAR, "week": i % WEEKS + 1,
+               "is_fim": i % 3 == 0} for i in range(EVENTS)]
+    _insert(session, FRCEvent, events)
+    _insert(session, TeamScore, [{"team_key": team, "event_key": event["event_key"], "qual_points": rng.randint(0, 22)}
+                                 for event in events for team in rng.sample(teams, TEAMS_PER_EVENT)])
+    events_by_week = {}
+    for event in events:
+        events_by_week.setdefault(event["week"], []).append(event["event_key"])
+
+    leagues, fantasy_teams, players, authorized, drafts = [], [], [], [], []
+    pool, picks, owned, starts, scores = [], [], [], [], []
+    for league_id in range(1, LEAGUES + 1):
+        is_fim = league_id <= FIM_LEAGUES
+        leagues.append({"league_id": league_id, "league_name": f"League {league_id}", "offseason": not is_fim,
+                        "team_limit": TEAMS_PER_LEAGUE, "team_starts": ROUNDS, "is_fim": is_fim, "year": YEAR,
+                        "discord_channel": str(1000000 + league_id), "team_size_limit": ROUNDS})
+        team_ids = [(league_id - 1) * TEAMS_PER_LEAGUE + slot for slot in range(1, TEAMS_PER_LEAGUE + 1)]
+        for team_id in team_ids:
+            fantasy_teams.append({"fantasy_team_id": team_id, "fantasy_team_name": f"Team {team_id}", "league_id": league_id})
+            players.append({"user_id": str(2000000 + team_id), "is_admin": False})
+            authorized.append({"player_id": str(2000000 + team_id), "fantasy_team_id": team_id})
+        drafts.append({"draft_id": league_id, "league_id": league_id, "event_key": rng.choice(events)["event_key"],
+                       "discord_channel": str(3000000 + league_id), "rounds": ROUNDS})
+        draft_pool = rng.sample(teams, POOL_SIZE)
+        pool.extend({"draft_id": league_id, "team_number": team, "pool_rank": rank}
+                    for rank, team in enumerate(draft_pool, start=1))
+        roster = {team_id: [] for team_id in team_ids}
+        for pick_number in range(1, ROUNDS * TEAMS_PER_LEAGUE + 1):
+            draft_round, slot = divmod(pick_number - 1, TEAMS_PER_LEAGUE)
+            team_id = team_ids[slot if draft_round % 2 == 0 else TEAMS_PER_LEAGUE - 1 - slot]
+            picks.append({"fantasy_team_id": team_id, "draft_id": league_id, "pick_number": pick_number,
+                          "team_number": draft_pool[pick_number - 1]})
+            owned.append({"team_key": draft_pool[pick_number - 1], "fantasy_team_id": team_id,
+                          "league_id": league_id, "draft_id": league_id})
+            roster[team_id].append(draft_pool[pick_number - 1])
+        if not is_fim:
+            continue
+        for team_id, team_numbers in roster.items():
+            for week in range(1, WEEKS + 1):
+                starts.extend({"fantasy_team_id": team_id, "team_number": team, "league_id": league_id,
+                               "event_key": rng.choice(events_by_week[week]), "week": week} for team in team_numbers)
+                scores.append({"league_id": league_id, "fantasy_team_id": team_id, "week": week,
+                               "event_key": f"fim{YEAR}", "rank_points": rng.randint(0, 8),
+                               "weekly_score": rng.randint(0, 150)})
+    for model, rows in ((League, leagues), (FantasyTeam, fantasy_teams), (Player, players),
+                        (PlayerAuthorized, authorized), (Draft, drafts), (DraftPoolTeam, pool),
+                        (DraftPick, picks), (TeamOwned, owned), (TeamStarted, starts), (FantasyScores, scores)):
+        _insert(session, model, rows)
+
+
+def canonical_queries(session: Session) -> dict:
+    """The hot lookups of the bot and the API, with parameters taken from rows in the database."""
+    league = session.scalars(select(League).order_by(League.is_fim.desc(), League.league_id)).first()
+    fantasy_team = session.scalars(select(FantasyTeam).filter(FantasyTeam.league_id == league.league_id)).first()
+    player_id = session.scalar(select(PlayerAuthorized.player_id)
+                               .filter(PlayerAuthorized.fantasy_team_id == fantasy_team.fantasy_team_id))
+    draft = session.scalars(select(Draft).order_by(Draft.draft_id)).first()
+    team_score = session.scalars(select(TeamScore)).first()
+    team_started = session.scalars(select(TeamStarted)).first()
+    draft_pick = session.scalars(select(DraftPick).filter(DraftPick.draft_id == draft.draft_id)).first()
+    return {
+        "league by channel": select(League).filter(League.discord_channel == league.discord_channel),
+        "draft by channel": select(Draft).filter(Draft.discord_channel == draft.discord_channel),
+        "player's team in channel": select(FantasyTeam.fantasy_team_id)
+            .join(PlayerAuthorized, FantasyTeam.fantasy_team_id == PlayerAuthorized.fantasy_team_id)
+            .join(League, FantasyTeam.league_id == League.league_id)
+            .filter(PlayerAuthorized.player_id == player_id)
+            .filter(League.discord_channel == league.discord_channel),
+        "players of team": select(PlayerAuthorized)
+            .filter(PlayerAuthorized.fantasy_team_id == fantasy_team.fantasy_team_id),
+        "teams in league": select(FantasyTeam).filter(FantasyTeam.league_id == league.league_id),
+        "team owned in league": select(TeamOwned)
+            .filter(TeamOwned.league_id == league.league_id, TeamOwned.team_key == team_started.team_number),
+        "roster of team": select(TeamOwned).filter(TeamOwned.fantasy_team_id == fantasy_team.fantasy_team_id),
+        "starts of team for week": select(TeamStarted)
+            .filter(TeamStarted.fantasy_team_id == team_started.fantasy_team_id, TeamStarted.week == team_started.week),
+        "starts of frc team in league": select(TeamStarted)
+            .filter(TeamStarted.league_id == team_started.league_id, TeamStarted.team_number == team_started.team_number),
+        "scores of frc team": select(TeamScore).filter(TeamScore.team_key == team_score.team_key),
+        "scores at event": select(TeamScore).filter(TeamScore.event_key == team_score.event_key),
+        "league scores for week": select(FantasyScores)
+            .filter(FantasyScores.league_id == league.league_id, FantasyScores.week == team_started.week)
+            .order_by(FantasyScores.weekly_score.desc()),
+        "draft pick of frc team": select(DraftPick)
+            .filter(DraftPick.draft_id == draft.draft_id, DraftPick.team_number == draft_pick.team_number),
+        "draft pool": select(DraftPoolTeam).filter(DraftPoolTeam.draft_id == draft.draft_id)
+            .order_by(DraftPoolTeam.pool_rank),
+    }
+
+
+def sequential_scans(plan: dict):
+    """Relation names of every Seq Scan node in an EXPLAIN (FORMAT JSON) plan."""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from sequential_scans(child)
+
+
+def check(engine, min_rows: int) -> list:
+    """Seed if needed, EXPLAIN every canonical query and return (query, table, rows) for each bad scan."""
+    Base.metadata.create_all(engine)
+    indexes.migrate(engine)
+    with Session(engine) as session:
+        if session.scalar(select(func.count()).select_from(League)) == 0:
+            logger.info("Seeding the database")
+            seed(session, random.Random(YEAR))
+            session.commit()
+        session.execute(text("ANALYZE"))
+        table_rows = dict(session.execute(text(
+            "SELECT relname, reltuples::bigint FROM pg_class WHERE relkind = 'r'"
+        )).all())
+        failures = []
+        for name, query in canonical_queries(session).items():
+            sql = query.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+            plan = session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            scanned = [table for table in sequential_scans(plan[0]["Plan"]) if table_rows.get(table, 0) >= min_rows]
+            for table in scanned:
+                failures.append((name, table, table_rows[table]))
+            logger.info(f"{'FAIL' if scanned else 'ok':4}  {name}")
+        return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN the canonical queries against a seeded database")
+    parser.add_argument("--min-rows", type=int, default=1000,
+                        help="sequential scans of tables smaller than this are allowed")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    load_dotenv()
+    url = os.getenv("SCHEMA_CHECK_DATABASE_URL")
+    if not url:
+        sys.exit("Set SCHEMA_CHECK_DATABASE_URL to a scratch Postgres database")
+    failures = check(create_engine(url), args.min_rows)
+    for name, table, rows in failures:
+        logger.error(f"'{name}' sequentially scans {table} ({rows} rows)")
+    sys.exit(1 if failures else 0)